@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Artifact Ingest - analyze a CI run from its uploaded artifacts.
+Downloads the `build-logs`, `swiftlint-results` and `snapshot-images`
+artifacts of a workflow run through the GitHub Actions API (parallel ranged
+requests, resumable across interrupted runs) and exposes the files inside the
+zips as path-like entries, so the log parser, SwiftLint aggregator and image
+analyzer stream them straight from the archive without extracting to disk.
+
+Environment:
+    GITHUB_API_URL          API root (default: https://api.github.com); point it at
+                            a local stand-in server to test without GitHub
+    SANITY_ARTIFACT_DIR     download cache (default: .sanity_artifacts)
+    SANITY_ARTIFACT_WORKERS parallel range requests per artifact (default: 4)
+
+Usage:
+    python Agents/artifact_ingest.py 123456789                 # download and list a run's artifacts
+    python Agents/artifact_ingest.py 123456789 --offline       # list what is already downloaded
+    python Agents/sanity_agent.py --run-id 123456789           # analyze that run
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import TextIOWrapper
+from pathlib import Path
+from typing import Dict, IO, List, Optional
+
+# Imported on first download; offline re-analysis never needs it
+requests = None
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_DOWNLOAD_DIR = Path(os.getenv("SANITY_ARTIFACT_DIR", ".sanity_artifacts"))
+ARTIFACT_NAMES = ("build-logs", "swiftlint-results", "snapshot-images")
+CHUNK_SIZE = 8 * 1024 * 1024
+STREAM_BLOCK = 256 * 1024
+MAX_ATTEMPTS = 3
+
+
+def load_requests():
+    global requests
+    if requests is None:
+        try:
+            import requests as module
+        except ImportError:
+            raise RuntimeError("requests not installed. Run: pip install requests")
+        requests = module
+    return requests
+
+
+class ArtifactError(RuntimeError):
+    """An artifact could not be listed, downloaded or read."""
+
+
+class EntryStat:
+    """The parts of `os.stat_result` the snapshot tools use."""
+
+    def __init__(self, size: int, mtime_ns: int):
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+
+
+class ArtifactEntry:
+    """
+    A file inside a downloaded artifact zip, usable where the agent expects a
+    `Path` to a local file (name, exists, stat, open, read_bytes, with_name).
+    Holds no open handles, so it can be sent to worker processes.
+    """
+
+    def __init__(self, archive: Path, member: str, size: int, mtime_ns: int,
+                 siblings: Optional[Dict[str, tuple]] = None):
+        self.archive = Path(archive)
+        self.member = member
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # Basename -> (member, size, mtime_ns) of the files in the same zip directory
+        self.siblings = siblings or {}
+
+    @property
+    def name(self) -> str:
+        return self.member.rsplit("/", 1)[-1]
+
+    def exists(self) -> bool:
+        return True
+
+    def stat(self) -> EntryStat:
+        return EntryStat(self.size, self.mtime_ns)
+
+    def resolve(self) -> "ArtifactEntry":
+        return self
+
+    def open(self, mode: str = "r", encoding: Optional[str] = None, errors: Optional[str] = None) -> IO:
+        """Stream the entry's decompressed contents (text unless mode has "b")."""
+        archive = zipfile.ZipFile(self.archive)
+        try:
+            stream = archive.open(self.member)
+        finally:
+            # The entry stream keeps the underlying file open until it is closed
+            archive.close()
+        if "b" in mode:
+            return stream
+        return TextIOWrapper(stream, encoding=encoding or "utf-8", errors=errors)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as stream:
+            return stream.read()
+
+    def with_name(self, name: str) -> "ArtifactEntry":
+        """Sibling entry in the same zip directory; one that doesn't exist if missing."""
+        sibling = self.siblings.get(name)
+        if sibling is None:
+            return MissingEntry(self.archive, _join(_directory(self.member), name))
+        return ArtifactEntry(self.archive, *sibling, self.siblings)
+
+    def __str__(self) -> str:
+        return f"{self.archive}/{self.member}"
+
+    def __repr__(self) -> str:
+        return f"ArtifactEntry({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ArtifactEntry) and str(self) == str(other)
+
+    def __lt__(self, other) -> bool:
+        return str(self) < str(other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+class MissingEntry(ArtifactEntry):
+    """Placeholder for a sibling that is not in the archive."""
+
+    def __init__(self, archive: Path, member: str):
+        super().__init__(archive, member, 0, 0)
+
+    def exists(self) -> bool:
+        return False
+
+
+def _mtime_ns(info: zipfile.ZipInfo) -> int:
+    return int(datetime(*info.date_time).timestamp() * 1e9)
+
+
+def _directory(member: str) -> str:
+    return member.rsplit("/", 1)[0] if "/" in member else ""
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+def archive_entries(archive: Path) -> List[ArtifactEntry]:
+    """Every file in a downloaded artifact zip, in archive order."""
+    with zipfile.ZipFile(archive) as zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+
+    directories: Dict[str, Dict[str, tuple]] = {}
+    for info in infos:
+        siblings = directories.setdefault(_directory(info.filename), {})
+        siblings[info.filename.rsplit("/", 1)[-1]] = (info.filename, info.file_size, _mtime_ns(info))
+
+    return [
+        ArtifactEntry(archive, info.filename, info.file_size, _mtime_ns(info), directories[_directory(info.filename)])
+        for info in infos
+    ]
+
+
+class RunArtifacts:
+    """The downloaded artifacts of one workflow run, by artifact name."""
+
+    def __init__(self, run_id: str, archives: Dict[str, Path], run: Optional[Dict] = None):
+        self.run_id = run_id
+        self.archives = archives
+        self.run = run or {}
+        self._entries: Dict[str, List[ArtifactEntry]] = {}
+
+    def entries(self, artifact: str) -> List[ArtifactEntry]:
+        if artifact not in self.archives:
+            return []
+        if artifact not in self._entries:
+            self._entries[artifact] = archive_entries(self.archives[artifact])
+        return self._entries[artifact]
+
+    def find(self, artifact: str, file_name: str) -> Optional[ArtifactEntry]:
+        """First entry of `artifact` named `file_name`, wherever it sits in the zip."""
+        return next((entry for entry in self.entries(artifact) if entry.name == file_name), None)
+
+    def glob(self, artifact: str, suffix: str) -> List[ArtifactEntry]:
+        return [entry for entry in self.entries(artifact) if entry.name.endswith(suffix)]
+
+
+class ArtifactClient:
+    """Lists and downloads a run's artifacts, caching them under `download_dir/<run_id>`."""
+
+    def __init__(self, repo: Optional[str], token: Optional[str], api_url: Optional[str] = None,
+                 download_dir: Path = DEFAULT_DOWNLOAD_DIR, workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE, offline: bool = False):
+        self.repo = repo
+        self.token = token
+        self.api_url = (api_url or os.getenv("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.download_dir = Path(download_dir)
+        self.workers = workers or int(os.getenv("SANITY_ARTIFACT_WORKERS", "4"))
+        self.chunk_size = chunk_size
+        self.offline = offline
+        self.stats = {"bytes_downloaded": 0, "bytes_resumed": 0, "range_requests": 0}
+        self._stats_lock = threading.Lock()
+
+    def api_headers(self) -> Dict[str, str]:
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def api_get(self, path: str, **kwargs) -> Dict:
+        if not self.repo:
+            raise ArtifactError("GITHUB_REPOSITORY is required to download artifacts")
+        response = load_requests().get(f"{self.api_url}/repos/{self.repo}{path}",
+                                       headers=self.api_headers(), timeout=30, **kwargs)
+        if response.status_code >= 400:
+            raise ArtifactError(f"GitHub API {path} failed with {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def run_dir(self, run_id: str) -> Path:
+        return self.download_dir / str(run_id)
+
+    # Listing
+
+    def list_artifacts(self, run_id: str) -> Dict:
+        """Run metadata and its artifacts by name; cached so re-analysis works offline."""
+        listing_file = self.run_dir(run_id) / "artifacts.json"
+        if self.offline:
+            if not listing_file.exists():
+                raise ArtifactError(f"Run {run_id} has not been downloaded to {self.run_dir(run_id)}")
+            return json.loads(listing_file.read_text())
+
+        run = self.api_get(f"/actions/runs/{run_id}")
+        artifacts: Dict[str, Dict] = {}
+        page = 1
+        while True:
+            data = self.api_get(f"/actions/runs/{run_id}/artifacts", params={"per_page": 100, "page": page})
+            for artifact in data.get("artifacts", []):
+                # Re-runs upload again under the same name; keep the newest live one
+                if artifact.get("expired"):
+                    continue
+                current = artifacts.get(artifact["name"])
+                if current is None or artifact["id"] > current["id"]:
+                    artifacts[artifact["name"]] = artifact
+            if len(data.get("artifacts", [])) < 100:
+                break
+            page += 1
+
+        listing = {
+            "run": {
+                "id": run.get("id"),
+                "head_sha": run.get("head_sha"),
+                "head_branch": run.get("head_branch"),
+                "pull_requests": [pr.get("number") for pr in run.get("pull_requests") or []],
+            },
+            "artifacts": artifacts,
+        }
+        listing_file.parent.mkdir(parents=True, exist_ok=True)
+        listing_file.write_text(json.dumps(listing, indent=2))
+        return listing
+
+    # Downloading
+
+    def resolve_download_url(self, artifact: Dict) -> tuple:
+        """
+        (url, headers) to fetch the zip from. GitHub redirects to short-lived
+        signed storage URLs that must be requested without the API token.
+        """
+        url = f"{self.api_url}/repos/{self.repo}/actions/artifacts/{artifact['id']}/zip"
+        response = load_requests().get(url, headers=self.api_headers(), allow_redirects=False,
+                                       stream=True, timeout=30)
+        response.close()
+        if response.status_code in (301, 302, 303, 307, 308):
+            return response.headers["Location"], {}
+        if response.status_code >= 400:
+            raise ArtifactError(f"Artifact {artifact['name']} download failed with {response.status_code}")
+        return url, self.api_headers()
+
+    def download(self, run_id: str, artifact: Dict) -> Path:
+        """Download one artifact zip, resuming a previous partial download."""
+        target = self.run_dir(run_id) / f"{artifact['name']}.zip"
+        if target.exists():
+            return target
+        if self.offline:
+            raise ArtifactError(f"Artifact {artifact['name']} of run {run_id} has not been downloaded")
+
+        part = target.with_suffix(".zip.part")
+        state_file = target.with_suffix(".zip.state")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        url, headers = self.resolve_download_url(artifact)
+
+        # Probe for range support and the total size
+        response = load_requests().get(url, headers={**headers, "Range": "bytes=0-0"}, stream=True, timeout=30)
+        response.close()
+        total = _content_range_total(response.headers.get("Content-Range")) if response.status_code == 206 else None
+
+        if total is None:
+            self._download_whole(url, headers, part)
+        else:
+            self._download_ranges(artifact, url, headers, part, state_file, total)
+
+        if not zipfile.is_zipfile(part):
+            part.unlink()
+            state_file.unlink(missing_ok=True)
+            raise ArtifactError(f"Artifact {artifact['name']} is not a valid zip archive")
+        part.replace(target)
+        state_file.unlink(missing_ok=True)
+        return target
+
+    def _download_whole(self, url: str, headers: Dict, part: Path):
+        """Fallback for servers without range support: one streamed request, no resume."""
+        with load_requests().get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code >= 400:
+                raise ArtifactError(f"Download of {url} failed with {response.status_code}")
+            with part.open("wb") as f:
+                for block in response.iter_content(STREAM_BLOCK):
+                    f.write(block)
+                    self._count("bytes_downloaded", len(block))
+
+    def _download_ranges(self, artifact: Dict, url: str, headers: Dict, part: Path, state_file: Path, total: int):
+        """Fetch fixed-size ranges in parallel; finished ranges are recorded so a rerun resumes."""
+        chunks = [(start, min(start + self.chunk_size, total) - 1) for start in range(0, total, self.chunk_size)]
+
+        done = set()
+        if part.exists() and state_file.exists():
+            try:
+                state = json.loads(state_file.read_text())
+                if state.get("size") == total and state.get("chunk_size") == self.chunk_size:
+                    done = set(state.get("done", []))
+            except (OSError, json.JSONDecodeError):
+                done = set()
+        if not done:
+            with part.open("wb") as f:
+                f.truncate(total)
+        else:
+            self._count("bytes_resumed", sum(chunks[i][1] - chunks[i][0] + 1 for i in done if i < len(chunks)))
+
+        lock = threading.Lock()
+        source = {"url": url, "headers": headers}
+
+        def fetch(index: int):
+            start, end = chunks[index]
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                with lock:
+                    current = dict(source)
+                try:
+                    self._fetch_range(current["url"], current["headers"], part, start, end)
+                    break
+                except ArtifactError as e:
+                    if attempt == MAX_ATTEMPTS:
+                        raise
+                    # Signed storage URLs expire after a minute; ask for a fresh one
+                    if "expired" in str(e):
+                        refreshed_url, refreshed_headers = self.resolve_download_url(artifact)
+                        with lock:
+                            source.update(url=refreshed_url, headers=refreshed_headers)
+                    time.sleep(attempt)
+            with lock:
+                done.add(index)
+                state_file.write_text(json.dumps({"size": total, "chunk_size": self.chunk_size,
+                                                  "done": sorted(done)}))
+
+        pending = [index for index in range(len(chunks)) if index not in done]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for future in [executor.submit(fetch, index) for index in pending]:
+                future.result()
+
+    def _fetch_range(self, url: str, headers: Dict, part: Path, start: int, end: int):
+        self._count("range_requests", 1)
+        try:
+            response = load_requests().get(url, headers={**headers, "Range": f"bytes={start}-{end}"},
+                                           stream=True, timeout=60)
+        except Exception as e:
+            raise ArtifactError(f"Range {start}-{end} failed: {e}")
+
+        with response:
+            if response.status_code in (401, 403):
+                raise ArtifactError(f"Range {start}-{end} rejected ({response.status_code}), URL expired?")
+            if response.status_code != 206 or not str(response.headers.get("Content-Range", "")).startswith(
+                    f"bytes {start}-"):
+                raise ArtifactError(f"Range {start}-{end} not honoured (status {response.status_code})")
+
+            written = 0
+            with part.open("r+b") as f:
+                f.seek(start)
+                for block in response.iter_content(STREAM_BLOCK):
+                    f.write(block)
+                    written += len(block)
+            self._count("bytes_downloaded", written)
+            if written != end - start + 1:
+                raise ArtifactError(f"Range {start}-{end} ended after {written} bytes")
+
+    def _count(self, key: str, amount: int):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def fetch_run(self, run_id: str, names=ARTIFACT_NAMES) -> RunArtifacts:
+        """Download the named artifacts of a run concurrently (missing ones are skipped)."""
+        listing = self.list_artifacts(run_id)
+        wanted = [listing["artifacts"][name] for name in names if name in listing["artifacts"]]
+        missing = [name for name in names if name not in listing["artifacts"]]
+        if missing:
+            print(f"Run {run_id} has no {', '.join(missing)} artifact(s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, len(wanted))) as executor:
+            futures = {artifact["name"]: executor.submit(self.download, run_id, artifact) for artifact in wanted}
+            archives = {name: future.result() for name, future in futures.items()}
+        return RunArtifacts(str(run_id), archives, listing.get("run"))
+
+
+def _content_range_total(header: Optional[str]) -> Optional[int]:
+    """Total size from a `Content-Range: bytes 0-0/12345` header."""
+    if not header or "/" not in header:
+        return None
+    total = header.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Download and list the artifacts of a CI run")
+    parser.add_argument("run_id", help="GitHub Actions workflow run id")
+    parser.add_argument("--repo", default=os.getenv("GITHUB_REPOSITORY"), help="owner/name")
+    parser.add_argument("--offline", action="store_true", help="Only use artifacts downloaded earlier")
+    args = parser.parse_args(argv)
+
+    client = ArtifactClient(args.repo, os.getenv("GITHUB_TOKEN"), offline=args.offline)
+    started = time.perf_counter()
+    try:
+        artifacts = client.fetch_run(args.run_id)
+    except ArtifactError as e:
+        print(f"Error: {e}")
+        return 1
+
+    run = artifacts.run
+    print(f"Run {artifacts.run_id} ({run.get('head_sha') or 'unknown sha'}): "
+          f"{client.stats['bytes_downloaded'] // 1024} KiB downloaded, "
+          f"{client.stats['bytes_resumed'] // 1024} KiB resumed, "
+          f"{client.stats['range_requests']} range requests, {time.perf_counter() - started:.1f}s")
+    for name in artifacts.archives:
+        entries = artifacts.entries(name)
+        print(f"  {name}: {len(entries)} files, {sum(entry.size for entry in entries) // 1024} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
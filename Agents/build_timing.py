@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Build Timing - compile-time hotspot analysis for xcodebuild logs.
+Reads `-showBuildTimingSummary` output and the Swift frontend's
+function-body / expression type-check timings, ranks the slowest functions
+and files, and compares them with the previous recorded run.
+
+Usage:
+    python Agents/build_timing.py xcodebuild.log
+    python Agents/build_timing.py xcodebuild.log --record
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# SwiftCompile normal arm64 (42 tasks) | 61.402 seconds
+TIMING_SUMMARY_PATTERN = re.compile(
+    r"^(?P<task>[A-Za-z][\w ]*?) \((?P<count>\d+) tasks?\) \| (?P<seconds>[\d.]+) seconds"
+)
+
+# -warn-long-function-bodies / -warn-long-expression-type-checking:
+# /path/View.swift:12:9: warning: getter 'body' took 250ms to type-check (limit: 100ms)
+TYPE_CHECK_WARNING_PATTERN = re.compile(
+    r"(?P<file>[^\s:]+\.swift):(?P<line>\d+):(?P<col>\d+): warning: "
+    r"(?P<what>.+?) took (?P<ms>\d+)ms to type-check"
+)
+
+# -debug-time-function-bodies / -debug-time-expression-type-checking:
+# 250.12ms	/path/View.swift:12:9	getter body
+DEBUG_TIME_PATTERN = re.compile(
+    r"^\s*(?P<ms>[\d.]+)ms\s+(?P<file>[^\s:]+\.swift):(?P<line>\d+):(?P<col>\d+)\s*(?P<what>.*)$"
+)
+
+HISTORY_FILE_NAME = "build_timing.json"
+SOURCE_ROOTS = ("SignLanguageModel/", "SignLanguageModelTests/")
+
+
+def relative_source_path(path: str) -> str:
+    """Strip the runner's checkout prefix so paths compare across machines."""
+    # The checkout directory is usually named after the repo too, so take the last match
+    index = max(path.rfind(f"/{root}") for root in SOURCE_ROOTS)
+    return path[index + 1:] if index >= 0 else path
+
+
+class BuildTimingCollector:
+    """Accumulates timing lines while a log is streamed."""
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict] = {}
+        self.functions: Dict[str, Dict] = {}
+
+    def feed(self, line: str):
+        if " seconds" in line and " | " in line:
+            match = TIMING_SUMMARY_PATTERN.match(line.strip())
+            if match:
+                self.tasks[match["task"]] = {"count": int(match["count"]), "seconds": float(match["seconds"])}
+                return
+
+        if "ms" not in line or ".swift:" not in line:
+            return
+
+        match = TYPE_CHECK_WARNING_PATTERN.search(line) or DEBUG_TIME_PATTERN.match(line)
+        if not match:
+            return
+
+        ms = float(match["ms"])
+        if ms <= 0:
+            return
+        file_path = relative_source_path(match["file"])
+        what = match["what"].strip() or "expression"
+        key = f"{file_path}:{match['line']}:{match['col']}:{what}"
+        # The same body is reported once per architecture/compile job; keep the worst
+        existing = self.functions.get(key)
+        if existing is None or ms > existing["ms"]:
+            self.functions[key] = {"file": file_path, "line": int(match["line"]), "what": what, "ms": ms}
+
+    def summary(self, top: int = 15) -> Dict:
+        files: Dict[str, float] = {}
+        for entry in self.functions.values():
+            files[entry["file"]] = files.get(entry["file"], 0.0) + entry["ms"]
+
+        functions = sorted(self.functions.values(), key=lambda entry: entry["ms"], reverse=True)
+        return {
+            "tasks": dict(sorted(self.tasks.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+            "functions": functions[:top],
+            "files": [
+                {"file": file_path, "ms": round(ms, 1)}
+                for file_path, ms in sorted(files.items(), key=lambda item: item[1], reverse=True)[:top]
+            ],
+            "total_type_check_ms": round(sum(files.values()), 1),
+        }
+
+
+def compare_with_previous(current: Dict, previous: Optional[Dict]) -> Dict:
+    """Annotate hotspots with the previous run's timings (None when new)."""
+    previous = previous or {}
+    previous_functions = {
+        f"{entry['file']}:{entry['what']}": entry["ms"] for entry in previous.get("functions", [])
+    }
+    previous_files = {entry["file"]: entry["ms"] for entry in previous.get("files", [])}
+
+    for entry in current["functions"]:
+        entry["previous_ms"] = previous_functions.get(f"{entry['file']}:{entry['what']}")
+    for entry in current["files"]:
+        entry["previous_ms"] = previous_files.get(entry["file"])
+
+    current["previous_sha"] = previous.get("sha")
+    current["previous_total_type_check_ms"] = previous.get("total_type_check_ms")
+    return current
+
+
+def load_previous(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: ignoring unreadable build timing history {path}: {e}")
+        return None
+
+
+def save_run(path: Path, summary: Dict, sha: Optional[str]):
+    record = {key: value for key, value in summary.items() if not key.startswith("previous_")}
+    record["functions"] = [
+        {key: value for key, value in entry.items() if key != "previous_ms"} for entry in summary["functions"]
+    ]
+    record["files"] = [{"file": entry["file"], "ms": entry["ms"]} for entry in summary["files"]]
+    record["sha"] = sha
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=2))
+
+
+def format_delta(ms: float, previous_ms: Optional[float]) -> str:
+    if previous_ms is None:
+        return "new"
+    delta = ms - previous_ms
+    return f"{delta:+.0f}ms"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rank compile-time hotspots in an xcodebuild log")
+    parser.add_argument("log", type=Path, help="xcodebuild log to parse")
+    parser.add_argument("--history", type=Path, default=Path(".sanity_history") / HISTORY_FILE_NAME)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--record", action="store_true", help="Store this run as the comparison baseline")
+    args = parser.parse_args(argv)
+
+    collector = BuildTimingCollector()
+    with args.log.open(encoding="utf-8", errors="ignore") as log:
+        for line in log:
+            collector.feed(line)
+
+    summary = compare_with_previous(collector.summary(args.top), load_previous(args.history))
+
+    for task, timing in list(summary["tasks"].items())[:5]:
+        print(f"{timing['seconds']:9.1f}s  {task} ({timing['count']} tasks)")
+    print()
+    for entry in summary["functions"]:
+        print(f"{entry['ms']:9.0f}ms  {format_delta(entry['ms'], entry['previous_ms']):>8}  "
+              f"{entry['file']}:{entry['line']} {entry['what']}")
+
+    if args.record:
+        save_run(args.history, summary, None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
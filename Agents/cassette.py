@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Cassette - record/replay of the agents' external traffic.
+In record mode every Claude, Gemini, GitHub and git call made through this
+module is stored in a compact cassette file (secrets redacted, large payloads
+content-addressed by SHA-256). In replay mode the cassette is served back with
+no network access, optionally with the recorded latency.
+
+Environment:
+    AGENT_CASSETTE_MODE     off (default) | record | replay
+    AGENT_CASSETTE          cassette path (default: agent_cassette.json.gz)
+    AGENT_CASSETTE_LATENCY  replay latency factor, 0 = instant, 1 = as recorded
+
+Usage:
+    AGENT_CASSETTE_MODE=record python Agents/sanity_agent.py
+    AGENT_CASSETTE_MODE=replay python Agents/sanity_agent.py
+    python Agents/cassette.py agent_cassette.json.gz        # summarize a cassette
+"""
+
+import argparse
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Imported on first live HTTP call; replays never need it
+requests = None
+
+DEFAULT_CASSETTE_PATH = "agent_cassette.json.gz"
+BLOB_THRESHOLD = 4096  # strings longer than this are stored once, by hash
+CASSETTE_VERSION = 1
+
+REDACTED = "<redacted>"
+# Credential key names only: usage counts such as input_tokens or total_token_count must survive
+SECRET_KEY_PATTERN = re.compile(
+    r"authorization|api[_-]?key|secret|password"
+    r"|^(?:x[_-])?(?:access|auth|bearer|refresh|session|id|github|gh|api|oauth)?[_-]?token$",
+    re.IGNORECASE
+)
+SECRET_VALUE_PATTERN = re.compile(
+    r"gh[pousr]_[A-Za-z0-9]{20,}|github_pat_[A-Za-z0-9_]{20,}|sk-ant-[A-Za-z0-9_-]{20,}|AIza[A-Za-z0-9_-]{30,}"
+)
+SECRET_ENV_SUFFIXES = ("_KEY", "_TOKEN", "_SECRET")
+
+
+def load_requests():
+    global requests
+    if requests is None:
+        try:
+            import requests as module
+        except ImportError:
+            raise RuntimeError("requests not installed. Run: pip install requests")
+        requests = module
+    return requests
+
+
+class CassetteMiss(RuntimeError):
+    """Replay found no recorded interaction for a request."""
+
+
+class RecordedError(RuntimeError):
+    """An exception that was raised while recording, re-raised on replay."""
+
+
+def _secret_values() -> List[str]:
+    values = [
+        value for name, value in os.environ.items()
+        if name.endswith(SECRET_ENV_SUFFIXES) and value and len(value) >= 8
+    ]
+    return sorted(values, key=len, reverse=True)
+
+
+def redact(value: Any, secrets: Optional[List[str]] = None) -> Any:
+    """Replace secret-looking keys, known secret env values and token patterns."""
+    secrets = _secret_values() if secrets is None else secrets
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if SECRET_KEY_PATTERN.search(str(key)) else redact(item, secrets)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item, secrets) for item in value]
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, REDACTED)
+        return SECRET_VALUE_PATTERN.sub(REDACTED, value)
+    return value
+
+
+class Cassette:
+    """Interactions keyed by kind + request hash, served in recorded order."""
+
+    def __init__(self, path: Path, mode: str = "off", latency: float = 0.0):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.interactions: List[Dict] = []
+        self.blobs: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.queues: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self.misses = 0
+
+        if mode == "replay":
+            self.load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # Content addressing
+
+    def _address(self, value: Any, store: bool) -> Any:
+        """Hash bytes and large strings; large strings are kept in the blob table when `store`."""
+        if isinstance(value, dict):
+            return {key: self._address(item, store) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._address(item, store) for item in value]
+        if isinstance(value, (bytes, bytearray)):
+            return {"$sha256": hashlib.sha256(value).hexdigest(), "$bytes": len(value)}
+        if isinstance(value, str) and len(value) > BLOB_THRESHOLD:
+            digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+            if store:
+                self.blobs[digest] = value
+            return {"$blob": digest}
+        return value
+
+    def _expand(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if "$blob" in value:
+                return self.blobs[value["$blob"]]
+            return {key: self._expand(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._expand(item) for item in value]
+        return value
+
+    def request_key(self, kind: str, request: Any) -> str:
+        canonical = json.dumps(self._address(redact(request), store=False), sort_keys=True, default=str)
+        return hashlib.sha256(f"{kind}\0{canonical}".encode("utf-8")).hexdigest()[:24]
+
+    # Record / replay
+
+    def call(self, kind: str, request: Any, perform: Callable[[], Any]) -> Any:
+        """
+        Run `perform` (or serve it from the cassette) for `request`.
+        `perform` must return JSON-serializable data.
+        """
+        if self.mode == "off":
+            return perform()
+
+        key = self.request_key(kind, request)
+        if self.replaying:
+            return self._replay(kind, key)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            response = perform()
+        except Exception as e:
+            response, error = None, e
+        seconds = round(time.perf_counter() - started, 3)
+
+        interaction = {"kind": kind, "key": key, "seconds": seconds}
+        with self.lock:
+            interaction["request"] = self._address(redact(request), store=True)
+            if error is None:
+                interaction["response"] = self._address(redact(response), store=True)
+            else:
+                interaction["error"] = redact(f"{type(error).__name__}: {error}")
+            self.interactions.append(interaction)
+
+        if error is not None:
+            raise error
+        return response
+
+    def _replay(self, kind: str, key: str) -> Any:
+        with self.lock:
+            queue = self.queues.get(f"{kind}:{key}")
+            if queue:
+                interaction = queue.popleft()
+                self.queues[kind].remove(interaction)
+            elif self.queues.get(kind):
+                # Request changed since recording (e.g. an edited prompt): serve the next one in order
+                interaction = self.queues[kind].popleft()
+                self.queues[f"{kind}:{interaction['key']}"].remove(interaction)
+                self.misses += 1
+                print(f"Warning: cassette has no exact match for {kind} {key}, replaying next recorded call")
+            else:
+                raise CassetteMiss(f"No recorded {kind} interaction left in {self.path}")
+
+        if self.latency > 0:
+            time.sleep(interaction["seconds"] * self.latency)
+        if "error" in interaction:
+            raise RecordedError(interaction["error"])
+        return self._expand(interaction["response"])
+
+    # Persistence
+
+    def load(self):
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        with opener(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.interactions = data.get("interactions", [])
+        self.blobs = data.get("blobs", {})
+        for interaction in self.interactions:
+            self.queues[interaction["kind"]].append(interaction)
+            self.queues[f"{interaction['kind']}:{interaction['key']}"].append(interaction)
+
+    def save(self):
+        if not self.recording:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        with self.lock, opener(self.path, "wt", encoding="utf-8") as f:
+            json.dump(
+                {"version": CASSETTE_VERSION, "interactions": self.interactions, "blobs": self.blobs},
+                f, separators=(",", ":")
+            )
+        print(f"Recorded {len(self.interactions)} interactions to {self.path}")
+
+
+_active: Optional[Cassette] = None
+
+
+def active() -> Cassette:
+    """The process-wide cassette configured from the environment."""
+    global _active
+    if _active is None:
+        mode = os.getenv("AGENT_CASSETTE_MODE", "off").lower()
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"AGENT_CASSETTE_MODE must be off, record or replay, not {mode!r}")
+        _active = Cassette(
+            Path(os.getenv("AGENT_CASSETTE", DEFAULT_CASSETTE_PATH)),
+            mode,
+            float(os.getenv("AGENT_CASSETTE_LATENCY", "0"))
+        )
+        if _active.recording:
+            atexit.register(_active.save)
+    return _active
+
+
+# HTTP
+
+class CassetteResponse:
+    """The parts of `requests.Response` the agents use."""
+
+    def __init__(self, method: str, url: str, status_code: int, text: str):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.ok:
+            return
+        message = f"{self.status_code} Error for url: {self.url}"
+        try:
+            http_error = load_requests().exceptions.HTTPError
+        except RuntimeError:
+            raise RuntimeError(message)
+        raise http_error(message, response=self)
+
+
+def http(method: str, url: str, headers: Optional[Dict] = None, **kwargs):
+    """`requests.request` through the active cassette."""
+    cassette = active()
+    if cassette.mode == "off":
+        return load_requests().request(method, url, headers=headers, **kwargs)
+
+    def perform():
+        response = load_requests().request(method, url, headers=headers, **kwargs)
+        return {"status": response.status_code, "text": response.text}
+
+    request = {"method": method, "url": url, "params": kwargs.get("params"), "json": kwargs.get("json")}
+    recorded = cassette.call("http", request, perform)
+    return CassetteResponse(method, url, recorded["status"], recorded["text"])
+
+
+# Subprocesses
+
+def run_command(args: List[str], check: bool = False, text: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """`subprocess.run` with captured output through the active cassette."""
+    cassette = active()
+    kwargs.setdefault("capture_output", True)
+    if cassette.mode == "off":
+        return subprocess.run(args, check=check, text=text, **kwargs)
+
+    def perform():
+        result = subprocess.run(args, text=True, errors="replace", **kwargs)
+        return {"returncode": result.returncode, "stdout": result.stdout or "", "stderr": result.stderr or ""}
+
+    recorded = cassette.call("command", {"args": list(args), "cwd": str(kwargs.get("cwd") or "")}, perform)
+    stdout, stderr = recorded["stdout"], recorded["stderr"]
+    if not text:
+        stdout, stderr = stdout.encode("utf-8"), stderr.encode("utf-8")
+    result = subprocess.CompletedProcess(args, recorded["returncode"], stdout, stderr)
+    if check:
+        result.check_returncode()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize a recorded agent cassette")
+    parser.add_argument("cassette", type=Path, nargs="?", default=Path(DEFAULT_CASSETTE_PATH))
+    args = parser.parse_args(argv)
+
+    if not args.cassette.exists():
+        print(f"Error: cassette not found: {args.cassette}")
+        return 1
+
+    cassette = Cassette(args.cassette, "replay")
+    kinds = Counter(interaction["kind"] for interaction in cassette.interactions)
+    seconds = Counter()
+    for interaction in cassette.interactions:
+        seconds[interaction["kind"]] += interaction["seconds"]
+
+    print(f"{len(cassette.interactions)} interactions, {len(cassette.blobs)} blobs "
+          f"({sum(len(blob) for blob in cassette.blobs.values()) // 1024} KiB), "
+          f"{args.cassette.stat().st_size // 1024} KiB on disk")
+    for kind, count in kinds.most_common():
+        print(f"{count:6d}  {seconds[kind]:8.2f}s  {kind}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
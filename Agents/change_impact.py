@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Change Impact - maps a PR's changed files to the tests they can affect.
+Builds a lightweight type-reference graph over the Swift sources so the
+Sanity Inspector only analyzes snapshot tests and lint findings a PR touches.
+
+Usage:
+    python Agents/change_impact.py                 # diff against origin/main
+    python Agents/change_impact.py --base HEAD~3
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import cassette
+
+DEFAULT_API_URL = "https://api.github.com"
+APP_ROOT = Path("SignLanguageModel")
+TESTS_ROOT = Path("SignLanguageModelTests")
+
+# Changes under these paths can alter any rendered snapshot
+GLOBAL_IMPACT_PATTERNS = (
+    "SignLanguageModel.xcodeproj/",
+    "SignLanguageModel/Assets.xcassets/",
+    "SignLanguageModel/Resources/",
+    "SignLanguageModelTests/Utilities/",
+)
+
+DECLARATION_PATTERN = re.compile(
+    r"\b(?:struct|class|enum|protocol|actor|typealias|extension)\s+([A-Z][A-Za-z0-9_]*)"
+)
+IDENTIFIER_PATTERN = re.compile(r"\b[A-Z][A-Za-z0-9_]*\b")
+COMMENT_PATTERN = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def changed_files_from_github(repo: str, pr_number: str, token: Optional[str],
+                              api_url: Optional[str] = None) -> List[str]:
+    """List files changed by a pull request via the GitHub API (paginated)."""
+    api_url = (api_url or os.getenv("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    files: List[str] = []
+    page = 1
+    while True:
+        response = cassette.http(
+            "GET",
+            f"{api_url}/repos/{repo}/pulls/{pr_number}/files",
+            headers=headers,
+            params={"per_page": 100, "page": page},
+            timeout=30
+        )
+        response.raise_for_status()
+        batch = response.json()
+        for entry in batch:
+            files.append(entry["filename"])
+            if entry.get("previous_filename"):
+                files.append(entry["previous_filename"])
+        if len(batch) < 100:
+            return files
+        page += 1
+
+
+def changed_files_from_git(base: str = "origin/main") -> List[str]:
+    """List files changed between the merge base with `base` and HEAD."""
+    result = cassette.run_command(["git", "diff", "--name-only", f"{base}...HEAD"], check=True, text=True)
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+class SwiftDependencyGraph:
+    """Reverse type-reference graph over the app and test Swift sources."""
+
+    def __init__(self, roots: Iterable[Path] = (APP_ROOT, TESTS_ROOT)):
+        self.declared: Dict[str, Set[str]] = {}
+        self.referencing: Dict[str, Set[str]] = {}
+
+        for root in roots:
+            if not root.exists():
+                continue
+            for swift_file in root.rglob("*.swift"):
+                self._index_file(swift_file)
+
+    def _index_file(self, swift_file: Path):
+        source = COMMENT_PATTERN.sub("", swift_file.read_text(encoding="utf-8", errors="ignore"))
+        path = swift_file.as_posix()
+        self.declared[path] = set(DECLARATION_PATTERN.findall(source))
+        for identifier in set(IDENTIFIER_PATTERN.findall(source)):
+            self.referencing.setdefault(identifier, set()).add(path)
+
+    def impacted_files(self, changed: Iterable[str]) -> Set[str]:
+        """All Swift files that (transitively) reference types declared in changed files."""
+        visited: Set[str] = set()
+        queue = deque(path for path in changed if path in self.declared)
+        while queue:
+            path = queue.popleft()
+            if path in visited:
+                continue
+            visited.add(path)
+            for type_name in self.declared.get(path, ()):
+                for dependent in self.referencing.get(type_name, ()):
+                    if dependent not in visited:
+                        queue.append(dependent)
+        return visited
+
+    def test_classes_in(self, paths: Iterable[str]) -> Set[str]:
+        """Test classes declared in the given files (those under the test target)."""
+        classes: Set[str] = set()
+        for path in paths:
+            if path.startswith(f"{TESTS_ROOT.as_posix()}/"):
+                classes.update(name for name in self.declared.get(path, ()) if name.endswith("Tests"))
+        return classes
+
+
+class ChangeImpact:
+    """Which test classes and source files a set of changed paths can affect."""
+
+    def __init__(self, changed_files: List[str], graph: Optional[SwiftDependencyGraph] = None):
+        self.changed_files = sorted(set(changed_files))
+        self.changed_swift = [path for path in self.changed_files if path.endswith(".swift")]
+        self.impacts_everything = any(
+            path.startswith(pattern) for path in self.changed_files for pattern in GLOBAL_IMPACT_PATTERNS
+        )
+
+        graph = graph or SwiftDependencyGraph()
+        impacted = graph.impacted_files(self.changed_swift)
+        self.impacted_test_classes = graph.test_classes_in(impacted)
+
+        # A changed reference image impacts its own test class
+        snapshots_prefix = f"{TESTS_ROOT.as_posix()}/__Snapshots__/"
+        for path in self.changed_files:
+            if path.startswith(snapshots_prefix):
+                self.impacted_test_classes.add(path[len(snapshots_prefix):].split("/")[0])
+
+    def is_test_class_impacted(self, test_class: str) -> bool:
+        # Unknown test classes are analyzed rather than silently skipped
+        return self.impacts_everything or not test_class or test_class in self.impacted_test_classes
+
+    def is_file_changed(self, file_path: str) -> bool:
+        """Match an absolute or workspace-relative path against the changed files."""
+        normalized = file_path.replace("\\", "/")
+        return any(normalized == path or normalized.endswith(f"/{path}") for path in self.changed_files)
+
+    def to_dict(self) -> Dict:
+        return {
+            "changed_files": len(self.changed_files),
+            "changed_swift_files": self.changed_swift,
+            "impacts_everything": self.impacts_everything,
+            "impacted_test_classes": sorted(self.impacted_test_classes),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show which tests a change can affect")
+    parser.add_argument("--base", default="origin/main", help="Base ref to diff against")
+    parser.add_argument("files", nargs="*", help="Changed files (defaults to git diff against --base)")
+    args = parser.parse_args(argv)
+
+    changed = args.files or changed_files_from_git(args.base)
+    print(json.dumps(ChangeImpact(changed).to_dict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
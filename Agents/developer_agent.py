@@ -4,68 +4,92 @@ Developer Agent - Phase 2 Autonomous Code Generation
 Uses Anthropic Claude to autonomously implement features from GitHub Issues.
 """
 
+import time
+
+STARTUP_STARTED = time.perf_counter()
+
+import argparse
 import os
 import sys
 import json
 import logging
+import subprocess
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional
 
-# Anthropic SDK imports
-try:
-    import anthropic
-except ImportError:
-    print("Error: anthropic not installed. Run: pip install anthropic")
-    sys.exit(1)
-
-# GitHub API
-try:
-    import requests
-except ImportError:
-    print("Error: requests not installed. Run: pip install requests")
-    sys.exit(1)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('developer_agent.log'),
-        logging.StreamHandler()
-    ]
-)
+from run_history import DEVELOPER_DB_PATH, RunHistoryStore
+from swift_preflight import SymbolTable, check_files, format_problem
+from model_router import CLAUDE_TIERS, ModelRouter, claude_route_score, is_model_not_found
+import cassette
+
+# Anthropic SDK is imported when the first Claude call is made
+anthropic = None
+
+IMPORT_SECONDS = time.perf_counter() - STARTUP_STARTED
+
 logger = logging.getLogger(__name__)
 
 
+def load_anthropic():
+    """Import and return the Anthropic SDK."""
+    global anthropic
+    if anthropic is None:
+        try:
+            import anthropic as module
+        except ImportError:
+            raise RuntimeError("anthropic not installed. Run: pip install anthropic")
+        anthropic = module
+    return anthropic
+
+
+def configure_logging():
+    """Log to the console and developer_agent.log (configured by main, not on import)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('developer_agent.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
 class DeveloperAgent:
     """
     Autonomous Developer Agent powered by Anthropic Claude.
     Reads GitHub issues and implements features autonomously.
     """
 
-    def __init__(self, issue_number: str):
+    def __init__(self, issue_number: str, dry_run: bool = False):
+        init_started = time.perf_counter()
         self.issue_number = issue_number
+        self.dry_run = dry_run
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.github_repo = os.getenv("GITHUB_REPOSITORY")  # e.g., "spsarolkar/SignLanguageModel"
         self.github_actor = os.getenv("GITHUB_ACTOR", "developer-agent")
 
-        if not self.anthropic_api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is required")
-        if not self.github_token:
-            raise ValueError("GITHUB_TOKEN environment variable is required")
+        # Replays are served from the cassette and need no credentials
+        if cassette.active().replaying:
+            self.anthropic_api_key = self.anthropic_api_key or "replay"
+            self.github_token = self.github_token or "replay"
+
+        # Credentials are checked when a provider is first used, so dry runs need none
         if not self.github_repo:
             raise ValueError("GITHUB_REPOSITORY environment variable is required")
 
         # Parse repo owner and name
         self.repo_owner, self.repo_name = self.github_repo.split("/")
 
-        # Initialize Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.anthropic_api_key)
-
-        # Identify latest available model
-        self.model_name = self._get_latest_model()
-        logger.info(f"Using Claude model: {self.model_name}")
+        # Anthropic client is created on the first Claude call; the model is
+        # routed per request (see model_router.py)
+        self._client = None
+        self.router = ModelRouter(
+            CLAUDE_TIERS,
+            enabled=os.getenv("AGENT_MODEL_ROUTING", "true").lower() != "false",
+            default_tier=1
+        )
 
         # Load developer persona
         self.system_prompt = self._load_developer_persona()
@@ -77,41 +101,31 @@ class DeveloperAgent:
         self.files_to_modify = []
         self.pr_url = None
 
-    def _get_latest_model(self) -> str:
-        """Identify the latest available Claude model for code generation."""
-        # Claude models optimized for code generation (in priority order)
-        preferred_models = [
-            "claude-sonnet-4-20250514",      # Latest Sonnet 4
-            "claude-opus-4-20250514",        # Latest Opus 4
-            "claude-sonnet-3-7-20250219",    # Sonnet 3.7
-            "claude-3-7-sonnet-20250219",    # Alternative naming
-            "claude-3-5-sonnet-20241022",    # Sonnet 3.5 (Oct 2024)
-            "claude-3-5-sonnet-20240620",    # Sonnet 3.5 (June 2024)
-            "claude-3-opus-20240229",        # Opus 3
-            "claude-3-sonnet-20240229",      # Sonnet 3
-        ]
+        # Per-run metrics appended to the run history
+        self.token_usage: List[Dict] = []
+        self.phase_timings: Dict[str, float] = {}
 
-        # Try to use the latest available model
-        for model in preferred_models:
-            try:
-                # Test if model is available by making a minimal request
-                response = self.client.messages.create(
-                    model=model,
-                    max_tokens=10,
-                    messages=[{"role": "user", "content": "test"}]
-                )
-                logger.info(f"Selected model: {model}")
-                return model
-            except anthropic.NotFoundError:
-                continue
-            except Exception as e:
-                logger.warning(f"Error testing model {model}: {e}")
-                continue
-
-        # Fallback to a reliable model
-        fallback = "claude-3-5-sonnet-20241022"
-        logger.warning(f"Using fallback model: {fallback}")
-        return fallback
+        # Local Swift validation before pushing; failing files are re-requested
+        self.preflight_retries = int(os.getenv("AGENT_PREFLIGHT_RETRIES", "2"))
+        self.preflight_stats = {"files": 0, "regenerated": 0, "attempts": 0}
+
+        # Startup profile: module imports, constructor and lazily initialized providers
+        self.startup = {
+            "imports_ms": round(IMPORT_SECONDS * 1000, 1),
+            "init_ms": round((time.perf_counter() - init_started) * 1000, 1),
+            "providers_ms": {}
+        }
+
+    @property
+    def client(self):
+        """Anthropic client, created on first use."""
+        if self._client is None:
+            started = time.perf_counter()
+            if not self.anthropic_api_key:
+                raise ValueError("ANTHROPIC_API_KEY environment variable is required")
+            self._client = load_anthropic().Anthropic(api_key=self.anthropic_api_key)
+            self.startup["providers_ms"]["anthropic"] = round((time.perf_counter() - started) * 1000, 1)
+        return self._client
 
     def _load_developer_persona(self) -> str:
         """Load the developer persona system prompt."""
@@ -143,6 +157,9 @@ Code Quality:
 
     def github_api_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
         """Make authenticated GitHub API request."""
+        if not self.github_token:
+            raise ValueError("GITHUB_TOKEN environment variable is required")
+
         url = f"https://api.github.com{endpoint}"
         headers = {
             "Authorization": f"Bearer {self.github_token}",
@@ -152,23 +169,22 @@ Code Quality:
 
         try:
             if method == "GET":
-                response = requests.get(url, headers=headers)
-            elif method == "POST":
-                response = requests.post(url, headers=headers, json=data)
-            elif method == "PATCH":
-                response = requests.patch(url, headers=headers, json=data)
+                response = cassette.http("GET", url, headers=headers)
+            elif method in ("POST", "PATCH"):
+                response = cassette.http(method, url, headers=headers, json=data)
             else:
                 raise ValueError(f"Unsupported method: {method}")
 
             response.raise_for_status()
             return response.json() if response.text else {}
 
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"GitHub API error: {e}")
-            logger.error(f"Response: {e.response.text if e.response else 'No response'}")
-            raise
         except Exception as e:
-            logger.error(f"Request error: {e}")
+            response = getattr(e, "response", None)
+            if response is not None:
+                logger.error(f"GitHub API error: {e}")
+                logger.error(f"Response: {response.text}")
+            else:
+                logger.error(f"Request error: {e}")
             raise
 
     def fetch_issue(self) -> Dict:
@@ -265,17 +281,56 @@ Code Quality:
             logger.error(f"Error writing file {filepath}: {e}")
             raise
 
-    def call_claude(self, prompt: str, max_tokens: int = 4096) -> str:
-        """Make a call to Claude API."""
+    def call_claude(self, prompt: str, max_tokens: int = 4096, task: str = "general",
+                    route: Optional[Dict] = None) -> str:
+        """Make a call to Claude API on the routed model tier."""
+        route = route or self.router.choose(claude_route_score(task, len(prompt)))
         try:
-            message = self.client.messages.create(
-                model=self.model_name,
-                max_tokens=max_tokens,
-                system=self.system_prompt,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+            while True:
+                model = self.router.model_for(route)
+                started = time.perf_counter()
+                try:
+                    response = self.create_message(model, prompt, max_tokens)
+                    break
+                except Exception as e:
+                    if not is_model_not_found(e):
+                        raise
+                    logger.warning(f"Model {model} is not available, trying the next one")
+                    self.router.mark_unavailable(model)
+
+            entry = self.router.record(
+                route, model, task, time.perf_counter() - started,
+                response["input_tokens"], response["output_tokens"]
             )
+            logger.info(f"Claude {entry['tier']} tier ({model}) for {task}: {entry['seconds']}s ({entry['reason']})")
+            self.token_usage.append({
+                "model": model,
+                "task": task,
+                "input_tokens": response["input_tokens"],
+                "output_tokens": response["output_tokens"],
+                "seconds": entry["seconds"]
+            })
+
+            return response["text"].strip()
+
+        except Exception as e:
+            logger.error(f"Error calling Claude: {e}")
+            raise
+
+    def create_message(self, model: str, prompt: str, max_tokens: int) -> Dict:
+        """One Messages API request (recorded/replayed by the cassette)."""
+        request = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "system": self.system_prompt,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+        def send() -> Dict:
+            message = self.client.messages.create(**request)
+            usage = getattr(message, "usage", None)
 
             # Extract text from response
             response_text = ""
@@ -283,11 +338,13 @@ Code Quality:
                 if block.type == "text":
                     response_text += block.text
 
-            return response_text.strip()
+            return {
+                "text": response_text,
+                "input_tokens": getattr(usage, "input_tokens", None),
+                "output_tokens": getattr(usage, "output_tokens", None)
+            }
 
-        except Exception as e:
-            logger.error(f"Error calling Claude: {e}")
-            raise
+        return cassette.active().call("anthropic.messages", request, send)
 
     def plan_implementation(self, issue_data: Dict, codebase_structure: Dict) -> Dict:
         """Use Claude to plan the implementation."""
@@ -333,17 +390,30 @@ Code Quality:
     "testing_strategy": "How to test this feature"
 }}"""
 
+        score = claude_route_score("plan", len(prompt))
         try:
-            response = self.call_claude(prompt, max_tokens=4096)
-
-            # Extract JSON from markdown code blocks if present
-            result_text = response
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
+            escalation = 0
+            while True:
+                route = self.router.choose(score, escalation)
+                response = self.call_claude(prompt, max_tokens=4096, task="plan", route=route)
+
+                # Extract JSON from markdown code blocks if present
+                result_text = response
+                if "```json" in result_text:
+                    result_text = result_text.split("```json")[1].split("```")[0].strip()
+                elif "```" in result_text:
+                    result_text = result_text.split("```")[1].split("```")[0].strip()
+
+                try:
+                    plan = json.loads(result_text)
+                    break
+                except json.JSONDecodeError:
+                    # An unusable plan counts as low confidence: retry once on a stronger tier
+                    if escalation or not self.router.can_escalate(route):
+                        raise
+                    logger.warning("Plan was not valid JSON, escalating to a stronger model")
+                    escalation += 1
 
-            plan = json.loads(result_text)
             logger.info(f"Implementation plan created: {plan.get('analysis')}")
 
             return plan
@@ -352,7 +422,8 @@ Code Quality:
             logger.error(f"Error planning implementation: {e}")
             raise
 
-    def generate_code(self, file_spec: Dict, context_files: List[str] = None) -> str:
+    def generate_code(self, file_spec: Dict, context_files: List[str] = None,
+                      problems: Optional[List[str]] = None, escalation: int = 0) -> str:
         """Use Claude to generate Swift code for a file."""
         filepath = file_spec.get("path")
         purpose = file_spec.get("purpose", "")
@@ -389,8 +460,16 @@ Description: {self.issue_data.get('body', '')}
 
 **Output only the complete Swift code, no explanations.**"""
 
+        if problems:
+            prompt += "\n\n**A previous version of this file failed validation. Fix these problems and return the complete file:**\n"
+            prompt += "\n".join(f"- {problem}" for problem in problems)
+
         try:
-            code = self.call_claude(prompt, max_tokens=8192)
+            route = self.router.choose(
+                claude_route_score("generate", len(prompt), filepath, modifying="existing_code" in file_spec),
+                escalation
+            )
+            code = self.call_claude(prompt, max_tokens=8192, task="generate", route=route)
 
             # Remove markdown code blocks if present
             if "```swift" in code:
@@ -406,22 +485,61 @@ Description: {self.issue_data.get('body', '')}
             logger.error(f"Error generating code: {e}")
             raise
 
+    def preflight(self, generated: Dict[str, Dict]):
+        """
+        Validate generated Swift files locally before anything is pushed.
+        Only failing files are regenerated (with the problems in the prompt),
+        up to AGENT_PREFLIGHT_RETRIES times; then the run is aborted.
+        """
+        swift_files = {path: spec for path, spec in generated.items() if path.endswith(".swift")}
+        self.preflight_stats["files"] = len(swift_files)
+        if not swift_files:
+            return
+
+        symbols = SymbolTable.from_repo(exclude=swift_files)
+        for attempt in range(self.preflight_retries + 1):
+            self.preflight_stats["attempts"] = attempt + 1
+            contents = {path: self.read_file(path) or "" for path in swift_files}
+            results = check_files(contents, symbols)
+            failures = {path: problems for path, problems in results.items() if problems}
+
+            if not failures:
+                logger.info(f"Pre-flight passed for {len(swift_files)} Swift files")
+                return
+
+            for path, problems in failures.items():
+                for problem in problems:
+                    logger.warning(f"Pre-flight: {format_problem(path, problem)}")
+
+            if attempt == self.preflight_retries:
+                details = "\n".join(
+                    format_problem(path, problem) for path, problems in failures.items() for problem in problems
+                )
+                raise RuntimeError(f"Generated code failed pre-flight validation:\n{details}")
+
+            for path, problems in failures.items():
+                logger.info(f"Regenerating {path} ({len(problems)} problems)")
+                self.preflight_stats["regenerated"] += 1
+                # Failed validation: retry on a stronger tier
+                code = self.generate_code(swift_files[path], problems=[
+                    f"line {problem['line']}: {problem['message']}" for problem in problems
+                ], escalation=attempt + 1)
+                self.write_file(path, code)
+
     def create_branch(self):
         """Create a new feature branch."""
-        import subprocess
-
         self.branch_name = f"feature/issue-{self.issue_number}"
         logger.info(f"Creating branch: {self.branch_name}")
 
         try:
             # Ensure we're on main
-            subprocess.run(["git", "checkout", "main"], check=True, capture_output=True)
+            cassette.run_command(["git", "checkout", "main"], check=True, capture_output=True)
 
             # Pull latest
-            subprocess.run(["git", "pull", "origin", "main"], check=True, capture_output=True)
+            cassette.run_command(["git", "pull", "origin", "main"], check=True, capture_output=True)
 
             # Create and checkout new branch
-            subprocess.run(["git", "checkout", "-b", self.branch_name], check=True, capture_output=True)
+            cassette.run_command(["git", "checkout", "-b", self.branch_name], check=True, capture_output=True)
 
             logger.info(f"Branch {self.branch_name} created successfully")
 
@@ -432,13 +550,11 @@ Description: {self.issue_data.get('body', '')}
 
     def commit_and_push(self):
         """Commit changes and push to remote."""
-        import subprocess
-
         logger.info("Committing and pushing changes")
 
         try:
             # Add all changes
-            subprocess.run(["git", "add", "."], check=True, capture_output=True)
+            cassette.run_command(["git", "add", "."], check=True, capture_output=True)
 
             # Commit
             commit_message = f"""feat: Implement issue #{self.issue_number}
@@ -454,14 +570,14 @@ Closes #{self.issue_number}
 🤖 Generated with Developer Agent powered by Anthropic Claude
 """
 
-            subprocess.run(
+            cassette.run_command(
                 ["git", "commit", "-m", commit_message],
                 check=True,
                 capture_output=True
             )
 
             # Push
-            subprocess.run(
+            cassette.run_command(
                 ["git", "push", "-u", "origin", self.branch_name],
                 check=True,
                 capture_output=True
@@ -562,15 +678,59 @@ Powered by Anthropic Claude
         except Exception as e:
             logger.error(f"Error commenting on issue: {e}")
 
+    @contextmanager
+    def phase(self, name: str):
+        """Record the wall-clock time of one run phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_timings[name] = round(time.perf_counter() - started, 3)
+
+    def record_history(self, output: Dict):
+        """Append this run to the SQLite run history (never fails the run)."""
+        try:
+            store = RunHistoryStore(DEVELOPER_DB_PATH)
+            try:
+                run_id = store.record_run(
+                    "developer", output,
+                    issue=self.issue_number,
+                    status=output.get("status"),
+                    token_usage=self.token_usage,
+                    phase_timings=self.phase_timings
+                )
+            finally:
+                store.close()
+            logger.info(f"Run #{run_id} appended to {DEVELOPER_DB_PATH}")
+        except Exception as e:
+            logger.error(f"Error recording run history: {e}")
+
+    def dry_run_summary(self):
+        """Log what a run would do without calling Claude, GitHub or git."""
+        logger.info("Dry run: no Claude, GitHub or git calls will be made")
+        structure = self.explore_codebase()
+        logger.info("Codebase: " + ", ".join(f"{len(files)} {area} files" for area, files in structure.items()))
+        logger.info(f"Would fetch issue #{self.issue_number} from {self.github_repo}")
+        logger.info(f"Would plan and generate code with Claude, then push feature/issue-{self.issue_number}")
+        tiers = ", ".join(f"{tier['name']}: {tier['models'][0]}" for tier in self.router.tiers)
+        logger.info(f"Model routing {'enabled' if self.router.enabled else 'disabled'} ({tiers})")
+        for name, value in (("ANTHROPIC_API_KEY", self.anthropic_api_key), ("GITHUB_TOKEN", self.github_token)):
+            logger.info(f"{name}: {'set' if value else 'MISSING'}")
+
     def run(self):
         """Main execution flow."""
         logger.info(f"🤖 Developer Agent starting for issue #{self.issue_number}")
-        logger.info(f"Using Anthropic Claude model: {self.model_name}")
+        logger.info(f"Startup: imports {self.startup['imports_ms']}ms, init {self.startup['init_ms']}ms")
+
+        if self.dry_run:
+            self.dry_run_summary()
+            return
 
         try:
             # Step 1: Fetch issue
             logger.info("Step 1: Fetching issue")
-            issue_data = self.fetch_issue()
+            with self.phase("fetch_issue"):
+                issue_data = self.fetch_issue()
 
             if issue_data.get("state") == "closed":
                 logger.warning(f"Issue #{self.issue_number} is already closed")
@@ -578,11 +738,13 @@ Powered by Anthropic Claude
 
             # Step 2: Explore codebase
             logger.info("Step 2: Exploring codebase")
-            codebase_structure = self.explore_codebase()
+            with self.phase("explore"):
+                codebase_structure = self.explore_codebase()
 
             # Step 3: Plan implementation
             logger.info("Step 3: Planning implementation with Claude")
-            plan = self.plan_implementation(issue_data, codebase_structure)
+            with self.phase("plan"):
+                plan = self.plan_implementation(issue_data, codebase_structure)
 
             self.files_to_create = plan.get("files_to_create", [])
             self.files_to_modify = plan.get("files_to_modify", [])
@@ -592,33 +754,45 @@ Powered by Anthropic Claude
 
             # Step 4: Create branch
             logger.info("Step 4: Creating feature branch")
-            self.create_branch()
+            with self.phase("branch"):
+                self.create_branch()
 
             # Step 5: Generate and write code
             logger.info("Step 5: Generating code with Claude")
 
-            for file_spec in self.files_to_create:
-                logger.info(f"Creating: {file_spec.get('path')}")
-                code = self.generate_code(file_spec)
-                self.write_file(file_spec.get('path'), code)
-
-            for file_spec in self.files_to_modify:
-                logger.info(f"Modifying: {file_spec.get('path')}")
-                # Read existing file
-                existing_code = self.read_file(file_spec.get('path'))
-                if existing_code:
-                    # Generate updated version
-                    file_spec['existing_code'] = existing_code
+            generated = {}
+            with self.phase("generate"):
+                for file_spec in self.files_to_create:
+                    logger.info(f"Creating: {file_spec.get('path')}")
                     code = self.generate_code(file_spec)
                     self.write_file(file_spec.get('path'), code)
+                    generated[file_spec.get('path')] = file_spec
+
+                for file_spec in self.files_to_modify:
+                    logger.info(f"Modifying: {file_spec.get('path')}")
+                    # Read existing file
+                    existing_code = self.read_file(file_spec.get('path'))
+                    if existing_code:
+                        # Generate updated version
+                        file_spec['existing_code'] = existing_code
+                        code = self.generate_code(file_spec)
+                        self.write_file(file_spec.get('path'), code)
+                        generated[file_spec.get('path')] = file_spec
+
+            # Step 5b: Validate locally before anything is pushed
+            logger.info("Step 5b: Pre-flight validation of generated Swift")
+            with self.phase("preflight"):
+                self.preflight(generated)
 
             # Step 6: Commit and push
             logger.info("Step 6: Committing and pushing")
-            self.commit_and_push()
+            with self.phase("commit_push"):
+                self.commit_and_push()
 
             # Step 7: Create PR
             logger.info("Step 7: Creating pull request")
-            pr_url = self.create_pull_request()
+            with self.phase("pull_request"):
+                pr_url = self.create_pull_request()
 
             # Save output
             output = {
@@ -626,13 +800,17 @@ Powered by Anthropic Claude
                 "issue_number": self.issue_number,
                 "branch": self.branch_name,
                 "pr_url": pr_url,
-                "model_used": self.model_name,
+                "model_used": ", ".join(sorted({route["model"] for route in self.router.routes})),
+                "routing": self.router.summary(),
+                "startup": self.startup,
+                "preflight": self.preflight_stats,
                 "files_created": [f.get('path') for f in self.files_to_create],
                 "files_modified": [f.get('path') for f in self.files_to_modify]
             }
 
             with open("agent_output.json", "w") as f:
                 json.dump(output, f, indent=2)
+            self.record_history(output)
 
             logger.info(f"✅ Developer Agent completed successfully!")
             logger.info(f"Pull Request: {pr_url}")
@@ -652,19 +830,34 @@ Powered by Anthropic Claude
             except:
                 pass
 
+            self.record_history({
+                "status": "failure",
+                "issue_number": self.issue_number,
+                "branch": self.branch_name,
+                "routing": self.router.summary(),
+                "startup": self.startup,
+                "preflight": self.preflight_stats,
+                "error": str(e)
+            })
             sys.exit(1)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python developer_agent.py <issue_number>")
-        sys.exit(1)
+def main():
+    parser = argparse.ArgumentParser(description="Developer Agent - implements GitHub issues with Claude")
+    parser.add_argument("issue_number", help="GitHub issue to implement")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Check configuration and explore the codebase without Claude, GitHub or git calls")
+    args = parser.parse_args()
 
-    issue_number = sys.argv[1]
+    configure_logging()
 
     try:
-        agent = DeveloperAgent(issue_number)
+        agent = DeveloperAgent(args.issue_number, dry_run=args.dry_run)
         agent.run()
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Gemini Cache - reuse of reference snapshots uploaded through the Gemini File API.
+Reference images are uploaded once and then sent as file handles until shortly
+before their 48h expiry, keyed by content hash in
+`.sanity_history/gemini_cache.json`, so the same baseline PNGs are not
+re-uploaded with every request and run. File handles save upload bytes, not
+input tokens: the referenced image is still billed as prompt input. The
+regression rubric stays inline; it is far below Gemini's minimum cacheable
+context size. Anything the API rejects or has expired is sent inline instead.
+
+Environment:
+    SANITY_GEMINI_CACHE      set to false to send every request inline
+
+Usage:
+    python Agents/gemini_cache.py                                # list uploaded files
+    python Agents/gemini_cache.py .sanity_history/gemini_cache.json
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+CACHE_FILE_NAME = "gemini_cache.json"
+# Uploaded files expire 48h after upload and can't be renewed; stop reusing them an hour early
+FILE_LIFETIME = 48 * 3600
+FILE_REUSE_MARGIN = 3600
+
+
+def content_hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def strip_cache_flag(part):
+    """Inline form of a content part marked {"cache": True}."""
+    if isinstance(part, dict) and "cache" in part:
+        return {key: value for key, value in part.items() if key != "cache"}
+    return part
+
+
+class PreparedRequest:
+    """Contents ready to send and the cache keys of the file handles they use."""
+
+    def __init__(self, contents: List, used: Optional[List[str]] = None):
+        self.contents = contents
+        self.used = used or []
+
+
+class GeminiFileCache:
+    """Content-hash keyed store of uploaded files (content parts marked {"cache": True})."""
+
+    def __init__(self, path: Optional[Path], sdk_loader: Callable, enabled: bool = True):
+        self.path = path
+        self.sdk_loader = sdk_loader
+        self.enabled = enabled
+        self.files: Dict[str, Dict] = {}
+        # Uploads in flight, so concurrent requests for one image upload it once
+        self.uploads: Dict[str, threading.Event] = {}
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.stats = {"file_hits": 0, "file_uploads": 0, "upload_failures": 0,
+                      "upload_bytes_saved": 0, "invalidated": 0}
+
+        if enabled and path and path.exists():
+            try:
+                self.files = json.loads(path.read_text()).get("files", {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: ignoring unreadable Gemini cache {path}: {e}")
+        self.expire()
+
+    def expire(self):
+        """Drop uploads that have expired (or are too close to expiry to reuse)."""
+        now = time.time()
+        with self.lock:
+            stale = [key for key, entry in self.files.items() if entry["expires_at"] <= now + FILE_REUSE_MARGIN]
+            for key in stale:
+                del self.files[key]
+            self.dirty = self.dirty or bool(stale)
+
+    def reusable(self, data: bytes) -> bool:
+        """Whether `data` is already uploaded and can be sent as a file handle."""
+        if not self.enabled:
+            return False
+        with self.lock:
+            entry = self.files.get(content_hash("file", data))
+            return entry is not None and entry["expires_at"] > time.time() + FILE_REUSE_MARGIN
+
+    # Requests
+
+    def prepare(self, contents: List) -> PreparedRequest:
+        """Swap cacheable parts for uploaded file handles where possible."""
+        if not self.enabled:
+            return self.inline(contents)
+
+        self.expire()
+        used = []
+        parts = []
+        for part in contents:
+            if isinstance(part, dict) and part.get("cache"):
+                handle, key = self.file_for(part)
+                if handle is not None:
+                    parts.append(handle)
+                    used.append(key)
+                    continue
+            parts.append(strip_cache_flag(part))
+        return PreparedRequest(parts, used)
+
+    def inline(self, contents: List) -> PreparedRequest:
+        return PreparedRequest([strip_cache_flag(part) for part in contents])
+
+    def invalidate(self, used: List[str]):
+        """Forget handles the API refused (deleted or expired server-side)."""
+        with self.lock:
+            for key in used:
+                if self.files.pop(key, None) is not None:
+                    self.stats["invalidated"] += 1
+                    self.dirty = True
+
+    # Uploaded files
+
+    def file_for(self, part: Dict) -> tuple:
+        """
+        (file_data part or None, key) for an inline {"mime_type", "data"} part.
+        The upload runs outside the lock; a concurrent request for the same
+        image waits for it instead of uploading again.
+        """
+        data = part["data"]
+        key = content_hash("file", data)
+        with self.lock:
+            entry = self.files.get(key)
+            if entry:
+                return self._reuse(entry, len(data)), key
+            pending = self.uploads.get(key)
+            if pending is None:
+                self.uploads[key] = threading.Event()
+
+        if pending is not None:
+            pending.wait()
+            with self.lock:
+                entry = self.files.get(key)
+                # None when the other upload failed; that request went inline too
+                return (self._reuse(entry, len(data)) if entry else None), key
+
+        try:
+            uploaded = self.sdk_loader().upload_file(
+                io.BytesIO(data), mime_type=part["mime_type"], display_name=f"sanity-ref-{key[:12]}"
+            )
+            expiration = getattr(uploaded, "expiration_time", None)
+            entry = {
+                "name": uploaded.name,
+                "uri": uploaded.uri,
+                "mime_type": part["mime_type"],
+                "bytes": len(data),
+                "expires_at": expiration.timestamp() if expiration else time.time() + FILE_LIFETIME
+            }
+        except Exception as e:
+            print(f"Could not upload reference image, sending it inline: {e}")
+            entry = None
+
+        with self.lock:
+            if entry is None:
+                self.stats["upload_failures"] += 1
+            else:
+                self.files[key] = entry
+                self.stats["file_uploads"] += 1
+                self.dirty = True
+            self.uploads.pop(key).set()
+        if entry is None:
+            return None, key
+        return {"file_data": {"mime_type": entry["mime_type"], "file_uri": entry["uri"]}}, key
+
+    def _reuse(self, entry: Dict, size: int) -> Dict:
+        """file_data part for an existing upload (called with the lock held)."""
+        self.stats["file_hits"] += 1
+        self.stats["upload_bytes_saved"] += size
+        return {"file_data": {"mime_type": entry["mime_type"], "file_uri": entry["uri"]}}
+
+    # Reporting and persistence
+
+    def summary(self) -> Dict:
+        lookups = self.stats["file_hits"] + self.stats["file_uploads"]
+        return {
+            "enabled": self.enabled,
+            "file_hit_rate": round(self.stats["file_hits"] / lookups, 3) if lookups else None,
+            **self.stats
+        }
+
+    def save(self):
+        if not (self.enabled and self.path and self.dirty):
+            return
+        with self.lock:
+            self.expire()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"files": self.files}, indent=2))
+            self.dirty = False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="List reference images uploaded to the Gemini File API")
+    parser.add_argument("cache", type=Path, nargs="?", default=Path(".sanity_history") / CACHE_FILE_NAME)
+    args = parser.parse_args(argv)
+
+    if not args.cache.exists():
+        print(f"No Gemini cache at {args.cache}")
+        return 1
+
+    files = json.loads(args.cache.read_text()).get("files", {})
+    now = time.time()
+    for key, entry in files.items():
+        print(f"file  {key[:12]}  {entry['bytes'] // 1024:>6} KiB  "
+              f"expires in {(entry['expires_at'] - now) / 3600:5.1f}h  {entry['name']}")
+    print(f"{len(files)} uploaded files, {sum(entry['bytes'] for entry in files.values()) // 1024} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Measure Baselines - XCTest measure {} performance gate.
+Parses `measured [...] average: ..., relative standard deviation: ...` lines
+from xcodebuild output, compares them with per-device baselines and flags
+hot-path regressions beyond a configurable tolerance.
+
+Usage:
+    python Agents/measure_baselines.py xcodebuild.log               # compare only
+    python Agents/measure_baselines.py xcodebuild.log --record      # update baselines
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Test Case '-[SignLanguageModelTests.HotPathPerformanceTests testCircularBufferThroughput]' measured
+# [Clock Monotonic Time, s] average: 0.012, relative standard deviation: 3.456%, values: [...],
+# performanceMetricID:com.apple.dt.XCTMetric_Clock.time.monotonic, ... polarity: prefers smaller, ...
+MEASURE_PATTERN = re.compile(
+    r"Test Case '-\[(?:\w+\.)?(?P<suite>\w+) (?P<test>\w+)\]' measured "
+    r"\[(?P<metric>[^,\]]+), (?P<unit>[^\]]+)\] "
+    r"average: (?P<average>[\d.]+), relative standard deviation: (?P<rsd>[\d.]+)%"
+    r"(?:, values: \[(?P<values>[^\]]*)\])?"
+    r"(?:, performanceMetricID:(?P<metric_id>[\w.]+))?"
+    r"(?:.*?polarity: prefers (?P<polarity>smaller|larger))?"
+)
+
+DESTINATION_PATTERN = re.compile(r"-destination\s+['\"]?[^'\"\n]*name=(?P<name>[^,'\"\n]+)")
+
+BASELINE_FILE_NAME = "measure_baselines.json"
+DEFAULT_TOLERANCE = 10.0  # percent
+
+
+def match_measurement(line: str) -> Optional[Dict]:
+    """Parse one `measured [...]` log line."""
+    match = MEASURE_PATTERN.search(line)
+    if not match:
+        return None
+
+    return {
+        "test": f"{match['suite']}.{match['test']}",
+        "metric": match["metric"].strip(),
+        "metric_id": match["metric_id"] or match["metric"].strip(),
+        "unit": match["unit"].strip(),
+        "average": float(match["average"]),
+        "rsd": float(match["rsd"]),
+        "polarity": match["polarity"] or "smaller",
+    }
+
+
+def match_device(line: str) -> Optional[str]:
+    """Simulator/device name from the xcodebuild command line echoed into the log."""
+    match = DESTINATION_PATTERN.search(line)
+    return match["name"].strip() if match else None
+
+
+def parse_measurements(lines: Iterable[str]) -> Dict:
+    """Collect every measurement and the destination device from a log."""
+    measurements = []
+    device = None
+    for line in lines:
+        if "measured [" in line:
+            measurement = match_measurement(line)
+            if measurement:
+                measurements.append(measurement)
+        elif device is None and "-destination" in line:
+            device = match_device(line)
+    return {"device": device, "measurements": measurements}
+
+
+class MeasureBaselines:
+    """Per-device baselines keyed by `Suite.test|metric_id`."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.devices: Dict[str, Dict[str, Dict]] = {}
+
+        if path.exists():
+            try:
+                self.devices = json.loads(path.read_text())
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: ignoring unreadable measure baselines {path}: {e}")
+
+    @staticmethod
+    def key(measurement: Dict) -> str:
+        return f"{measurement['test']}|{measurement['metric_id']}"
+
+    def compare(self, device: str, measurements: List[Dict], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+        """
+        Delta of each measurement against its baseline.
+
+        A measurement regresses when it is worse than the baseline by more than
+        `tolerance` percent and by more than its own relative standard deviation,
+        so a noisy run alone can't fail the gate.
+        """
+        baselines = self.devices.get(device, {})
+        rows = []
+        for measurement in measurements:
+            baseline = baselines.get(self.key(measurement))
+            row = {
+                "test": measurement["test"],
+                "metric": measurement["metric"],
+                "unit": measurement["unit"],
+                "average": measurement["average"],
+                "rsd": measurement["rsd"],
+                "baseline": baseline["average"] if baseline else None,
+                "delta_percent": None,
+                "status": "NEW",
+            }
+
+            if baseline and baseline["average"] > 0:
+                delta = (measurement["average"] - baseline["average"]) / baseline["average"] * 100
+                worse = delta if measurement["polarity"] == "smaller" else -delta
+                row["delta_percent"] = round(delta, 1)
+                if worse > tolerance and worse > measurement["rsd"]:
+                    row["status"] = "REGRESSION"
+                elif worse < -tolerance:
+                    row["status"] = "IMPROVED"
+                else:
+                    row["status"] = "OK"
+
+            rows.append(row)
+        return rows
+
+    def record(self, device: str, measurements: List[Dict], sha: Optional[str]):
+        baselines = self.devices.setdefault(device, {})
+        for measurement in measurements:
+            baselines[self.key(measurement)] = {
+                "average": measurement["average"],
+                "rsd": measurement["rsd"],
+                "unit": measurement["unit"],
+                "sha": sha,
+            }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.devices, indent=2, sort_keys=True))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare XCTest measure() results against baselines")
+    parser.add_argument("log", type=Path, help="xcodebuild log to parse")
+    parser.add_argument("--baselines", type=Path, default=Path(".sanity_history") / BASELINE_FILE_NAME)
+    parser.add_argument("--device", help="Override the device name found in the log")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed regression in percent")
+    parser.add_argument("--record", action="store_true", help="Store these results as the new baselines")
+    args = parser.parse_args(argv)
+
+    with args.log.open(encoding="utf-8", errors="ignore") as log:
+        parsed = parse_measurements(log)
+    device = args.device or parsed["device"] or "unknown-device"
+
+    baselines = MeasureBaselines(args.baselines)
+    rows = baselines.compare(device, parsed["measurements"], args.tolerance)
+    print(f"Device: {device}")
+    for row in rows:
+        delta = "n/a" if row["delta_percent"] is None else f"{row['delta_percent']:+.1f}%"
+        print(f"{row['status']:<10} {delta:>8}  {row['average']:.4f} {row['unit']}  {row['test']} [{row['metric']}]")
+
+    if args.record:
+        baselines.record(device, parsed["measurements"], None)
+        baselines.save()
+        print(f"Recorded {len(parsed['measurements'])} baselines to {args.baselines}")
+
+    return 1 if any(row["status"] == "REGRESSION" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Model Router - latency- and cost-aware model selection per task.
+Each request is routed to the cheapest model tier its estimated complexity
+allows (prompt size, file layer, snapshot diff area); a stronger tier is only
+used when validation fails or the model reports low confidence. Every route
+taken is recorded with its latency, token usage and estimated cost.
+
+Usage:
+    python Agents/model_router.py agent_output.json      # summarize recorded routes
+    python Agents/model_router.py agent_report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Prices are USD per million input/output tokens; models within a tier are
+# tried in order and skipped once the API reports them as unavailable.
+CLAUDE_TIERS = [
+    {"name": "fast", "models": ["claude-3-5-haiku-20241022"], "input_cost": 0.8, "output_cost": 4.0},
+    {"name": "standard", "models": ["claude-sonnet-4-20250514", "claude-3-7-sonnet-20250219",
+                                    "claude-3-5-sonnet-20241022"], "input_cost": 3.0, "output_cost": 15.0},
+    {"name": "strong", "models": ["claude-opus-4-20250514", "claude-3-opus-20240229"],
+     "input_cost": 15.0, "output_cost": 75.0},
+]
+
+GEMINI_TIERS = [
+    {"name": "fast", "models": ["gemini-1.5-flash"], "input_cost": 0.075, "output_cost": 0.3},
+    {"name": "strong", "models": ["gemini-1.5-pro"], "input_cost": 1.25, "output_cost": 5.0},
+]
+
+# Generated files in these layers are usually small and self-contained
+SIMPLE_LAYERS = ("SignLanguageModelTests/", "/Domain/", "/Utilities/")
+LARGE_PROMPT_TOKENS = 4000
+VERY_LARGE_PROMPT_TOKENS = 30000
+
+# Snapshot diffs covering less than this fraction of the image go to the fast tier
+VISION_FAST_MAX_AREA = float(os.getenv("SANITY_VISION_FAST_MAX_AREA", "0.02"))
+
+
+def estimate_tokens(chars: int) -> int:
+    return chars // 4
+
+
+def claude_route_score(task: str, prompt_chars: int, path: Optional[str] = None,
+                       modifying: bool = False) -> Dict:
+    """Tier index and reason for a Claude request (0 fast, 1 standard, 2 strong)."""
+    tokens = estimate_tokens(prompt_chars)
+    if task == "plan":
+        if tokens > VERY_LARGE_PROMPT_TOKENS:
+            return {"tier": 2, "reason": f"plan, ~{tokens} prompt tokens"}
+        return {"tier": 1, "reason": "plan"}
+
+    reasons = []
+    score = 0
+    if not path or not any(layer in path for layer in SIMPLE_LAYERS):
+        score += 1
+        reasons.append("app layer")
+    if modifying:
+        score += 1
+        reasons.append("modifies existing file")
+    if tokens > LARGE_PROMPT_TOKENS:
+        score += 1
+        reasons.append(f"~{tokens} prompt tokens")
+
+    # The strong tier is reserved for escalations
+    return {"tier": min(score, 1), "reason": ", ".join(reasons) or "small new file in a simple layer"}
+
+
+def vision_route_score(diff_area: Optional[float]) -> Dict:
+    """Tier index and reason for a Gemini Vision request (0 fast, 1 strong)."""
+    if diff_area is None:
+        return {"tier": 1, "reason": "diff area unknown"}
+    if diff_area < VISION_FAST_MAX_AREA:
+        return {"tier": 0, "reason": f"{diff_area:.1%} of pixels changed"}
+    return {"tier": 1, "reason": f"{diff_area:.1%} of pixels changed"}
+
+
+def is_model_not_found(error: Exception) -> bool:
+    """True for the SDKs' not-found errors, also when replayed from a cassette."""
+    names = ("NotFoundError", "NotFound")
+    return type(error).__name__ in names or str(error).startswith(tuple(f"{name}:" for name in names))
+
+
+class ModelRouter:
+    """Chooses a tier per request and records every route taken."""
+
+    def __init__(self, tiers: List[Dict], enabled: bool = True, default_tier: Optional[int] = None):
+        self.tiers = tiers
+        self.enabled = enabled
+        self.default_tier = len(tiers) - 1 if default_tier is None else default_tier
+        self.unavailable = set()
+        self.routes: List[Dict] = []
+        self.lock = threading.Lock()
+
+    def choose(self, score: Dict, escalation: int = 0) -> Dict:
+        """Route for a complexity score, raised by `escalation` tiers."""
+        if not self.enabled:
+            return {"tier": self.default_tier, "reason": "routing disabled", "escalation": 0}
+
+        tier = min(score["tier"] + escalation, len(self.tiers) - 1)
+        reason = score["reason"] + (f", escalated x{escalation}" if escalation else "")
+        return {"tier": tier, "reason": reason, "escalation": escalation}
+
+    def can_escalate(self, route: Dict) -> bool:
+        return self.enabled and route["tier"] < len(self.tiers) - 1
+
+    def model_for(self, route: Dict) -> str:
+        """
+        First available model of the route's tier. If the whole tier is
+        unavailable, stronger tiers are tried first, then the strongest weaker one.
+        """
+        order = self.tiers[route["tier"]:] + self.tiers[route["tier"] - 1::-1] if route["tier"] else self.tiers
+        for tier in order:
+            for model in tier["models"]:
+                if model not in self.unavailable:
+                    return model
+        raise RuntimeError("No available model in any tier")
+
+    def mark_unavailable(self, model: str):
+        with self.lock:
+            self.unavailable.add(model)
+
+    def tier_of(self, model: str) -> Optional[Dict]:
+        return next((tier for tier in self.tiers if model in tier["models"]), None)
+
+    def cost(self, model: str, input_tokens: Optional[int], output_tokens: Optional[int]) -> Optional[float]:
+        tier = self.tier_of(model)
+        if tier is None or input_tokens is None or output_tokens is None:
+            return None
+        return round((input_tokens * tier["input_cost"] + output_tokens * tier["output_cost"]) / 1e6, 6)
+
+    def record(self, route: Dict, model: str, task: str, seconds: float,
+               input_tokens: Optional[int] = None, output_tokens: Optional[int] = None) -> Dict:
+        # The tier actually served, which differs from the route's when a tier is unavailable
+        tier = self.tier_of(model) or self.tiers[route["tier"]]
+        entry = {
+            "task": task,
+            "tier": tier["name"],
+            "model": model,
+            "reason": route["reason"],
+            "escalation": route["escalation"],
+            "seconds": round(seconds, 3),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": self.cost(model, input_tokens, output_tokens),
+        }
+        with self.lock:
+            self.routes.append(entry)
+        return entry
+
+    def summary(self) -> Dict:
+        return summarize_routes(self.routes)
+
+
+def summarize_routes(routes: List[Dict]) -> Dict:
+    by_tier: Dict[str, Dict] = {}
+    for route in routes:
+        tier = by_tier.setdefault(route["tier"], {"requests": 0, "seconds": 0.0, "cost_usd": 0.0})
+        tier["requests"] += 1
+        tier["seconds"] = round(tier["seconds"] + route["seconds"], 3)
+        tier["cost_usd"] = round(tier["cost_usd"] + (route["cost_usd"] or 0.0), 6)
+
+    return {
+        "requests": len(routes),
+        "escalations": sum(1 for route in routes if route["escalation"]),
+        "seconds": round(sum(route["seconds"] for route in routes), 3),
+        "cost_usd": round(sum(route["cost_usd"] or 0.0 for route in routes), 6),
+        "by_tier": by_tier,
+        "routes": routes,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the model routes recorded by an agent run")
+    parser.add_argument("output", type=Path, help="agent_output.json or agent_report.json")
+    args = parser.parse_args(argv)
+
+    routing = json.loads(args.output.read_text()).get("routing")
+    if not routing:
+        print(f"No routing information in {args.output}")
+        return 1
+
+    print(f"{routing['requests']} requests, {routing['escalations']} escalations, "
+          f"{routing['seconds']:.1f}s, ${routing['cost_usd']:.4f}")
+    for tier, totals in routing["by_tier"].items():
+        print(f"  {tier:<9} {totals['requests']:4d} requests  {totals['seconds']:8.1f}s  ${totals['cost_usd']:.4f}")
+    print()
+    for route in routing["routes"]:
+        print(f"{route['seconds']:7.2f}s  {route['tier']:<9} {route['model']:<28} {route['task']:<10} {route['reason']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
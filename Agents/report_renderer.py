@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Report Renderer - size-bounded PR report rendering and in-place publishing.
+Sections are streamed line by line: the complete report goes to a file
+(uploaded with the agent-report artifact) while the PR comment keeps only what
+fits each section's budget and GitHub's comment size limit, with the overflow
+collapsed into a link to the artifact. The publisher finds the agent's earlier
+comment by a hidden marker, updates it in place and skips the API call when
+the rendered content hasn't changed.
+
+Usage:
+    python Agents/report_renderer.py agent_report.md            # size and hash of a rendered report
+    python Agents/report_renderer.py agent_report.md --budget 20000
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterable, List, Optional
+
+# GitHub rejects comment bodies over 65536 characters
+GITHUB_COMMENT_LIMIT = 65536
+COMMENT_BUDGET = int(os.getenv("SANITY_REPORT_BUDGET", "60000"))
+SECTION_BUDGET = int(os.getenv("SANITY_REPORT_SECTION_BUDGET", "8000"))
+# Space each section leaves for the ones after it (footer, change impact)
+SECTION_RESERVE = 1000
+
+MARKER_PREFIX = "<!-- sanity-gatekeeper-report"
+MARKER_PATTERN = re.compile(r"<!-- sanity-gatekeeper-report sha256=(\w+) commit=(\S*) -->")
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def comment_marker(body_hash: str, commit: Optional[str]) -> str:
+    return f"{MARKER_PREFIX} sha256={body_hash} commit={commit or ''} -->"
+
+
+class ReportRenderer:
+    """
+    Collects report sections under a total size budget and per-section budgets.
+    Every line is also written to `full_report` when given, so the complete
+    report never has to be held in memory.
+    """
+
+    def __init__(self, budget: int = COMMENT_BUDGET, section_budget: int = SECTION_BUDGET,
+                 full_report: Optional[IO[str]] = None, overflow_link: Optional[str] = None):
+        self.budget = min(budget, GITHUB_COMMENT_LIMIT - 200)
+        self.section_budget = section_budget
+        self.full_report = full_report
+        self.overflow_link = overflow_link
+        self.parts: List[str] = []
+        self.size = 0
+        self.omitted_lines = 0
+        self.collapsed_sections: List[str] = []
+
+    def overflow_note(self, omitted: int) -> str:
+        where = f"[`agent-report` artifact]({self.overflow_link})" if self.overflow_link else "`agent_report.md`"
+        return f"\n> ✂️ {omitted} more lines omitted - see the full report in the {where}\n"
+
+    def section(self, lines: Iterable[str], budget: Optional[int] = None, reserve: int = SECTION_RESERVE):
+        """
+        Stream one section. Lines past the section's budget (or the space left
+        in the comment, minus `reserve` kept for later sections) are counted
+        and replaced by a single overflow note.
+        """
+        limit = min(budget or self.section_budget, self.budget - self.size - reserve)
+        used = 0
+        omitted = 0
+        title = None
+
+        for line in lines:
+            if self.full_report is not None:
+                self.full_report.write(line + "\n")
+            if title is None:
+                title = line.strip("# \n")
+            if omitted or used + len(line) + 1 > limit:
+                omitted += 1
+                continue
+            self.parts.append(line)
+            used += len(line) + 1
+
+        self.size += used
+        if omitted:
+            note = self.overflow_note(omitted)
+            self.parts.append(note)
+            self.size += len(note) + 1
+            self.omitted_lines += omitted
+            self.collapsed_sections.append(title or "report")
+
+    def render(self) -> str:
+        return "\n".join(self.parts)
+
+    def stats(self) -> Dict:
+        return {
+            "characters": self.size,
+            "budget": self.budget,
+            "omitted_lines": self.omitted_lines,
+            "collapsed_sections": self.collapsed_sections
+        }
+
+
+class CommentPublisher:
+    """
+    Keeps one report comment per PR up to date. The comment carries a hidden
+    marker with the hash of its content and the commit it reports on.
+    """
+
+    def __init__(self, api_url: str, repo: str, pr_number: str, headers: Dict[str, str],
+                 http: Callable, commit: Optional[str] = None):
+        self.api_url = api_url.rstrip("/")
+        self.repo = repo
+        self.pr_number = pr_number
+        self.headers = headers
+        self.http = http
+        self.commit = commit
+        self.comment_id: Optional[int] = None
+        self.published_hash: Optional[str] = None
+        self.published_commit: Optional[str] = None
+        self.searched = False
+        self.stats = {"created": 0, "updated": 0, "skipped": 0, "api_calls": 0}
+
+    def request(self, method: str, url: str, **kwargs):
+        self.stats["api_calls"] += 1
+        response = self.http(method, url, headers=self.headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def find_existing(self):
+        """Look up the agent's comment on the PR (once per run)."""
+        if self.searched:
+            return
+        self.searched = True
+        page = 1
+        while True:
+            comments = self.request(
+                "GET", f"{self.api_url}/repos/{self.repo}/issues/{self.pr_number}/comments",
+                params={"per_page": 100, "page": page}
+            ).json()
+            for comment in comments:
+                match = MARKER_PATTERN.search(comment.get("body") or "")
+                if match:
+                    # Keep the latest one if several exist
+                    self.comment_id = comment["id"]
+                    self.published_hash, self.published_commit = match.group(1), match.group(2)
+            if len(comments) < 100:
+                return
+            page += 1
+
+    def publish(self, body: str, final: bool = True) -> str:
+        """
+        Create or update the report comment. Returns "created", "updated" or
+        "skipped". Interim (progress) updates are skipped when the comment
+        already reports on this commit, so re-runs don't flip it to pending.
+        """
+        body_hash = content_hash(body)
+        self.find_existing()
+
+        if self.comment_id is not None:
+            if body_hash == self.published_hash:
+                self.stats["skipped"] += 1
+                return "skipped"
+            if not final and self.commit and self.published_commit == self.commit:
+                self.stats["skipped"] += 1
+                return "skipped"
+
+        payload = {"body": f"{comment_marker(body_hash, self.commit)}\n{body}"}
+        if self.comment_id is None:
+            response = self.request(
+                "POST", f"{self.api_url}/repos/{self.repo}/issues/{self.pr_number}/comments", json=payload
+            )
+            self.comment_id = response.json().get("id")
+            action = "created"
+        else:
+            self.request("PATCH", f"{self.api_url}/repos/{self.repo}/issues/comments/{self.comment_id}",
+                         json=payload)
+            action = "updated"
+
+        self.published_hash, self.published_commit = body_hash, self.commit
+        self.stats[action] += 1
+        return action
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show how a rendered report fits the PR comment budget")
+    parser.add_argument("report", type=Path, help="Full markdown report (agent_report.md)")
+    parser.add_argument("--budget", type=int, default=COMMENT_BUDGET)
+    args = parser.parse_args(argv)
+
+    if not args.report.exists():
+        print(f"Error: report not found: {args.report}")
+        return 1
+
+    renderer = ReportRenderer(budget=args.budget)
+    with args.report.open(encoding="utf-8") as report:
+        renderer.section((line.rstrip("\n") for line in report), budget=args.budget, reserve=0)
+    body = renderer.render()
+    stats = renderer.stats()
+    print(f"{args.report.stat().st_size} bytes -> {stats['characters']} characters in the comment "
+          f"(budget {stats['budget']}), {stats['omitted_lines']} lines omitted, sha256 {content_hash(body)[:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
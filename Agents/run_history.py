@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Run History - embedded SQLite store for agent run reports.
+Every Sanity Inspector and Developer Agent run is appended (keyed by SHA,
+PR, issue and timestamp) instead of overwriting the previous report, with
+indexed side tables for the common trend queries.
+
+Usage:
+    python Agents/run_history.py verdicts [--image NAME]
+    python Agents/run_history.py flaky [--runs 50]
+    python Agents/run_history.py tokens [--issue 42]
+    python Agents/run_history.py phases [--agent developer]
+    python Agents/run_history.py compact [--keep-days 90] [--keep-runs 2000]
+
+verdicts and flaky read the Sanity Inspector's database, tokens the Developer
+Agent's; phases and compact cover both unless --db or --agent picks one.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Each agent keeps its own database next to its other history (AGENT_HISTORY_DB overrides both)
+HISTORY_DB_FILE_NAME = "run_history.db"
+SANITY_DB_PATH = Path(os.getenv("AGENT_HISTORY_DB")
+                      or Path(os.getenv("SANITY_HISTORY_DIR", ".sanity_history")) / HISTORY_DB_FILE_NAME)
+DEVELOPER_DB_PATH = Path(os.getenv("AGENT_HISTORY_DB") or Path(".agent_history") / HISTORY_DB_FILE_NAME)
+AGENT_DB_PATHS = {"sanity": SANITY_DB_PATH, "developer": DEVELOPER_DB_PATH}
+# The agent whose runs each query reads; the others cover both databases
+COMMAND_AGENTS = {"verdicts": "sanity", "flaky": "sanity", "tokens": "developer"}
+DEFAULT_KEEP_DAYS = int(os.getenv("AGENT_HISTORY_KEEP_DAYS", "180"))
+DEFAULT_KEEP_RUNS = int(os.getenv("AGENT_HISTORY_KEEP_RUNS", "5000"))
+# Full report blobs are only kept for recent runs; derived rows are kept longer
+DEFAULT_KEEP_REPORT_DAYS = int(os.getenv("AGENT_HISTORY_KEEP_REPORT_DAYS", "30"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    agent TEXT NOT NULL,
+    sha TEXT,
+    pr INTEGER,
+    issue INTEGER,
+    created_at REAL NOT NULL,
+    status TEXT,
+    report BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_runs_agent_time ON runs(agent, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_sha ON runs(sha);
+CREATE INDEX IF NOT EXISTS idx_runs_pr ON runs(pr);
+CREATE INDEX IF NOT EXISTS idx_runs_issue ON runs(issue);
+
+CREATE TABLE IF NOT EXISTS snapshot_verdicts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    image TEXT NOT NULL,
+    judgment TEXT,
+    confidence TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_verdicts_image ON snapshot_verdicts(image, run_id);
+CREATE INDEX IF NOT EXISTS idx_verdicts_run ON snapshot_verdicts(run_id);
+
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    status TEXT NOT NULL,
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tests_test ON test_results(test, run_id);
+CREATE INDEX IF NOT EXISTS idx_tests_run ON test_results(run_id);
+
+CREATE TABLE IF NOT EXISTS token_usage (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    issue INTEGER,
+    model TEXT,
+    task TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tokens_issue ON token_usage(issue);
+CREATE INDEX IF NOT EXISTS idx_tokens_run ON token_usage(run_id);
+
+CREATE TABLE IF NOT EXISTS phase_timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_phases_phase ON phase_timings(phase, run_id);
+CREATE INDEX IF NOT EXISTS idx_phases_run ON phase_timings(run_id);
+"""
+
+
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RunHistoryStore:
+    """Append-only run history with indexed trend tables and a retention policy."""
+
+    def __init__(self, path: Path):
+        self.path = path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record_run(self, agent: str, report: Dict, sha: Optional[str] = None, pr=None, issue=None,
+                   status: Optional[str] = None,
+                   snapshot_verdicts: Iterable[Dict] = (),
+                   test_results: Iterable[Tuple[str, str, Optional[float]]] = (),
+                   token_usage: Iterable[Dict] = (),
+                   phase_timings: Optional[Dict[str, float]] = None) -> int:
+        """Append one run and its derived rows in a single transaction. Returns the run id."""
+        blob = zlib.compress(json.dumps(report, separators=(",", ":"), default=str).encode("utf-8"), 6)
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (agent, sha, pr, issue, created_at, status, report) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (agent, sha, _int_or_none(pr), _int_or_none(issue), time.time(), status, blob)
+            )
+            run_id = cursor.lastrowid
+
+            self.connection.executemany(
+                "INSERT INTO snapshot_verdicts (run_id, image, judgment, confidence) VALUES (?, ?, ?, ?)",
+                [(run_id, v.get("image"), v.get("judgment"), v.get("confidence")) for v in snapshot_verdicts]
+            )
+            self.connection.executemany(
+                "INSERT INTO test_results (run_id, test, status, seconds) VALUES (?, ?, ?, ?)",
+                [(run_id, test, result, seconds) for test, result, seconds in test_results]
+            )
+            self.connection.executemany(
+                "INSERT INTO token_usage (run_id, issue, model, task, input_tokens, output_tokens, seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, _int_or_none(issue), u.get("model"), u.get("task"),
+                     u.get("input_tokens"), u.get("output_tokens"), u.get("seconds"))
+                    for u in token_usage
+                ]
+            )
+            self.connection.executemany(
+                "INSERT INTO phase_timings (run_id, phase, seconds) VALUES (?, ?, ?)",
+                [(run_id, phase, seconds) for phase, seconds in (phase_timings or {}).items()]
+            )
+
+        self.enforce_retention()
+        return run_id
+
+    def report(self, run_id: int) -> Optional[Dict]:
+        row = self.connection.execute("SELECT report FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None or row["report"] is None:
+            return None
+        return json.loads(zlib.decompress(row["report"]))
+
+    def enforce_retention(self, keep_days: int = DEFAULT_KEEP_DAYS, keep_runs: int = DEFAULT_KEEP_RUNS,
+                          keep_report_days: int = DEFAULT_KEEP_REPORT_DAYS) -> int:
+        """Drop runs older than keep_days or beyond the newest keep_runs; strip old report blobs."""
+        now = time.time()
+        with self.connection:
+            deleted = self.connection.execute(
+                "DELETE FROM runs WHERE created_at < ? OR id NOT IN "
+                "(SELECT id FROM runs ORDER BY created_at DESC LIMIT ?)",
+                (now - keep_days * 86400, keep_runs)
+            ).rowcount
+            self.connection.execute(
+                "UPDATE runs SET report = NULL WHERE report IS NOT NULL AND created_at < ?",
+                (now - keep_report_days * 86400,)
+            )
+        return deleted
+
+    def compact(self, **retention) -> int:
+        deleted = self.enforce_retention(**retention)
+        self.connection.execute("VACUUM")
+        return deleted
+
+    # MARK: - Trend queries
+
+    def verdict_trends(self, image: Optional[str] = None, limit: int = 50) -> List[sqlite3.Row]:
+        query = (
+            "SELECT image, COUNT(*) AS runs, "
+            "SUM(judgment = 'REGRESSION') AS regressions, SUM(judgment = 'ACCEPTABLE') AS acceptable, "
+            "SUM(judgment NOT IN ('REGRESSION', 'ACCEPTABLE')) AS unknown "
+            "FROM snapshot_verdicts"
+        )
+        params: Tuple = ()
+        if image:
+            query += " WHERE image = ?"
+            params = (image,)
+        query += " GROUP BY image ORDER BY regressions DESC, runs DESC LIMIT ?"
+        return self.connection.execute(query, params + (limit,)).fetchall()
+
+    def flaky_tests(self, recent_runs: int = 50, limit: int = 50) -> List[sqlite3.Row]:
+        """Tests that both passed and failed within the most recent runs."""
+        return self.connection.execute(
+            "SELECT test, SUM(status = 'passed') AS passed, SUM(status = 'failed') AS failed, "
+            "COUNT(DISTINCT r.sha) AS shas "
+            "FROM test_results t JOIN ("
+            "  SELECT id, sha FROM runs WHERE agent = 'sanity' ORDER BY created_at DESC LIMIT ?"
+            ") r ON r.id = t.run_id "
+            "GROUP BY test HAVING passed > 0 AND failed > 0 "
+            "ORDER BY failed * 1.0 / (passed + failed) DESC LIMIT ?",
+            (recent_runs, limit)
+        ).fetchall()
+
+    def token_spend(self, issue: Optional[int] = None, limit: int = 50) -> List[sqlite3.Row]:
+        query = (
+            "SELECT issue, model, COUNT(*) AS calls, SUM(input_tokens) AS input_tokens, "
+            "SUM(output_tokens) AS output_tokens, ROUND(SUM(seconds), 1) AS seconds FROM token_usage"
+        )
+        params: Tuple = ()
+        if issue is not None:
+            query += " WHERE issue = ?"
+            params = (issue,)
+        query += " GROUP BY issue, model ORDER BY issue DESC, input_tokens DESC LIMIT ?"
+        return self.connection.execute(query, params + (limit,)).fetchall()
+
+    def phase_trends(self, agent: Optional[str] = None) -> List[sqlite3.Row]:
+        query = (
+            "SELECT r.agent, p.phase, COUNT(*) AS runs, ROUND(AVG(p.seconds), 2) AS avg_seconds, "
+            "ROUND(MAX(p.seconds), 2) AS max_seconds "
+            "FROM phase_timings p JOIN runs r ON r.id = p.run_id"
+        )
+        params: Tuple = ()
+        if agent:
+            query += " WHERE r.agent = ?"
+            params = (agent,)
+        query += " GROUP BY r.agent, p.phase ORDER BY r.agent, avg_seconds DESC"
+        return self.connection.execute(query, params).fetchall()
+
+
+def print_rows(rows: List[sqlite3.Row]):
+    if not rows:
+        print("No results")
+        return
+    columns = rows[0].keys()
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def default_databases(command: str, agent: Optional[str] = None) -> List[Path]:
+    """Databases a CLI command reads when no --db is given."""
+    agent = agent or COMMAND_AGENTS.get(command)
+    paths = [AGENT_DB_PATHS[agent]] if agent else list(AGENT_DB_PATHS.values())
+    # Both agents share one file when AGENT_HISTORY_DB is set
+    return list(dict.fromkeys(paths))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the agent run history")
+    parser.add_argument("--db", type=Path, help="History database path (default: the agent's own database)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verdicts = subparsers.add_parser("verdicts", help="Verdict counts per snapshot image")
+    verdicts.add_argument("--image")
+    flaky = subparsers.add_parser("flaky", help="Tests that both passed and failed recently")
+    flaky.add_argument("--runs", type=int, default=50)
+    tokens = subparsers.add_parser("tokens", help="Token spend per issue and model")
+    tokens.add_argument("--issue", type=int)
+    phases = subparsers.add_parser("phases", help="Average and max phase timings")
+    phases.add_argument("--agent", choices=["sanity", "developer"])
+    compact = subparsers.add_parser("compact", help="Apply retention and VACUUM")
+    compact.add_argument("--keep-days", type=int, default=DEFAULT_KEEP_DAYS)
+    compact.add_argument("--keep-runs", type=int, default=DEFAULT_KEEP_RUNS)
+    compact.add_argument("--keep-report-days", type=int, default=DEFAULT_KEEP_REPORT_DAYS)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        databases = [args.db]
+    else:
+        databases = [path for path in default_databases(args.command, getattr(args, "agent", None))
+                     if path.exists()]
+    missing = [path for path in databases if not path.exists()]
+    if missing or not databases:
+        searched = missing or default_databases(args.command, getattr(args, "agent", None))
+        print(f"Error: history database not found: {', '.join(str(path) for path in searched)}")
+        return 1
+
+    started = time.perf_counter()
+    rows = []
+    for db in databases:
+        store = RunHistoryStore(db)
+
+        if args.command == "compact":
+            before = db.stat().st_size
+            deleted = store.compact(keep_days=args.keep_days, keep_runs=args.keep_runs,
+                                    keep_report_days=args.keep_report_days)
+            print(f"{db}: deleted {deleted} runs; {before / 1024:.0f} KiB -> {db.stat().st_size / 1024:.0f} KiB")
+            continue
+
+        if args.command == "verdicts":
+            rows += store.verdict_trends(args.image)
+        elif args.command == "flaky":
+            rows += store.flaky_tests(args.runs)
+        elif args.command == "tokens":
+            rows += store.token_spend(args.issue)
+        else:
+            rows += store.phase_trends(args.agent)
+
+    if args.command == "compact":
+        return 0
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps([dict(row) for row in rows], indent=2))
+    else:
+        print_rows(rows)
+        print(f"\n({len(rows)} rows in {elapsed_ms:.1f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
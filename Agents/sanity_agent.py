@@ -4,27 +4,210 @@ Sanity Inspector Agent - Phase 1 Agentic Workflow
 Combines deterministic CI tools with Google ADK for intelligent test analysis.
 """
 
+import time
+
+STARTUP_STARTED = time.perf_counter()
+
+import argparse
 import os
 import json
 import sys
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, IO, Iterator, List, Optional
 import base64
 
-# Google ADK imports
-try:
-    import google.generativeai as genai
-    from google.generativeai.types import HarmCategory, HarmBlockThreshold
-except ImportError:
-    print("Error: google-generativeai not installed. Run: pip install google-generativeai")
-    sys.exit(1)
+from snapshot_catalog import find_reference_image, group_key, parse_snapshot_name
+import snapshot_index
+from change_impact import ChangeImpact, changed_files_from_git, changed_files_from_github
+from test_durations import HISTORY_FILE_NAME, DurationHistory, detect_slowdowns, match_test_duration
+import build_timing
+import swiftlint_aggregator
+import cassette
+from model_router import GEMINI_TIERS, ModelRouter, is_model_not_found, vision_route_score
+from run_history import HISTORY_DB_FILE_NAME, RunHistoryStore
+from artifact_ingest import ArtifactClient, RunArtifacts
+from gemini_cache import CACHE_FILE_NAME as GEMINI_CACHE_FILE_NAME, GeminiFileCache
+from report_renderer import SECTION_BUDGET as REPORT_SECTION_BUDGET, CommentPublisher, ReportRenderer
+from measure_baselines import BASELINE_FILE_NAME, DEFAULT_TOLERANCE, MeasureBaselines, match_device, match_measurement
+
+# Google ADK imports are deferred to the first Vision call, so lint- and
+# log-only runs never load the SDK
+genai = None
+SAFETY_SETTINGS: Optional[Dict] = None
+
+IMPORT_SECONDS = time.perf_counter() - STARTUP_STARTED
+
+
+def load_gemini():
+    """Import and return the Gemini SDK, building the safety settings once."""
+    global genai, SAFETY_SETTINGS
+    if genai is None:
+        try:
+            import google.generativeai
+            from google.generativeai.types import HarmCategory, HarmBlockThreshold
+        except ImportError:
+            raise RuntimeError("google-generativeai not installed. Run: pip install google-generativeai")
+
+        SAFETY_SETTINGS = {
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        }
+        genai = google.generativeai
+    return genai
+
+# Shared rubric for judging snapshot diffs (single-image and batched requests)
+REGRESSION_RUBRIC = """You are a visual regression testing expert.
+
+Your task:
+1. Determine if the visual changes represent a TRUE REGRESSION (bug) or are ACCEPTABLE (minor/expected changes)
+2. Consider: pixel shifts, anti-aliasing differences, rendering precision differences are usually ACCEPTABLE
+3. Consider: layout breaks, missing elements, color changes, text changes are usually REGRESSIONS"""
+
+SINGLE_IMAGE_FORMAT = """Analyze this snapshot diff image.
+
+Respond in JSON format:
+{
+    "judgment": "ACCEPTABLE" or "REGRESSION",
+    "confidence": "high", "medium", or "low",
+    "reasoning": "brief explanation",
+    "details": "specific observations"
+}"""
+
+BATCH_FORMAT = """You will receive {count} snapshot diff images from the same test suite.
+They are variants (light/dark/accessibility sizes, etc.) of related views, so judge them
+consistently: the same underlying change should get the same judgment in every variant.
+Each image is preceded by its label; a reference image (the expected rendering) may
+precede the diff it belongs to.
+
+Respond in JSON format with one verdict per image, using the exact labels:
+{{
+    "verdicts": [
+        {{
+            "image": "<label>",
+            "judgment": "ACCEPTABLE" or "REGRESSION",
+            "confidence": "high", "medium", or "low",
+            "reasoning": "brief explanation",
+            "details": "specific observations"
+        }}
+    ]
+}}"""
+
+# Gemini accepts ~20MB of inline data per request; stay well below it
+VISION_BATCH_MAX_IMAGES = int(os.getenv("SANITY_VISION_BATCH_MAX_IMAGES", "6"))
+VISION_BATCH_MAX_BYTES = int(os.getenv("SANITY_VISION_BATCH_MAX_BYTES", str(14 * 1024 * 1024)))
+
+
+def extract_json(text: str):
+    """Parse JSON from a model response, stripping markdown code fences if present."""
+    result_text = text.strip()
+    if "```json" in result_text:
+        result_text = result_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in result_text:
+        result_text = result_text.split("```")[1].split("```")[0].strip()
+    return json.loads(result_text)
+
+
+def plan_vision_batches(images: List[Path], max_images: int = VISION_BATCH_MAX_IMAGES,
+                        max_bytes: int = VISION_BATCH_MAX_BYTES,
+                        reference_bytes: Optional[Callable[[Path], int]] = None) -> List[List[Path]]:
+    """
+    Group diff images by test class and method, then pack groups into requests.
+    Groups from the same test class share a request while they fit; a group that
+    exceeds the image or payload limit is split across several requests.
+    `reference_bytes` gives the inline reference payload sent along with a diff.
+    """
+    groups: Dict[str, List[Path]] = {}
+    for image in sorted(images):
+        groups.setdefault(group_key(str(image)), []).append(image)
+
+    batches: List[List[Path]] = []
+    current: List[Path] = []
+    current_bytes = 0
+    current_class = None
+
+    for key in sorted(groups):
+        test_class = key.split("/")[0]
+        if current and test_class != current_class:
+            batches.append(current)
+            current, current_bytes = [], 0
+        current_class = test_class
+
+        for image in groups[key]:
+            size = image.stat().st_size + (reference_bytes(image) if reference_bytes else 0)
+            if current and (len(current) >= max_images or current_bytes + size > max_bytes):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(image)
+            current_bytes += size
 
-# GitHub API
-try:
-    import requests
-except ImportError:
-    print("Error: requests not installed. Run: pip install requests")
-    sys.exit(1)
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def parse_build_log(filepath) -> Optional[Dict]:
+    """
+    Extract build errors and test failures from xcodebuild output (runs in a worker process).
+    `filepath` is a local path or a zip entry from an ingested build-logs artifact.
+    """
+    path = Path(filepath) if isinstance(filepath, str) else filepath
+    if path is None or not path.exists():
+        return None
+
+    build_errors = []
+    test_failures = []
+    test_durations = {}
+    measurements = []
+    device = None
+    timing_collector = build_timing.BuildTimingCollector()
+    build_failed = False
+
+    with path.open(encoding='utf-8', errors='ignore') as log:
+        for line in log:
+            # Look for build errors
+            if 'error:' in line.lower() and 'BUILD FAILED' not in line:
+                build_errors.append(line.strip())
+
+            # Look for test failures
+            if 'Test Case' in line and 'failed' in line.lower():
+                test_failures.append(line.strip())
+
+            # Per-test timings ("passed (0.412 seconds)")
+            if 'seconds' in line:
+                timing = match_test_duration(line)
+                if timing and timing["status"] == "passed":
+                    test_durations[timing["test"]] = timing["seconds"]
+
+            # XCTest measure {} results and the destination they ran on
+            if 'measured [' in line:
+                measurement = match_measurement(line)
+                if measurement:
+                    measurements.append(measurement)
+            elif device is None and '-destination' in line:
+                device = match_device(line)
+
+            # Build timing summary and slow type-checking warnings
+            timing_collector.feed(line)
+
+            # Check for overall build failure
+            if 'BUILD FAILED' in line:
+                build_failed = True
+
+    return {
+        "build_errors": build_errors,
+        "test_failures": test_failures,
+        "test_durations": test_durations,
+        "measurements": measurements,
+        "device": device,
+        "build_timing": timing_collector.summary(),
+        "build_failed": build_failed
+    }
 
 
 class SanityInspectorAgent:
@@ -33,27 +216,117 @@ class SanityInspectorAgent:
     Uses Gemini 1.5 Pro with Vision capabilities to analyze snapshot diffs.
     """
 
-    def __init__(self):
+    def __init__(self, dry_run: bool = False, run_id: Optional[str] = None):
+        init_started = time.perf_counter()
+        self.dry_run = dry_run
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.github_repo = os.getenv("GITHUB_REPOSITORY")
         self.pr_number = os.getenv("GITHUB_PR_NUMBER")
         self.github_sha = os.getenv("GITHUB_SHA")
-
-        if not self.gemini_api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is required")
-
-        # Configure Gemini
-        genai.configure(api_key=self.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self.github_api_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+        # Ingestion mode: analyze another workflow run's uploaded artifacts
+        # instead of the files the build job left in the workspace
+        self.artifact_run_id = run_id or os.getenv("SANITY_ARTIFACT_RUN_ID")
+        self.artifacts: Optional[RunArtifacts] = None
+        self.ingest_stats: Optional[Dict] = None
+
+        # Gemini is configured on first use (see `gemini_model`); each Vision
+        # request is routed to a model tier by diff area (see model_router.py)
+        self.router = ModelRouter(
+            GEMINI_TIERS, enabled=os.getenv("AGENT_MODEL_ROUTING", "true").lower() != "false"
+        )
+        self._models: Dict[str, object] = {}
+        self._model_lock = threading.Lock()
+
+        # Opt-in: each diff's reference image is sent as the expected rendering. References
+        # are uploaded once and reused by content hash (see gemini_cache.py), which saves
+        # upload bytes but not input tokens
+        self.vision_references = os.getenv("SANITY_VISION_REFERENCES", "false").lower() == "true"
 
         # Analysis results
         self.swiftlint_issues = []
+        self.swiftlint_summary: Optional[Dict] = None
         self.build_errors = []
         self.test_failures = []
         self.snapshot_analysis = []
         self.overall_status = "PASS"
 
+        # Vision batching: one request per test class/method group instead of per image
+        self.vision_batching = os.getenv("SANITY_VISION_BATCHING", "true").lower() != "false"
+        self.vision_stats = {"requests": 0, "images": 0}
+        self.vision_concurrency = int(os.getenv("SANITY_VISION_CONCURRENCY", "4"))
+        self._stats_lock = threading.Lock()
+
+        # Perceptual-hash dedup: analyze one representative per near-duplicate cluster
+        self.snapshot_dedup = os.getenv("SANITY_SNAPSHOT_DEDUP", "true").lower() != "false"
+        self.snapshot_dedup_distance = int(
+            os.getenv("SANITY_SNAPSHOT_DEDUP_DISTANCE", str(snapshot_index.DEFAULT_MAX_DISTANCE))
+        )
+
+        # Change-impact mode: only analyze what the PR's changed files can affect
+        # ("auto" enables it for pull requests and keeps full analysis on pushes)
+        self.change_impact_mode = os.getenv("SANITY_CHANGE_IMPACT", "auto").lower()
+        self.change_impact: Optional[ChangeImpact] = None
+        self.not_impacted = {"swiftlint_issues": 0, "snapshots": []}
+
+        # Run history (restored from the CI cache); baselines are only recorded on main
+        self.history_dir = Path(os.getenv("SANITY_HISTORY_DIR", ".sanity_history"))
+        self.gemini_cache = GeminiFileCache(
+            self.history_dir / GEMINI_CACHE_FILE_NAME, load_gemini,
+            enabled=os.getenv("SANITY_GEMINI_CACHE", "true").lower() != "false"
+        )
+        self.record_baselines = os.getenv(
+            "SANITY_RECORD_BASELINE", str(os.getenv("GITHUB_REF") == "refs/heads/main")
+        ).lower() == "true"
+        self.test_durations: Dict[str, float] = {}
+        self.slow_tests: List[Dict] = []
+        self.fail_on_slow_tests = os.getenv("SANITY_FAIL_ON_SLOW_TESTS", "true").lower() != "false"
+
+        # XCTest measure {} gate against per-device baselines
+        self.perf_tolerance = float(os.getenv("SANITY_PERF_TOLERANCE", str(DEFAULT_TOLERANCE)))
+        self.perf_device: Optional[str] = os.getenv("SANITY_DEVICE")
+        self.perf_results: List[Dict] = []
+
+        # Compile-time hotspots compared with the previous recorded run
+        self.build_timing: Optional[Dict] = None
+
+        # Appended run history (SQLite) and per-phase wall-clock timings
+        self.history_db = Path(os.getenv("AGENT_HISTORY_DB") or self.history_dir / HISTORY_DB_FILE_NAME)
+        self.phase_timings: Dict[str, float] = {}
+
+        # Report sections filled in as the concurrent pipeline completes them
+        self.sections_done = {"swiftlint": False, "build": False, "vision": False}
+        self.comment_id: Optional[int] = None
+        self.publisher: Optional[CommentPublisher] = None
+        self.report_stats: Optional[Dict] = None
+
+        # Startup profile: module imports, constructor and lazily initialized providers
+        self.startup = {
+            "imports_ms": round(IMPORT_SECONDS * 1000, 1),
+            "init_ms": round((time.perf_counter() - init_started) * 1000, 1),
+            "providers_ms": {}
+        }
+
+    def configure_gemini(self):
+        """Import and configure the Gemini SDK on the first Vision call."""
+        if "gemini" in self.startup["providers_ms"]:
+            return
+        started = time.perf_counter()
+        if not self.gemini_api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is required for Vision analysis")
+        load_gemini().configure(api_key=self.gemini_api_key)
+        self.startup["providers_ms"]["gemini"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def gemini_model(self, model_name: str):
+        """Gemini model by name, created on first use."""
+        with self._model_lock:
+            self.configure_gemini()
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
     def read_file(self, filepath: str) -> Optional[str]:
         """Tool: Read file contents safely."""
         try:
@@ -67,65 +340,259 @@ class SanityInspectorAgent:
             print(f"Error reading file {filepath}: {e}")
             return None
 
-    def analyze_swiftlint_results(self):
-        """Analyze SwiftLint JSON output."""
-        content = self.read_file("swiftlint_result.json")
-        if not content:
-            print("No SwiftLint results found")
+    def compute_change_impact(self):
+        """Resolve the PR's changed files and the tests they can affect."""
+        if self.change_impact_mode == "false" or (self.change_impact_mode == "auto" and not self.pr_number):
             return
 
         try:
-            data = json.loads(content)
-            if isinstance(data, list):
-                # Filter critical issues
-                critical_issues = [
-                    issue for issue in data
-                    if issue.get('severity') in ['error', 'warning']
-                ]
-                self.swiftlint_issues = critical_issues[:10]  # Limit to top 10
-
-                if len([i for i in critical_issues if i.get('severity') == 'error']) > 0:
-                    self.overall_status = "FAIL"
-
-                print(f"Found {len(critical_issues)} SwiftLint issues")
-        except json.JSONDecodeError as e:
-            print(f"Error parsing SwiftLint JSON: {e}")
-
-    def analyze_build_logs(self):
-        """Analyze xcodebuild logs for errors and test failures."""
-        content = self.read_file("xcodebuild.log")
-        if not content:
-            print("No build logs found - gracefully handling missing logs")
+            if self.pr_number and self.github_repo and not self.dry_run:
+                changed = changed_files_from_github(self.github_repo, self.pr_number, self.github_token,
+                                                    self.github_api_url)
+            else:
+                changed = changed_files_from_git(os.getenv("SANITY_BASE_REF", "origin/main"))
+        except Exception as e:
+            print(f"Error resolving changed files, analyzing everything: {e}")
             return
 
-        lines = content.split('\n')
+        self.change_impact = ChangeImpact(changed)
+        impacted = self.change_impact.impacted_test_classes
+        print(f"Changed files: {len(changed)}, impacted test classes: {', '.join(sorted(impacted)) or 'none'}"
+              f"{' (global change - all tests impacted)' if self.change_impact.impacts_everything else ''}")
 
-        # Look for build errors
-        for line in lines:
-            if 'error:' in line.lower() and 'BUILD FAILED' not in line:
-                self.build_errors.append(line.strip())
+    def ingest_artifacts(self):
+        """Download the artifacts of `artifact_run_id` (dry runs only use earlier downloads)."""
+        if not self.artifact_run_id:
+            return
 
-            # Look for test failures
-            if 'Test Case' in line and 'failed' in line.lower():
-                self.test_failures.append(line.strip())
+        print(f"📦 Fetching artifacts of run {self.artifact_run_id}...")
+        client = ArtifactClient(self.github_repo, self.github_token, self.github_api_url, offline=self.dry_run)
+        started = time.perf_counter()
+        self.artifacts = client.fetch_run(self.artifact_run_id)
+
+        # Re-analyzing an old run: report against that run's commit and PR
+        run = self.artifacts.run
+        self.github_sha = self.github_sha or run.get("head_sha")
+        if not self.pr_number and run.get("pull_requests"):
+            self.pr_number = str(run["pull_requests"][0])
+
+        self.ingest_stats = {
+            "run_id": self.artifact_run_id,
+            "artifacts": sorted(self.artifacts.archives),
+            "seconds": round(time.perf_counter() - started, 3),
+            **client.stats
+        }
+        print(f"Ingested {', '.join(self.ingest_stats['artifacts']) or 'no artifacts'} "
+              f"({client.stats['bytes_downloaded'] // 1024} KiB downloaded, "
+              f"{client.stats['bytes_resumed'] // 1024} KiB resumed)")
+
+    def build_log_source(self):
+        """xcodebuild.log in the workspace, or its entry in the ingested build-logs artifact."""
+        if self.artifacts:
+            return self.artifacts.find("build-logs", "xcodebuild.log")
+        return "xcodebuild.log"
+
+    def swiftlint_job(self):
+        """Arguments for swiftlint_aggregator.aggregate_report (also used from the process pool)."""
+        baseline = self.history_dir / swiftlint_aggregator.BASELINE_FILE_NAME
+        if self.artifacts:
+            report = self.artifacts.find("swiftlint-results", "swiftlint_result.json")
+        else:
+            report = "swiftlint_result.json"
+        return (report, str(baseline), self.record_baselines)
+
+    def apply_swiftlint_results(self, summary: Optional[Dict]):
+        """Record new SwiftLint findings (vs. the main baseline), scoped to the change impact if any."""
+        self.sections_done["swiftlint"] = True
+        if summary is None:
+            print("No SwiftLint results found")
+            return
+
+        new_findings = summary["new_findings"]
+        new_errors_by_file = summary["new_errors_by_file"]
+        if self.change_impact:
+            is_changed = self.change_impact.is_file_changed
+            new_findings = [finding for finding in new_findings if is_changed(finding["file"])]
+            new_errors_by_file = {path: count for path, count in new_errors_by_file.items() if is_changed(path)}
+            self.not_impacted["swiftlint_issues"] = sum(
+                count for path, count in summary["by_file"].items() if not is_changed(path)
+            )
 
-        # Check for overall build failure
-        if any('BUILD FAILED' in line for line in lines):
+        self.swiftlint_issues = new_findings
+        self.swiftlint_summary = {key: value for key, value in summary.items() if key != "fingerprints"}
+
+        if sum(new_errors_by_file.values()) > 0:
             self.overall_status = "FAIL"
 
-        # Check for test failures
-        if self.test_failures:
+        print(f"Found {summary['total']} SwiftLint issues, {summary['new_count']} new"
+              f"{'' if summary['has_baseline'] else ' (no baseline yet)'}")
+
+        if self.record_baselines and "fingerprints" in summary:
+            swiftlint_aggregator.save_baseline(
+                Path(self.swiftlint_job()[1]), summary["fingerprints"], self.github_sha
+            )
+
+    def apply_build_log_results(self, results: Optional[Dict]):
+        """Record parsed build errors and test failures."""
+        self.sections_done["build"] = True
+        if results is None:
+            print("No build logs found - gracefully handling missing logs")
+            return
+
+        self.build_errors = results["build_errors"]
+        self.test_failures = results["test_failures"]
+        self.test_durations = results.get("test_durations", {})
+        self.analyze_test_durations()
+        self.perf_device = self.perf_device or results.get("device") or "unknown-device"
+        self.analyze_measurements(results.get("measurements", []))
+        self.analyze_build_timing(results.get("build_timing"))
+
+        # Check for overall build failure or test failures
+        if results["build_failed"] or self.test_failures:
             self.overall_status = "FAIL"
 
         print(f"Found {len(self.build_errors)} build errors, {len(self.test_failures)} test failures")
 
-    def analyze_snapshot_diff(self, image_path: str) -> Dict[str, str]:
+    def record_vision_request(self, image_count: int):
+        """Count a Gemini Vision request (called from worker threads)."""
+        with self._stats_lock:
+            self.vision_stats["requests"] += 1
+            self.vision_stats["images"] += image_count
+
+    def analyze_test_durations(self):
+        """Compare per-test durations against the rolling baseline from previous runs."""
+        if not self.test_durations:
+            return
+
+        history = DurationHistory(self.history_dir / HISTORY_FILE_NAME)
+        self.slow_tests = detect_slowdowns(self.test_durations, history)
+
+        if self.slow_tests:
+            print(f"Found {len(self.slow_tests)} statistically significant test slowdowns")
+            if self.fail_on_slow_tests:
+                self.overall_status = "FAIL"
+
+        if self.record_baselines and self.github_sha:
+            history.append_run(self.github_sha, self.test_durations)
+            history.save()
+
+    def analyze_measurements(self, measurements: List[Dict]):
+        """Compare XCTest measure {} results with the baselines for this device."""
+        if not measurements:
+            return
+
+        baselines = MeasureBaselines(self.history_dir / BASELINE_FILE_NAME)
+        self.perf_results = baselines.compare(self.perf_device, measurements, self.perf_tolerance)
+
+        regressions = [row for row in self.perf_results if row["status"] == "REGRESSION"]
+        print(f"Found {len(measurements)} performance measurements, {len(regressions)} regressions "
+              f"(tolerance {self.perf_tolerance:g}%, device {self.perf_device})")
+        if regressions:
+            self.overall_status = "FAIL"
+
+        if self.record_baselines:
+            baselines.record(self.perf_device, measurements, self.github_sha)
+            baselines.save()
+
+    def analyze_build_timing(self, summary: Optional[Dict]):
+        """Rank compile-time hotspots and compare them with the previous run."""
+        if not summary or not (summary["tasks"] or summary["functions"]):
+            return
+
+        history_file = self.history_dir / build_timing.HISTORY_FILE_NAME
+        self.build_timing = build_timing.compare_with_previous(summary, build_timing.load_previous(history_file))
+        print(f"Found {len(summary['functions'])} slow type-checking hotspots "
+              f"({summary['total_type_check_ms']:.0f}ms total)")
+
+        if self.record_baselines:
+            build_timing.save_run(history_file, self.build_timing, self.github_sha)
+
+    def generate_content(self, contents: List, route: Dict, task: str = "vision") -> str:
+        """
+        Tool: Gemini generate_content on the routed tier. Returns the response text.
+        Parts marked {"cache": True} are sent as uploaded files when possible.
+        """
+        while True:
+            model_name = self.router.model_for(route)
+            started = time.perf_counter()
+            try:
+                response = cassette.active().call(
+                    "gemini.generate_content",
+                    {"model": model_name, "contents": contents},
+                    lambda: self.send_generate_content(model_name, contents)
+                )
+                break
+            except Exception as e:
+                if not is_model_not_found(e):
+                    raise
+                print(f"Model {model_name} is not available, trying the next one")
+                self.router.mark_unavailable(model_name)
+
+        self.router.record(
+            route, model_name, task, time.perf_counter() - started,
+            response["input_tokens"], response["output_tokens"]
+        )
+        return response["text"]
+
+    def send_generate_content(self, model_name: str, contents: List) -> Dict:
+        model = self.gemini_model(model_name)
+        prepared = self.gemini_cache.prepare(contents)
+        try:
+            response = model.generate_content(prepared.contents, safety_settings=SAFETY_SETTINGS)
+        except Exception as e:
+            if not prepared.used:
+                raise
+            # An uploaded file was deleted or expired server-side: forget it and resend inline
+            print(f"Gemini rejected an uploaded file, resending inline: {e}")
+            self.gemini_cache.invalidate(prepared.used)
+            response = model.generate_content(self.gemini_cache.inline(contents).contents,
+                                              safety_settings=SAFETY_SETTINGS)
+
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "text": response.text,
+            "input_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None)
+        }
+
+    def reference_part(self, diff_image: Path) -> Optional[Dict]:
+        """The diff's reference image as a cacheable content part, if one is found."""
+        reference = find_reference_image(diff_image) if self.vision_references else None
+        if reference is None:
+            return None
+        return {"mime_type": "image/png", "data": reference.read_bytes(), "cache": True}
+
+    def inline_reference_bytes(self, diff_image: Path) -> int:
+        """
+        Bytes the diff's reference adds to the request payload: nothing when it is
+        already uploaded, its full size when it goes (or may fall back) inline.
+        """
+        reference = self.reference_part(diff_image)
+        if reference is None or self.gemini_cache.reusable(reference["data"]):
+            return 0
+        return len(reference["data"])
+
+    def vision_route(self, image_paths: List[Path], escalation: int = 0) -> Dict:
+        """Route a Vision request by the largest changed area among its images."""
+        areas = []
+        for image_path in image_paths:
+            try:
+                areas.append(snapshot_index.diff_area(image_path))
+            except Exception as e:
+                print(f"Could not measure diff area of {image_path.name}: {e}")
+                areas.append(None)
+        area = None if None in areas else max(areas)
+        return self.router.choose(vision_route_score(area), escalation)
+
+    def analyze_snapshot_diff(self, image_path, escalation: int = 0) -> Dict[str, str]:
         """
         Use Gemini Vision to analyze a snapshot diff image.
         Returns judgment: 'ACCEPTABLE' or 'REGRESSION'
+        A low-confidence answer from a cheaper tier is re-asked on a stronger one.
+        `image_path` is a local path or an ingested artifact entry.
         """
+        path = Path(image_path) if isinstance(image_path, str) else image_path
         try:
-            path = Path(image_path)
             if not path.exists():
                 return {
                     "status": "ERROR",
@@ -133,46 +600,29 @@ class SanityInspectorAgent:
                     "confidence": "N/A"
                 }
 
-            # Read image and encode to base64
-            image_data = path.read_bytes()
+            # The diff goes inline; its reference is reused from the Gemini file cache
+            contents = [f"{REGRESSION_RUBRIC}\n\n{SINGLE_IMAGE_FORMAT}"]
+            reference = self.reference_part(path)
+            if reference:
+                contents += ["Reference image (expected rendering):", reference, "Diff image:"]
+            contents.append({"mime_type": "image/png", "data": path.read_bytes()})
 
-            # Create prompt for Gemini Vision
-            prompt = """You are a visual regression testing expert. Analyze this snapshot diff image.
-
-Your task:
-1. Determine if the visual changes represent a TRUE REGRESSION (bug) or are ACCEPTABLE (minor/expected changes)
-2. Consider: pixel shifts, anti-aliasing differences, rendering precision differences are usually ACCEPTABLE
-3. Consider: layout breaks, missing elements, color changes, text changes are usually REGRESSIONS
-
-Respond in JSON format:
-{
-    "judgment": "ACCEPTABLE" or "REGRESSION",
-    "confidence": "high", "medium", or "low",
-    "reasoning": "brief explanation",
-    "details": "specific observations"
-}"""
-
-            # Upload image and generate content
-            response = self.model.generate_content(
-                [prompt, {"mime_type": "image/png", "data": image_data}],
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                }
-            )
+            route = self.vision_route([path], escalation)
+            response_text = self.generate_content(contents, route)
 
             # Parse response
-            result_text = response.text.strip()
-
-            # Try to extract JSON from markdown code blocks if present
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
+            try:
+                result = extract_json(response_text)
+                low_confidence = result.get("confidence") == "low"
+            except Exception:
+                self.record_vision_request(0)
+                raise
+
+            if low_confidence and self.router.can_escalate(route):
+                print(f"Low confidence for {path.name}, escalating to a stronger model")
+                self.record_vision_request(0)
+                return self.analyze_snapshot_diff(path, escalation + 1)
+            self.record_vision_request(1)
 
             return {
                 "image": str(path.name),
@@ -184,171 +634,573 @@ Respond in JSON format:
             }
 
         except Exception as e:
-            print(f"Error analyzing snapshot {image_path}: {e}")
+            print(f"Error analyzing snapshot {path}: {e}")
             return {
-                "image": str(Path(image_path).name),
+                "image": str(path.name),
                 "status": "ERROR",
                 "judgment": "UNKNOWN",
                 "error": str(e)
             }
 
-    def analyze_all_snapshots(self):
-        """Find and analyze all snapshot diff images."""
-        snapshot_dir = Path("snapshots_artifacts")
+    def analyze_snapshot_batch(self, image_paths: List[Path]) -> List[Dict[str, str]]:
+        """
+        Use Gemini Vision to judge a group of related snapshot diffs in one request.
+        Falls back to per-image analysis if the batched response can't be used.
+        """
+        if len(image_paths) == 1:
+            return [self.analyze_snapshot_diff(image_paths[0])]
+
+        try:
+            contents = [f"{REGRESSION_RUBRIC}\n\n{BATCH_FORMAT.format(count=len(image_paths))}"]
+            for image_path in image_paths:
+                parts = parse_snapshot_name(str(image_path))
+                reference = self.reference_part(image_path)
+                if reference:
+                    contents += [f"Reference for {image_path.name} (expected rendering):", reference]
+                contents.append(
+                    f"Image: {image_path.name} "
+                    f"(test: {parts['test_class']}.{parts['test_method']}, variant: {parts['variant'] or 'default'})"
+                )
+                contents.append({"mime_type": "image/png", "data": image_path.read_bytes()})
+
+            route = self.vision_route(image_paths)
+            response_text = self.generate_content(contents, route)
+            try:
+                result = extract_json(response_text)
+                verdicts = {v.get("image"): v for v in result.get("verdicts", []) if isinstance(v, dict)}
+            except Exception:
+                # The request was made, but its images are counted by the per-image fallback
+                self.record_vision_request(0)
+                raise
 
-        if not snapshot_dir.exists():
-            print("No snapshot artifacts directory found")
-            return
+        except Exception as e:
+            print(f"Error analyzing snapshot batch ({len(image_paths)} images), falling back to single requests: {e}")
+            return [self.analyze_snapshot_diff(image_path) for image_path in image_paths]
+
+        # Count only the images this request settled; the rest are counted when re-asked
+        settled = [image_path for image_path in image_paths
+                   if image_path.name in verdicts
+                   and not (verdicts[image_path.name].get("confidence") == "low" and self.router.can_escalate(route))]
+        self.record_vision_request(len(settled))
+
+        analyses = []
+        for image_path in image_paths:
+            verdict = verdicts.get(image_path.name)
+            if verdict is None:
+                # Model skipped or mislabelled this image - judge it on its own
+                analyses.append(self.analyze_snapshot_diff(image_path))
+                continue
+            if image_path not in settled:
+                print(f"Low confidence for {image_path.name}, escalating to a stronger model")
+                analyses.append(self.analyze_snapshot_diff(image_path, escalation=1))
+                continue
+
+            analyses.append({
+                "image": image_path.name,
+                "status": "ANALYZED",
+                "judgment": verdict.get("judgment", "UNKNOWN"),
+                "confidence": verdict.get("confidence", "unknown"),
+                "reasoning": verdict.get("reasoning", ""),
+                "details": verdict.get("details", ""),
+                "batch_size": len(image_paths)
+            })
+
+        return analyses
 
-        diff_images = list(snapshot_dir.glob("*.diff.png"))
+    def cluster_snapshot_diffs(self, diff_images: List[Path]) -> List[List[Path]]:
+        """Cluster near-duplicate diffs by perceptual hash; one cluster per image if unavailable."""
+        singletons = [[diff_image] for diff_image in sorted(diff_images)]
+        if not self.snapshot_dedup or snapshot_index.Image is None:
+            return singletons
+
+        try:
+            return snapshot_index.cluster_diff_images(
+                diff_images,
+                max_distance=self.snapshot_dedup_distance,
+                cache=snapshot_index.HashCache()
+            )
+        except Exception as e:
+            print(f"Error hashing snapshot images, analyzing all individually: {e}")
+            return singletons
+
+    def plan_snapshot_analysis(self) -> Optional[Dict]:
+        """Find impacted diff images, cluster near-duplicates and plan Vision batches."""
+        if self.artifacts:
+            diff_images = self.artifacts.glob("snapshot-images", ".diff.png")
+        else:
+            snapshot_dir = Path("snapshots_artifacts")
+            if not snapshot_dir.exists():
+                print("No snapshot artifacts directory found")
+                return None
+            diff_images = list(snapshot_dir.glob("*.diff.png"))
 
         if not diff_images:
             print("No snapshot diff images found")
-            return
+            return None
+
+        if self.change_impact:
+            impacted_images = []
+            for diff_image in diff_images:
+                test_class = parse_snapshot_name(str(diff_image))["test_class"]
+                if self.change_impact.is_test_class_impacted(test_class):
+                    impacted_images.append(diff_image)
+                else:
+                    self.not_impacted["snapshots"].append(diff_image.name)
+            diff_images = impacted_images
+
+            if not diff_images:
+                print(f"No impacted snapshot diffs ({len(self.not_impacted['snapshots'])} not impacted)")
+                return None
 
         print(f"Found {len(diff_images)} snapshot diff images to analyze")
 
-        for diff_image in diff_images:
-            print(f"Analyzing: {diff_image.name}")
-            analysis = self.analyze_snapshot_diff(str(diff_image))
-            self.snapshot_analysis.append(analysis)
+        clusters = self.cluster_snapshot_diffs(diff_images)
+        representatives = [cluster[0] for cluster in clusters]
+        if len(representatives) < len(diff_images):
+            print(f"Deduplicated to {len(representatives)} representative images")
 
-            # If it's a true regression, mark overall status as fail
-            if analysis.get("judgment") == "REGRESSION":
-                self.overall_status = "FAIL"
+        if self.vision_batching:
+            batches = plan_vision_batches(
+                representatives,
+                reference_bytes=self.inline_reference_bytes if self.vision_references else None
+            )
+        else:
+            batches = [[diff_image] for diff_image in representatives]
+
+        return {"clusters": clusters, "batches": batches}
 
-    def generate_summary_report(self) -> str:
-        """Generate human-readable summary for PR comment."""
-        report_lines = ["# 🤖 Sanity Gatekeeper Report\n"]
+    def record_snapshot_verdicts(self, clusters: List[List[Path]], analyses: List[Dict[str, str]]):
+        """
+        Fan each representative's verdict out to the rest of its cluster (diffs of
+        one test class showing the same change, see snapshot_index.py).
+        """
+        verdicts = {analysis.get("image"): analysis for analysis in analyses}
+
+        for cluster in clusters:
+            representative = verdicts.get(cluster[0].name, {
+                "image": cluster[0].name, "status": "ERROR", "judgment": "UNKNOWN"
+            })
+            self.snapshot_analysis.append(representative)
+            for duplicate in cluster[1:]:
+                self.snapshot_analysis.append({
+                    **representative,
+                    "image": duplicate.name,
+                    "deduplicated_from": cluster[0].name
+                })
+
+        # If any image is a true regression, mark overall status as fail
+        if any(analysis.get("judgment") == "REGRESSION" for analysis in self.snapshot_analysis):
+            self.overall_status = "FAIL"
 
-        # Overall status
-        status_emoji = "✅" if self.overall_status == "PASS" else "❌"
-        report_lines.append(f"## {status_emoji} Overall Status: **{self.overall_status}**\n")
+        print(f"Vision requests: {self.vision_stats['requests']} for {self.vision_stats['images']} images")
 
-        # SwiftLint section
-        report_lines.append("## 📝 SwiftLint Analysis\n")
+    def vision_ready(self, plan: Dict) -> bool:
+        """
+        Make sure Vision requests can be made for `plan`: dry runs skip them
+        (verdicts are recorded as SKIPPED), and a missing key fails here
+        rather than once per image.
+        """
+        if self.dry_run:
+            print(f"Dry run: skipping {len(plan['batches'])} Gemini Vision requests")
+            self.record_snapshot_verdicts(plan["clusters"], [
+                {"image": image.name, "status": "SKIPPED", "judgment": "SKIPPED", "confidence": "N/A"}
+                for batch in plan["batches"] for image in batch
+            ])
+            return False
+
+        if not cassette.active().replaying:
+            self.configure_gemini()
+        return True
+
+    async def analyze_all_snapshots_async(self):
+        """Analyze snapshot batches as concurrent Vision requests."""
+        plan = await asyncio.to_thread(self.plan_snapshot_analysis)
+        try:
+            ready = plan is not None and await asyncio.to_thread(self.vision_ready, plan)
+        except Exception as e:
+            # No key or SDK: report every planned image as unanalyzed instead of aborting the run
+            print(f"Error setting up Gemini Vision: {e}")
+            self.record_snapshot_verdicts(plan["clusters"], [
+                {"image": image.name, "status": "ERROR", "judgment": "UNKNOWN",
+                 "confidence": "N/A", "reasoning": f"Not analyzed: {e}", "error": str(e)}
+                for batch in plan["batches"] for image in batch
+            ])
+            ready = False
+        if ready:
+            semaphore = asyncio.Semaphore(max(1, self.vision_concurrency))
+
+            async def analyze(batch: List[Path]) -> List[Dict[str, str]]:
+                async with semaphore:
+                    print(f"Analyzing: {', '.join(image.name for image in batch)}")
+                    return await asyncio.to_thread(self.analyze_snapshot_batch, batch)
+
+            results = await asyncio.gather(*(analyze(batch) for batch in plan["batches"]))
+            self.record_snapshot_verdicts(plan["clusters"], [a for batch in results for a in batch])
+        self.sections_done["vision"] = True
+
+    def generate_summary_report(self, full_report: Optional[IO[str]] = None) -> str:
+        """
+        Generate human-readable summary for PR comment.
+        Sections are streamed through a ReportRenderer that keeps the comment within
+        GitHub's size limit; `full_report` receives every line, untruncated.
+        """
+        renderer = ReportRenderer(full_report=full_report, overflow_link=self.report_artifact_url())
+        renderer.section(self.report_header())
+        renderer.section(self.swiftlint_report())
+        renderer.section(self.build_report())
+        renderer.section(self.test_report())
+        renderer.section(self.build_timing_report())
+        renderer.section(self.test_duration_report())
+        renderer.section(self.performance_report())
+        renderer.section(self.snapshot_report(), budget=2 * REPORT_SECTION_BUDGET)
+        renderer.section(self.change_impact_report())
+        renderer.section(self.report_footer(), reserve=0)
+        self.report_stats = renderer.stats()
+        return renderer.render()
+
+    def report_artifact_url(self) -> Optional[str]:
+        """Link to this workflow run's artifacts, where the full report is uploaded."""
+        run_id = os.getenv("GITHUB_RUN_ID")
+        if not run_id or not self.github_repo:
+            return None
+        server = os.getenv("GITHUB_SERVER_URL", "https://github.com").rstrip("/")
+        return f"{server}/{self.github_repo}/actions/runs/{run_id}#artifacts"
+
+    def report_header(self) -> Iterator[str]:
+        yield "# 🤖 Sanity Gatekeeper Report\n"
+
+        # Overall status (PENDING while sections are still running and nothing has failed yet)
+        status = self.overall_status
+        if status == "PASS" and not all(self.sections_done.values()):
+            status = "PENDING"
+        status_emoji = {"PASS": "✅", "PENDING": "⏳"}.get(status, "❌")
+        yield f"## {status_emoji} Overall Status: **{status}**\n"
+
+    def swiftlint_report(self) -> Iterator[str]:
+        yield "## 📝 SwiftLint Analysis\n"
+        summary = self.swiftlint_summary
+        if summary and summary["total"]:
+            by_severity = summary["by_severity"]
+            baseline_note = "new since `main`" if summary["has_baseline"] else "new (no baseline recorded yet)"
+            yield (
+                f"{summary['total']} findings ({by_severity.get('error', 0)} errors, "
+                f"{by_severity.get('warning', 0)} warnings); **{len(self.swiftlint_issues)} {baseline_note}**, "
+                f"{summary['fixed_count']} fixed\n"
+            )
+            top_rules = list(summary["by_rule"].items())[:5]
+            yield "Top rules: " + ", ".join(f"`{rule}` ({count})" for rule, count in top_rules) + "\n"
         if self.swiftlint_issues:
-            report_lines.append(f"Found {len(self.swiftlint_issues)} issues:\n")
-            for issue in self.swiftlint_issues[:5]:  # Show top 5
+            for issue in self.swiftlint_issues:
                 severity = issue.get('severity', 'unknown')
                 rule = issue.get('rule_id', 'unknown')
                 file_path = issue.get('file', 'unknown')
                 line = issue.get('line', '?')
                 reason = issue.get('reason', '')
-                report_lines.append(f"- **{severity.upper()}**: `{rule}` at `{file_path}:{line}`")
-                report_lines.append(f"  > {reason}\n")
+                yield f"- **{severity.upper()}**: `{rule}` at `{file_path}:{line}`"
+                yield f"  > {reason}\n"
         else:
-            report_lines.append("✅ No significant linting issues\n")
+            yield "✅ No new linting issues\n"
 
-        # Build errors section
-        report_lines.append("## 🔨 Build Analysis\n")
+    def build_report(self) -> Iterator[str]:
+        yield "## 🔨 Build Analysis\n"
         if self.build_errors:
-            report_lines.append(f"Found {len(self.build_errors)} build errors:\n")
-            for error in self.build_errors[:5]:  # Show top 5
-                report_lines.append(f"- `{error}`\n")
+            yield f"Found {len(self.build_errors)} build errors:\n"
+            for error in self.build_errors:
+                yield f"- `{error}`\n"
         else:
-            report_lines.append("✅ Build completed successfully\n")
+            yield "✅ Build completed successfully\n"
 
-        # Test failures section
-        report_lines.append("## 🧪 Test Analysis\n")
+    def test_report(self) -> Iterator[str]:
+        yield "## 🧪 Test Analysis\n"
         if self.test_failures:
-            report_lines.append(f"Found {len(self.test_failures)} test failures:\n")
-            for failure in self.test_failures[:5]:  # Show top 5
-                report_lines.append(f"- {failure}\n")
+            yield f"Found {len(self.test_failures)} test failures:\n"
+            for failure in self.test_failures:
+                yield f"- {failure}\n"
+        else:
+            yield "✅ All tests passed\n"
+
+    def build_timing_report(self) -> Iterator[str]:
+        if not self.build_timing:
+            return
+        yield "## 🏗️ Top Compile-Time Hotspots\n"
+        tasks = list(self.build_timing["tasks"].items())[:3]
+        if tasks:
+            yield "Slowest build phases: " + ", ".join(
+                f"{task} {timing['seconds']:.1f}s" for task, timing in tasks) + "\n"
+        if self.build_timing["functions"]:
+            previous_total = self.build_timing.get("previous_total_type_check_ms")
+            total_line = f"Type-checking hotspots total {self.build_timing['total_type_check_ms']:.0f}ms"
+            if previous_total is not None:
+                total_line += f" ({self.build_timing['total_type_check_ms'] - previous_total:+.0f}ms vs previous run)"
+            yield total_line + ":\n"
+            yield "| Function | Location | Time | Change |"
+            yield "|----------|----------|------|--------|"
+            for entry in self.build_timing["functions"][:10]:
+                yield (
+                    f"| {entry['what']} | `{entry['file']}:{entry['line']}` | {entry['ms']:.0f}ms | "
+                    f"{build_timing.format_delta(entry['ms'], entry['previous_ms'])} |"
+                )
+            yield ""
+
+    def test_duration_report(self) -> Iterator[str]:
+        yield "## ⏱️ Test Duration Analysis\n"
+        if self.slow_tests:
+            yield f"Found {len(self.slow_tests)} tests significantly slower than their baseline:\n"
+            yield "| Test | Now | Baseline (median) | Ratio |"
+            yield "|------|-----|-------------------|-------|"
+            for slow in self.slow_tests:
+                yield (
+                    f"| `{slow['test']}` | {slow['seconds']:.3f}s | {slow['baseline_median']:.3f}s "
+                    f"(n={slow['samples']}) | {slow['ratio']}x |"
+                )
+            yield ""
+        elif self.test_durations:
+            total = sum(self.test_durations.values())
+            yield f"✅ {len(self.test_durations)} tests timed ({total:.1f}s total), no slowdowns detected\n"
         else:
-            report_lines.append("✅ All tests passed\n")
+            yield "No test timings found in build logs\n"
 
-        # Snapshot analysis section
-        report_lines.append("## 👁️ Visual Regression Analysis (Gemini Vision)\n")
-        if self.snapshot_analysis:
-            for analysis in self.snapshot_analysis:
+    def performance_report(self) -> Iterator[str]:
+        if not self.perf_results:
+            return
+        regressions = [row for row in self.perf_results if row["status"] == "REGRESSION"]
+        emoji = "❌" if regressions else "✅"
+        yield "## 🚀 Performance (XCTest measure)\n"
+        yield f"{emoji} {len(regressions)} regressions beyond {self.perf_tolerance:g}% on {self.perf_device}:\n"
+        yield "| Test | Metric | Average | RSD | Baseline | Delta | Status |"
+        yield "|------|--------|---------|-----|----------|-------|--------|"
+        for row in self.perf_results:
+            baseline = "—" if row["baseline"] is None else f"{row['baseline']:.4f}"
+            delta = "—" if row["delta_percent"] is None else f"{row['delta_percent']:+.1f}%"
+            yield (
+                f"| `{row['test']}` | {row['metric']} | {row['average']:.4f} {row['unit']} | "
+                f"{row['rsd']:.1f}% | {baseline} | {delta} | {row['status']} |"
+            )
+        yield ""
+
+    def snapshot_report(self) -> Iterator[str]:
+        yield "## 👁️ Visual Regression Analysis (Gemini Vision)\n"
+        if not self.sections_done["vision"]:
+            yield "⏳ Snapshot analysis in progress - this comment will update when it completes\n"
+        elif self.snapshot_analysis:
+            # Regressions first, so they survive when the section is collapsed
+            order = {"REGRESSION": 0, "UNKNOWN": 1}
+            for analysis in sorted(self.snapshot_analysis, key=lambda a: order.get(a.get("judgment"), 2)):
                 judgment = analysis.get('judgment', 'UNKNOWN')
                 confidence = analysis.get('confidence', 'unknown')
                 image = analysis.get('image', 'unknown')
 
-                emoji = "✅" if judgment == "ACCEPTABLE" else "⚠️" if judgment == "UNKNOWN" else "❌"
+                emoji = {"ACCEPTABLE": "✅", "UNKNOWN": "⚠️", "SKIPPED": "⏭️"}.get(judgment, "❌")
 
-                report_lines.append(f"### {emoji} {image}\n")
-                report_lines.append(f"- **Judgment**: {judgment}")
-                report_lines.append(f"- **Confidence**: {confidence}")
-                report_lines.append(f"- **Reasoning**: {analysis.get('reasoning', 'N/A')}")
-                report_lines.append(f"- **Details**: {analysis.get('details', 'N/A')}\n")
+                yield f"### {emoji} {image}\n"
+                yield f"- **Judgment**: {judgment}"
+                yield f"- **Confidence**: {confidence}"
+                if analysis.get('deduplicated_from'):
+                    yield f"- **Verdict shared with**: {analysis['deduplicated_from']} (near-duplicate)"
+                yield f"- **Reasoning**: {analysis.get('reasoning', 'N/A')}"
+                yield f"- **Details**: {analysis.get('details', 'N/A')}\n"
         else:
-            report_lines.append("✅ No visual regressions detected\n")
-
-        # Footer
-        report_lines.append("\n---")
-        report_lines.append("*Generated by Sanity Inspector Agent powered by Google ADK & Gemini 1.5 Pro*")
+            yield "✅ No visual regressions detected\n"
 
-        return "\n".join(report_lines)
+    def change_impact_report(self) -> Iterator[str]:
+        if not self.change_impact:
+            return
+        impact = self.change_impact
+        yield "## 🎯 Change Impact\n"
+        yield f"- **Changed files**: {len(impact.changed_files)} ({len(impact.changed_swift)} Swift)"
+        if impact.impacts_everything:
+            yield "- **Impacted tests**: all (project, resources or test utilities changed)"
+        else:
+            yield f"- **Impacted tests**: {', '.join(sorted(impact.impacted_test_classes)) or 'none'}"
+        yield (f"- **Not impacted**: {self.not_impacted['swiftlint_issues']} SwiftLint findings, "
+               f"{len(self.not_impacted['snapshots'])} snapshot diffs (not analyzed)\n")
+
+    def report_footer(self) -> Iterator[str]:
+        yield "\n---"
+        yield "*Generated by Sanity Inspector Agent powered by Google ADK & Gemini 1.5 Pro*"
+
+    def github_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.github_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
 
-    def github_comment(self, message: str):
-        """Tool: Post comment to GitHub PR."""
-        if not self.github_token or not self.github_repo or not self.pr_number:
-            print("GitHub environment not configured, skipping comment")
-            print(f"Comment would be:\n{message}")
+    def publish_report(self, summary: Optional[str] = None, final: bool = False):
+        """
+        Create the agent's PR comment or update it in place. The comment is found
+        by its hidden marker (also across runs) and unchanged content is not re-sent.
+        """
+        if not self.pr_number or self.dry_run:
+            return
+        if not self.github_token or not self.github_repo:
+            if final:
+                print("GitHub environment not configured, skipping comment")
             return
 
+        if self.publisher is None:
+            self.publisher = CommentPublisher(
+                self.github_api_url, self.github_repo, self.pr_number, self.github_headers(),
+                cassette.http, commit=self.github_sha
+            )
         try:
-            url = f"https://api.github.com/repos/{self.github_repo}/issues/{self.pr_number}/comments"
-            headers = {
-                "Authorization": f"Bearer {self.github_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-            data = {"body": message}
-
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-
-            print(f"✅ Posted comment to PR #{self.pr_number}")
-
+            action = self.publisher.publish(summary or self.generate_summary_report(), final=final)
         except Exception as e:
-            print(f"Error posting GitHub comment: {e}")
+            print(f"Error publishing GitHub comment: {e}")
+            return
+
+        self.comment_id = self.publisher.comment_id
+        print({
+            "created": f"✅ Posted comment to PR #{self.pr_number}",
+            "updated": f"✅ Updated comment on PR #{self.pr_number}",
+            "skipped": f"💬 Comment on PR #{self.pr_number} is up to date, not re-sent"
+        }[action])
 
     def save_report(self):
         """Save structured report as JSON."""
         report = {
             "overall_status": self.overall_status,
             "swiftlint_issues": self.swiftlint_issues,
+            "swiftlint_summary": self.swiftlint_summary,
             "build_errors": self.build_errors,
             "test_failures": self.test_failures,
+            "test_durations": self.test_durations,
+            "slow_tests": self.slow_tests,
+            "performance": {"device": self.perf_device, "results": self.perf_results},
+            "build_timing": self.build_timing,
             "snapshot_analysis": self.snapshot_analysis,
-            "sha": self.github_sha
+            "vision_stats": self.vision_stats,
+            "routing": self.router.summary(),
+            "gemini_cache": self.gemini_cache.summary(),
+            "startup": self.startup,
+            "artifacts": self.ingest_stats,
+            "change_impact": self.change_impact.to_dict() if self.change_impact else None,
+            "not_impacted": {
+                "swiftlint_issues": self.not_impacted["swiftlint_issues"],
+                "snapshots": self.not_impacted["snapshots"]
+            },
+            "sha": self.github_sha,
+            "report": {
+                "comment": self.report_stats,
+                "publishing": self.publisher.stats if self.publisher else None
+            }
         }
 
+        report["phase_timings"] = self.phase_timings
+
         with open("agent_report.json", "w") as f:
             json.dump(report, f, indent=2)
 
         print("✅ Report saved to agent_report.json")
 
+        try:
+            self.gemini_cache.save()
+        except OSError as e:
+            print(f"Error saving Gemini cache: {e}")
+
+        # Dry runs judge nothing, so they would skew the history's trends
+        if not self.dry_run:
+            self.record_history(report)
+
+    def test_results(self) -> List[tuple]:
+        """(test, status, seconds) rows for the run history."""
+        results = [(test, "passed", seconds) for test, seconds in self.test_durations.items()]
+        for line in self.test_failures:
+            timing = match_test_duration(line)
+            if timing:
+                results.append((timing["test"], "failed", timing["seconds"]))
+        return results
+
+    def record_history(self, report: Dict):
+        """Append this run to the SQLite run history (never fails the run)."""
+        try:
+            store = RunHistoryStore(self.history_db)
+            try:
+                run_id = store.record_run(
+                    "sanity", report,
+                    sha=self.github_sha,
+                    pr=self.pr_number,
+                    status=self.overall_status,
+                    snapshot_verdicts=self.snapshot_analysis,
+                    test_results=self.test_results(),
+                    token_usage=self.router.routes,
+                    phase_timings=self.phase_timings
+                )
+            finally:
+                store.close()
+            print(f"✅ Run #{run_id} appended to {self.history_db}")
+        except Exception as e:
+            print(f"Error recording run history: {e}")
+
+    async def timed(self, phase: str, awaitable):
+        """Await a pipeline stage and record its wall-clock time."""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.phase_timings[phase] = round(time.perf_counter() - started, 3)
+
+    async def run_pipeline(self):
+        """
+        Run the analysis stages concurrently.
+        Log/lint parsing goes to a process pool, network-bound work (change
+        impact, Gemini Vision) to async tasks; the PR comment is posted as soon
+        as lint and build results are in and updated when Vision finishes.
+        """
+        loop = asyncio.get_running_loop()
+        await self.timed("ingest", asyncio.to_thread(self.ingest_artifacts))
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            # Step 1 & 2: Parse SwiftLint results and build logs in worker processes
+            print("📝 Analyzing SwiftLint results...")
+            lint_future = asyncio.ensure_future(self.timed("swiftlint", loop.run_in_executor(
+                pool, swiftlint_aggregator.aggregate_report, *self.swiftlint_job()
+            )))
+            print("🔨 Analyzing build logs...")
+            build_future = asyncio.ensure_future(self.timed("build_log", loop.run_in_executor(
+                pool, parse_build_log, self.build_log_source()
+            )))
+
+            # Scope the analysis to what the PR can affect while parsing runs
+            print("🎯 Resolving change impact...")
+            await self.timed("change_impact", asyncio.to_thread(self.compute_change_impact))
+
+            # Step 3: Analyze snapshot diffs with Gemini Vision
+            print("👁️  Analyzing snapshot diffs with Gemini Vision...")
+            vision_task = asyncio.create_task(self.timed("vision", self.analyze_all_snapshots_async()))
+
+            self.apply_build_log_results(await build_future)
+            self.apply_swiftlint_results(await lint_future)
+
+        # Post lint and build results immediately
+        if not vision_task.done():
+            await asyncio.to_thread(self.publish_report)
+
+        await vision_task
+
     def run(self):
         """Main execution flow."""
         print("🤖 Starting Sanity Inspector Agent...")
         print(f"Repository: {self.github_repo}")
         print(f"PR: #{self.pr_number}")
-        print(f"SHA: {self.github_sha}\n")
-
-        # Step 1: Analyze SwiftLint results
-        print("📝 Analyzing SwiftLint results...")
-        self.analyze_swiftlint_results()
-
-        # Step 2: Analyze build logs
-        print("🔨 Analyzing build logs...")
-        self.analyze_build_logs()
+        print(f"SHA: {self.github_sha}")
+        print(f"Startup: imports {self.startup['imports_ms']}ms, init {self.startup['init_ms']}ms"
+              f"{' (dry run: no network)' if self.dry_run else ''}\n")
 
-        # Step 3: Analyze snapshot diffs with Gemini Vision
-        print("👁️  Analyzing snapshot diffs with Gemini Vision...")
-        self.analyze_all_snapshots()
+        started = time.perf_counter()
+        asyncio.run(self.run_pipeline())
+        self.phase_timings["pipeline"] = round(time.perf_counter() - started, 3)
 
-        # Step 4: Generate and post report
+        # Step 4: Generate and post report (the untruncated report goes to agent_report.md)
         print("\n📊 Generating summary report...")
-        summary = self.generate_summary_report()
+        with open("agent_report.md", "w", encoding="utf-8") as full_report:
+            summary = self.generate_summary_report(full_report)
         print("\n" + summary + "\n")
+        if self.report_stats["omitted_lines"]:
+            print(f"Comment collapsed {self.report_stats['omitted_lines']} lines in "
+                  f"{', '.join(self.report_stats['collapsed_sections'])}; full report in agent_report.md")
 
-        # Step 5: Post to GitHub
-        if self.pr_number:
-            print("💬 Posting comment to GitHub PR...")
-            self.github_comment(summary)
+        # Step 5: Post to GitHub (updates the agent's existing comment if there is one)
+        self.publish_report(summary, final=True)
 
         # Step 6: Save structured report
         self.save_report()
@@ -362,12 +1214,24 @@ Respond in JSON format:
             sys.exit(0)
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Sanity Inspector Agent - CI gatekeeper")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Run local analysis only: no Gemini, GitHub API or PR comments")
+    parser.add_argument("--run-id", default=None,
+                        help="Analyze the artifacts uploaded by this workflow run "
+                             "(default: $SANITY_ARTIFACT_RUN_ID, else local files)")
+    args = parser.parse_args()
+
     try:
-        agent = SanityInspectorAgent()
+        agent = SanityInspectorAgent(dry_run=args.dry_run, run_id=args.run_id)
         agent.run()
     except Exception as e:
         print(f"❌ Fatal error: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Snapshot Catalog - naming helpers for SnapshotTesting artifacts.
+Maps CI snapshot images (diff/failure/reference) back to their test class,
+test method and variant so related images can be handled together.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional
+
+# Reference images recorded by SnapshotTesting, one directory per test class
+SNAPSHOTS_ROOT = Path("SignLanguageModelTests/__Snapshots__")
+
+# Suffixes the CI collection step copies into snapshots_artifacts/
+SNAPSHOT_KINDS = ("diff", "failure", "reference")
+
+
+def parse_snapshot_name(image_path: str, snapshots_root: Path = SNAPSHOTS_ROOT) -> Dict[str, str]:
+    """
+    Split a snapshot file name into its parts.
+
+    `testDashboardBothModes.dashboard-light.diff.png` becomes
+    test_method=testDashboardBothModes, variant=dashboard-light, kind=diff.
+    The CI step flattens directories, so the test class is recovered from the
+    parent directory when present, otherwise looked up in `__Snapshots__`.
+    """
+    path = Path(image_path)
+    stem = path.name[:-len(".png")] if path.name.endswith(".png") else path.stem
+
+    kind = "reference"
+    for candidate in SNAPSHOT_KINDS:
+        if stem.endswith(f".{candidate}"):
+            kind = candidate
+            stem = stem[:-len(candidate) - 1]
+            break
+
+    test_method, _, variant = stem.partition(".")
+
+    test_class = ""
+    if path.parent.name.endswith("Tests"):
+        test_class = path.parent.name
+    else:
+        test_class = find_test_class(test_method, snapshots_root) or ""
+
+    return {
+        "test_class": test_class,
+        "test_method": test_method,
+        "variant": variant,
+        "kind": kind,
+        "key": f"{test_method}.{variant}" if variant else test_method,
+    }
+
+
+def find_test_class(test_method: str, snapshots_root: Path = SNAPSHOTS_ROOT) -> Optional[str]:
+    """Find which test class directory holds reference images for a test method."""
+    if not test_method or not snapshots_root.exists():
+        return None
+
+    for class_dir in sorted(snapshots_root.iterdir()):
+        if class_dir.is_dir() and any(class_dir.glob(f"{test_method}.*png")):
+            return class_dir.name
+    return None
+
+
+def find_reference_image(image_path, snapshots_root: Path = SNAPSHOTS_ROOT) -> Optional[Path]:
+    """
+    Locate the reference PNG for a CI diff/failure image: the `.reference.png`
+    collected next to it, otherwise the committed one under `__Snapshots__`.
+    `image_path` is a path or an ingested artifact entry.
+    """
+    path = Path(image_path) if isinstance(image_path, str) else image_path
+    for kind in ("diff", "failure"):
+        suffix = f".{kind}.png"
+        if path.name.endswith(suffix):
+            collected = path.with_name(path.name[:-len(suffix)] + ".reference.png")
+            if collected.exists():
+                return collected
+
+    parts = parse_snapshot_name(str(path), snapshots_root)
+    if not parts["test_class"]:
+        return None
+
+    reference = snapshots_root / parts["test_class"] / f"{parts['key']}.png"
+    return reference if reference.exists() else None
+
+
+def group_key(image_path: str, snapshots_root: Path = SNAPSHOTS_ROOT) -> str:
+    """Group identifier shared by all variants of one test method."""
+    parts = parse_snapshot_name(image_path, snapshots_root)
+    test_class = parts["test_class"] or "UnknownTests"
+    return f"{test_class}/{parts['test_method']}"
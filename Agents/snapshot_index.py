@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Snapshot Index - perceptual-hash index over snapshot images.
+Clusters diffs that show the same change to the same snapshot so the Sanity
+Inspector only asks Gemini about one representative per cluster, and reports
+near-duplicate reference images.
+
+Usage:
+    python Agents/snapshot_index.py                      # report redundant references
+    python Agents/snapshot_index.py --max-distance 2 --json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from snapshot_catalog import SNAPSHOTS_ROOT, parse_snapshot_name
+
+HASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 4
+# Two diffs only share a verdict when their changed regions match this closely
+# (fractions of the image side and of the image area)
+DIFF_BOX_TOLERANCE = 0.02
+DIFF_AREA_TOLERANCE = 0.002
+DEFAULT_CACHE_FILE = Path(".snapshot_hash_cache.json")
+
+
+def dhash(image_path: Path, hash_size: int = 8) -> int:
+    """
+    Difference hash: shrink to (hash_size+1) x hash_size grayscale and record
+    whether each pixel is brighter than its right neighbour.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow not installed. Run: pip install Pillow")
+
+    # Opened through the path object so zip entries (artifact_ingest) work too
+    with image_path.open("rb") as stream, Image.open(stream) as image:
+        small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+        pixels = small.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def diff_area(diff_image: Path, threshold: int = 16, max_side: int = 256) -> Optional[float]:
+    """
+    Fraction of pixels that changed in a snapshot diff image (unchanged pixels
+    are black in a difference image). None if Pillow is unavailable.
+    """
+    if Image is None:
+        return None
+
+    with diff_image.open("rb") as stream, Image.open(stream) as image:
+        gray = image.convert("L")
+        gray.thumbnail((max_side, max_side))
+        histogram = gray.histogram()
+
+    total = sum(histogram)
+    return sum(histogram[threshold + 1:]) / total if total else 0.0
+
+
+def changed_region(diff_image: Path, threshold: int = 16, max_side: int = 256) -> Tuple[float, Optional[tuple]]:
+    """
+    (changed area fraction, bounding box of the changed pixels as fractions of
+    the image size) of a snapshot diff image. A 64-bit hash of a mostly black
+    diff can't tell a small regression from another small change elsewhere;
+    the changed region can.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow not installed. Run: pip install Pillow")
+
+    with diff_image.open("rb") as stream, Image.open(stream) as image:
+        gray = image.convert("L")
+        gray.thumbnail((max_side, max_side))
+        mask = gray.point(lambda value: 255 if value > threshold else 0)
+        box = mask.getbbox()
+        histogram = mask.histogram()
+        width, height = mask.size
+
+    total = sum(histogram)
+    area = histogram[255] / total if total else 0.0
+    if box is None:
+        return area, None
+    return area, (box[0] / width, box[1] / height, box[2] / width, box[3] / height)
+
+
+def same_change(a: Tuple[float, Optional[tuple]], b: Tuple[float, Optional[tuple]]) -> bool:
+    """Whether two changed regions (see `changed_region`) are near-identical."""
+    if abs(a[0] - b[0]) > DIFF_AREA_TOLERANCE:
+        return False
+    if a[1] is None or b[1] is None:
+        return a[1] == b[1]
+    return all(abs(x - y) <= DIFF_BOX_TOLERANCE for x, y in zip(a[1], b[1]))
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class HashCache:
+    """On-disk cache of image hashes keyed by path, size and mtime."""
+
+    def __init__(self, cache_file: Optional[Path] = DEFAULT_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries: Dict[str, List] = {}
+        self.dirty = False
+
+        if cache_file and cache_file.exists():
+            try:
+                self.entries = json.loads(cache_file.read_text())
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    def hash_for(self, image_path: Path) -> int:
+        stat = image_path.stat()
+        key = str(image_path.resolve())
+        cached = self.entries.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return int(cached[2], 16)
+
+        value = dhash(image_path)
+        self.entries[key] = [stat.st_size, stat.st_mtime_ns, f"{value:016x}"]
+        self.dirty = True
+        return value
+
+    def save(self):
+        if self.cache_file and self.dirty:
+            self.cache_file.write_text(json.dumps(self.entries))
+            self.dirty = False
+
+
+class SnapshotHashIndex:
+    """
+    Multi-index hash table for Hamming-radius queries.
+
+    The 64-bit hash is split into max_distance + 1 bands; by the pigeonhole
+    principle two hashes within max_distance bits share at least one band
+    exactly, so a lookup only verifies the few entries in matching buckets.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        base, extra = divmod(HASH_BITS, band_count)
+        self.bands: List[Tuple[int, int]] = []
+        shift = 0
+        for band in range(band_count):
+            width = base + (1 if band < extra else 0)
+            self.bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        self.buckets: List[Dict[int, List[str]]] = [{} for _ in self.bands]
+        self.hashes: Dict[str, int] = {}
+
+    def add(self, key: str, value: int):
+        self.hashes[key] = value
+        for band, (shift, mask) in enumerate(self.bands):
+            self.buckets[band].setdefault((value >> shift) & mask, []).append(key)
+
+    def query(self, value: int, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return (key, distance) for all entries within max_distance bits."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        seen = set()
+        matches = []
+        for band, (shift, mask) in enumerate(self.bands):
+            for key in self.buckets[band].get((value >> shift) & mask, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = hamming(value, self.hashes[key])
+                if distance <= limit:
+                    matches.append((key, distance))
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+    def clusters(self) -> List[List[str]]:
+        """
+        Group all indexed keys into near-duplicate clusters. Each cluster holds
+        the keys within max_distance of its representative (the first key in
+        sorted order), so matches never chain through intermediate images.
+        """
+        clustered = set()
+        clusters = []
+        for key in sorted(self.hashes):
+            if key in clustered:
+                continue
+            members = [key] + [other for other, _ in self.query(self.hashes[key]) if other not in clustered
+                               and other != key]
+            clustered.update(members)
+            clusters.append(sorted(members))
+        return clusters
+
+
+def build_index(images: Iterable[Path], max_distance: int = DEFAULT_MAX_DISTANCE,
+                cache: Optional[HashCache] = None) -> SnapshotHashIndex:
+    """Hash every image (using the cache where possible) into a new index."""
+    cache = cache or HashCache(None)
+    index = SnapshotHashIndex(max_distance)
+    for image in images:
+        index.add(str(image), cache.hash_for(image))
+    cache.save()
+    return index
+
+
+def cluster_diff_images(diff_images: List[Path], max_distance: int = DEFAULT_MAX_DISTANCE,
+                        cache: Optional[HashCache] = None) -> List[List[Path]]:
+    """
+    Cluster CI diff images that show the same change to the same rendering.
+
+    Diffs of one test class are candidates (e.g. `testDashboardBothModes` and
+    `testDashboardLightMode` rendering the same light dashboard). A member must
+    be within `max_distance` of the cluster's representative on its failing
+    render (`.failure.png`), its `.reference.png` and the diff image itself,
+    and the changed regions of the two diffs must match (`same_change`).
+    """
+    cache = cache or HashCache(None)
+
+    def sibling(diff_image: Path, kind: str) -> Optional[Path]:
+        candidate = diff_image.with_name(diff_image.name.replace(".diff.png", f".{kind}.png"))
+        return candidate if candidate.exists() else None
+
+    groups: Dict[str, List[Path]] = {}
+    for diff_image in sorted(diff_images):
+        groups.setdefault(parse_snapshot_name(str(diff_image))["test_class"], []).append(diff_image)
+
+    hashes: Dict[str, tuple] = {}
+    regions: Dict[str, Tuple[float, Optional[tuple]]] = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        for diff_image in members:
+            reference = sibling(diff_image, "reference")
+            hashes[str(diff_image)] = (
+                cache.hash_for(sibling(diff_image, "failure") or diff_image),
+                cache.hash_for(reference) if reference else None,
+                cache.hash_for(diff_image),
+            )
+            regions[str(diff_image)] = changed_region(diff_image)
+    cache.save()
+
+    def near(a: Optional[int], b: Optional[int]) -> bool:
+        return a is None or b is None or hamming(a, b) <= max_distance
+
+    clusters: List[List[Path]] = []
+    for members in groups.values():
+        remaining = list(members)
+        while remaining:
+            representative = remaining.pop(0)
+            cluster = [representative]
+            if len(members) > 1:
+                rep_hashes, rep_region = hashes[str(representative)], regions[str(representative)]
+                for other in list(remaining):
+                    other_hashes = hashes[str(other)]
+                    if (hamming(rep_hashes[0], other_hashes[0]) <= max_distance
+                            and near(rep_hashes[1], other_hashes[1])
+                            and hamming(rep_hashes[2], other_hashes[2]) <= max_distance
+                            and same_change(rep_region, regions[str(other)])):
+                        cluster.append(other)
+                        remaining.remove(other)
+            clusters.append(cluster)
+
+    return sorted(clusters, key=lambda cluster: cluster[0])
+
+
+def find_redundant_snapshots(root: Path = SNAPSHOTS_ROOT, max_distance: int = DEFAULT_MAX_DISTANCE,
+                             cache: Optional[HashCache] = None) -> List[Dict]:
+    """Report clusters of near-duplicate reference images under __Snapshots__."""
+    images = sorted(root.rglob("*.png"))
+    index = build_index(images, max_distance, cache)
+
+    report = []
+    for cluster in index.clusters():
+        if len(cluster) < 2:
+            continue
+        representative = cluster[0]
+        report.append({
+            "representative": str(Path(representative).relative_to(root)),
+            "duplicates": [
+                {
+                    "image": str(Path(member).relative_to(root)),
+                    "distance": hamming(index.hashes[representative], index.hashes[member])
+                }
+                for member in cluster[1:]
+            ]
+        })
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report near-duplicate snapshot reference images")
+    parser.add_argument("--root", type=Path, default=SNAPSHOTS_ROOT, help="Snapshot directory to scan")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="Maximum Hamming distance (of 64 bits) to treat images as duplicates")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_FILE, help="Hash cache file")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.root.exists():
+        print(f"Error: snapshot directory not found: {args.root}")
+        return 1
+
+    report = find_redundant_snapshots(args.root, args.max_distance, HashCache(args.cache))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    if not report:
+        print("✅ No redundant snapshots found")
+        return 0
+
+    print(f"Found {len(report)} clusters of near-duplicate snapshots:\n")
+    for cluster in report:
+        print(f"📸 {cluster['representative']}")
+        for duplicate in cluster["duplicates"]:
+            print(f"   ↳ {duplicate['image']} (distance {duplicate['distance']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Swift Preflight - fast local validation of generated Swift files.
+A lightweight tokenizer catches the mistakes that otherwise surface only
+after a full macOS CI cycle: unbalanced delimiters, truncated output,
+unterminated strings/comments, leftover markdown fences and type
+declarations that collide with the rest of the module.
+
+Usage:
+    python Agents/swift_preflight.py SignLanguageModel/Features/X/Y.swift
+    python Agents/swift_preflight.py --all          # check every Swift file in the repo
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SOURCE_ROOTS = (Path("SignLanguageModel"), Path("SignLanguageModelTests"))
+
+DECLARATION_KEYWORDS = {"struct", "class", "enum", "protocol", "actor", "typealias"}
+# File-scoped declarations never collide with other files
+FILE_PRIVATE_MODIFIERS = {"private", "fileprivate"}
+MODIFIERS = {"public", "internal", "package", "open", "final", "indirect", "nonisolated"} | FILE_PRIVATE_MODIFIERS
+# A `/` after one of these starts a regex literal rather than a division
+REGEX_PREFIX_CHARS = set("\n({[,:=;!&|?<>+-*%^~")
+REGEX_PREFIX_KEYWORDS = {"return", "case", "in", "where", "try", "await", "throw", "if", "guard", "while"}
+OPENERS = {"(": ")", "[": "]", "{": "}"}
+CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+
+def _is_identifier_start(char: str) -> bool:
+    return char.isalpha() or char == "_"
+
+
+def _is_identifier_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _regex_literal_end(source: str, i: int) -> Optional[int]:
+    """
+    End offset of a regex literal starting at `i` (`/.../` or `#/.../#`), or
+    None when the `/` there is an operator.
+    """
+    hashes = 0
+    while source.startswith("#", i + hashes):
+        hashes += 1
+    start = i + hashes
+    if not source.startswith("/", start):
+        return None
+
+    if not hashes:
+        # A bare literal follows an operator, opener or keyword and can't start with a space
+        j = i - 1
+        while j >= 0 and source[j] in " \t":
+            j -= 1
+        previous = source[j] if j >= 0 else "\n"
+        if _is_identifier_char(previous):
+            word_start = j
+            while word_start > 0 and _is_identifier_char(source[word_start - 1]):
+                word_start -= 1
+            if source[word_start:j + 1] not in REGEX_PREFIX_KEYWORDS:
+                return None
+        elif previous not in REGEX_PREFIX_CHARS:
+            return None
+        if start + 1 >= len(source) or source[start + 1] in " \t\n":
+            return None
+
+    terminator = "/" + "#" * hashes
+    k = start + 1
+    while k < len(source):
+        char = source[k]
+        if char == "\\":
+            k += 2
+            continue
+        if source.startswith(terminator, k):
+            return k + len(terminator)
+        if char == "\n" and not hashes:
+            return None
+        k += 1
+    return None
+
+
+def scan_swift(source: str) -> Dict:
+    """
+    Tokenize Swift source far enough to validate its structure.
+
+    Returns {"problems": [{"line", "message"}], "declarations": [{"name", "kind",
+    "line", "conditional", "private"}]} where declarations are the file's
+    top-level types and `private` marks private/fileprivate ones.
+    """
+    problems: List[Dict] = []
+    declarations: List[Dict] = []
+    # Open delimiters: (char, line, is_string_interpolation)
+    delimiters: List[tuple] = []
+    # Open string literals: (hashes, multiline, line); an interpolation re-enters code
+    strings: List[tuple] = []
+    in_string = False
+
+    length = len(source)
+    i = 0
+    line = 1
+    pending_declaration: Optional[str] = None
+    file_private = False
+    conditional_depth = 0
+
+    while i < length:
+        char = source[i]
+
+        if in_string:
+            hashes, multiline, start_line = strings[-1]
+            terminator = ('"""' if multiline else '"') + "#" * hashes
+            if source.startswith(terminator, i):
+                strings.pop()
+                in_string = False
+                i += len(terminator)
+                continue
+            if char == "\n":
+                if not multiline:
+                    problems.append({"line": start_line, "message": "unterminated string literal"})
+                    strings.pop()
+                    in_string = False
+                line += 1
+                i += 1
+                continue
+            escape = "\\" + "#" * hashes
+            if source.startswith(escape, i):
+                i += len(escape)
+                if i < length and source[i] == "(":
+                    delimiters.append(("(", line, True))
+                    in_string = False
+                    i += 1
+                elif i < length:
+                    if source[i] == "\n":
+                        line += 1
+                    i += 1
+                continue
+            i += 1
+            continue
+
+        if char == "\n":
+            line += 1
+            i += 1
+            continue
+        if char in " \t\r":
+            i += 1
+            continue
+
+        # Comments (block comments nest in Swift)
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            i = length if end == -1 else end
+            continue
+        if source.startswith("/*", i):
+            start_line = line
+            depth = 0
+            while i < length:
+                if source.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif source.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                    if depth == 0:
+                        break
+                else:
+                    if source[i] == "\n":
+                        line += 1
+                    i += 1
+            if depth:
+                problems.append({"line": start_line, "message": "unterminated block comment"})
+            continue
+
+        # Regex literals: /.../ and #/.../# (their parentheses aren't code)
+        if char == "/" or (char == "#" and source[i:].lstrip("#").startswith("/")):
+            end = _regex_literal_end(source, i)
+            if end is not None:
+                line += source.count("\n", i, end)
+                i = end
+                pending_declaration = None
+                continue
+
+        # Markdown fences left over from the model response
+        if source.startswith("```", i):
+            problems.append({"line": line, "message": "leftover markdown code fence"})
+            end = source.find("\n", i)
+            i = length if end == -1 else end
+            continue
+
+        # String literals: "...", """...""", #"..."#, #"""..."""#
+        if char == '"' or (char == "#" and source[i:].lstrip("#").startswith('"')):
+            hashes = 0
+            while source[i] == "#":
+                hashes += 1
+                i += 1
+            multiline = source.startswith('"""', i)
+            i += 3 if multiline else 1
+            strings.append((hashes, multiline, line))
+            in_string = True
+            pending_declaration = None
+            continue
+
+        # Compiler directives (#if / #endif) and other #keywords
+        if char == "#" and i + 1 < length and _is_identifier_start(source[i + 1]):
+            start = i + 1
+            i = start
+            while i < length and _is_identifier_char(source[i]):
+                i += 1
+            directive = source[start:i]
+            if directive == "if":
+                conditional_depth += 1
+            elif directive == "endif":
+                conditional_depth = max(0, conditional_depth - 1)
+            continue
+
+        if char in OPENERS:
+            delimiters.append((char, line, False))
+            pending_declaration = None
+            i += 1
+            continue
+
+        if char in CLOSERS:
+            i += 1
+            pending_declaration = None
+            if not delimiters:
+                problems.append({"line": line, "message": f"unexpected '{char}' with nothing open"})
+                continue
+            opener, open_line, interpolation = delimiters[-1]
+            if opener != CLOSERS[char]:
+                problems.append({
+                    "line": line,
+                    "message": f"'{char}' does not match '{opener}' opened on line {open_line}"
+                })
+                # Recover: close up to a matching outer delimiter, or ignore a stray closer
+                if any(open_char == CLOSERS[char] for open_char, _, _ in delimiters):
+                    while delimiters and delimiters[-1][0] != CLOSERS[char]:
+                        delimiters.pop()
+                    opener, open_line, interpolation = delimiters[-1]
+                else:
+                    continue
+            delimiters.pop()
+            if interpolation:
+                in_string = True
+            continue
+
+        if _is_identifier_start(char) or char == "`":
+            start = i
+            i += 1
+            while i < length and (_is_identifier_char(source[i]) or source[i] == "`"):
+                i += 1
+            word = source[start:i].strip("`")
+            if pending_declaration:
+                declarations.append({
+                    "name": word,
+                    "kind": pending_declaration,
+                    "line": line,
+                    "conditional": conditional_depth > 0,
+                    "private": file_private
+                })
+                pending_declaration = None
+                file_private = False
+            elif word in DECLARATION_KEYWORDS and not delimiters:
+                pending_declaration = word
+            elif word in MODIFIERS:
+                file_private = file_private or word in FILE_PRIVATE_MODIFIERS
+            elif not (start > 0 and source[start - 1] == "@"):
+                # Attributes (@MainActor) may sit between the modifiers and the keyword
+                file_private = False
+            continue
+
+        pending_declaration = None
+        i += 1
+
+    if in_string:
+        hashes, multiline, start_line = strings[-1]
+        kind = "multi-line string" if multiline else "string"
+        problems.append({"line": start_line, "message": f"unterminated {kind} literal (output truncated?)"})
+    for opener, open_line, _ in delimiters:
+        problems.append({
+            "line": open_line,
+            "message": f"'{opener}' is never closed (output truncated?)"
+        })
+
+    return {"problems": problems, "declarations": declarations}
+
+
+def module_of(file_path: str) -> str:
+    """Module a repo-relative Swift file belongs to: each source root builds its own target."""
+    parts = Path(file_path).parts
+    roots = {root.as_posix() for root in SOURCE_ROOTS}
+    return next((part for part in parts if part in roots), parts[0] if parts else "")
+
+
+class SymbolTable:
+    """Top-level type declarations by module (source root), then by name."""
+
+    def __init__(self):
+        self.modules: Dict[str, Dict[str, List[Dict]]] = {}
+
+    def add(self, file_path: str, declarations: Iterable[Dict]):
+        module = self.modules.setdefault(module_of(file_path), {})
+        for declaration in declarations:
+            module.setdefault(declaration["name"], []).append({**declaration, "file": file_path})
+
+    @classmethod
+    def from_repo(cls, roots: Iterable[Path] = SOURCE_ROOTS, exclude: Iterable[str] = ()) -> "SymbolTable":
+        excluded = {Path(path).as_posix() for path in exclude}
+        table = cls()
+        for root in roots:
+            if not root.exists():
+                continue
+            for swift_file in sorted(root.rglob("*.swift")):
+                if swift_file.as_posix() in excluded:
+                    continue
+                source = swift_file.read_text(encoding="utf-8", errors="ignore")
+                table.add(swift_file.as_posix(), scan_swift(source)["declarations"])
+        return table
+
+    def copy(self) -> "SymbolTable":
+        table = SymbolTable()
+        table.modules = {
+            module: {name: list(entries) for name, entries in declarations.items()}
+            for module, declarations in self.modules.items()
+        }
+        return table
+
+    def conflicts(self, file_path: str, declaration: Dict) -> List[Dict]:
+        """
+        Declarations elsewhere in the same module that collide with `declaration`
+        from `file_path`. Private and fileprivate types only collide within their file.
+        """
+        conflicts = []
+        for existing in self.modules.get(module_of(file_path), {}).get(declaration["name"], []):
+            if existing["file"] == file_path and existing["line"] == declaration["line"]:
+                continue
+            if existing["conditional"] and declaration["conditional"]:
+                continue
+            if existing["file"] != file_path and (existing.get("private") or declaration.get("private")):
+                continue
+            conflicts.append(existing)
+        return conflicts
+
+
+def check_files(files: Dict[str, str], symbols: Optional[SymbolTable] = None) -> Dict[str, List[Dict]]:
+    """
+    Validate generated files against each other and the rest of the module.
+    `files` maps repo-relative paths to their new contents; `symbols` should not
+    include those paths (see SymbolTable.from_repo(exclude=...)).
+    """
+    symbols = symbols.copy() if symbols else SymbolTable()
+    scans = {path: scan_swift(source) for path, source in files.items()}
+    for path, scan in scans.items():
+        symbols.add(path, scan["declarations"])
+
+    results: Dict[str, List[Dict]] = {}
+    for path, source in files.items():
+        problems = list(scans[path]["problems"])
+        if not source.strip():
+            problems.append({"line": 1, "message": "file is empty"})
+
+        for declaration in scans[path]["declarations"]:
+            for existing in symbols.conflicts(path, declaration):
+                where = "earlier in this file" if existing["file"] == path else existing["file"]
+                problems.append({
+                    "line": declaration["line"],
+                    "message": f"{declaration['kind']} {declaration['name']} is already declared in "
+                               f"{where} (line {existing['line']})"
+                })
+        results[path] = problems
+    return results
+
+
+def format_problem(path: str, problem: Dict) -> str:
+    return f"{path}:{problem['line']}: {problem['message']}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-flight check Swift files before pushing")
+    parser.add_argument("files", nargs="*", help="Swift files to check against the rest of the module")
+    parser.add_argument("--all", action="store_true", help="Check every Swift file under the source roots")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.all:
+        paths = [p.as_posix() for root in SOURCE_ROOTS if root.exists() for p in sorted(root.rglob("*.swift"))]
+    else:
+        paths = [Path(path).as_posix() for path in args.files]
+    if not paths:
+        parser.error("no files to check")
+
+    files = {path: Path(path).read_text(encoding="utf-8", errors="ignore") for path in paths}
+    results = check_files(files, SymbolTable.from_repo(exclude=paths))
+
+    failed = 0
+    for path, problems in results.items():
+        for problem in problems:
+            print(format_problem(path, problem))
+        failed += bool(problems)
+
+    print(f"\n{len(files)} files checked, {failed} with problems "
+          f"({(time.perf_counter() - started) * 1000:.0f}ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
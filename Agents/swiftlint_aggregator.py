@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+SwiftLint Aggregator - streaming SwiftLint JSON analysis with baseline deltas.
+Parses `swiftlint lint --reporter json` output incrementally, aggregates
+per-rule/per-file counters and reports only findings that are not in the
+baseline recorded on main.
+
+Usage:
+    python Agents/swiftlint_aggregator.py swiftlint_result.json
+    python Agents/swiftlint_aggregator.py swiftlint_result.json --record
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional
+
+from build_timing import relative_source_path
+
+BASELINE_FILE_NAME = "swiftlint_baseline.json"
+CHUNK_SIZE = 64 * 1024
+MAX_NEW_FINDINGS = 200
+SOURCE_CACHE_FILES = 8
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+")
+
+
+def iter_json_array(stream: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+    Only the current chunk and one partially read element are held in memory.
+    """
+    buffer = ""
+    position = 0
+    started = False
+    exhausted = False
+
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while position < len(buffer) and buffer[position] in " \t\r\n,[":
+            if buffer[position] == "[":
+                started = True
+            position += 1
+
+        if position < len(buffer):
+            if buffer[position] == "]" and started:
+                return
+            try:
+                element, end = _decoder.raw_decode(buffer, position)
+                yield element
+                position = end
+                continue
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+
+        if exhausted:
+            return
+
+        chunk = stream.read(chunk_size)
+        exhausted = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+class SourceLines:
+    """Small LRU of source files used to fingerprint findings by line content."""
+
+    def __init__(self, max_files: int = SOURCE_CACHE_FILES):
+        self.max_files = max_files
+        self.files: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    def line(self, path: str, number: int) -> Optional[str]:
+        lines = self.files.get(path)
+        if lines is None:
+            try:
+                lines = Path(path).read_text(encoding="utf-8", errors="ignore").splitlines()
+            except OSError:
+                lines = []
+            self.files[path] = lines
+            if len(self.files) > self.max_files:
+                self.files.popitem(last=False)
+        else:
+            self.files.move_to_end(path)
+
+        return lines[number - 1] if 0 < number <= len(lines) else None
+
+
+def relative_path(path: str, workspace: str) -> str:
+    """
+    Repo-relative path of a finding. Reports produced on another runner (the
+    macOS build re-analyzed on ubuntu) keep that runner's checkout prefix, so
+    fall back to the suffix starting at a source root.
+    """
+    if workspace and path.startswith(workspace.rstrip("/") + "/"):
+        return os.path.relpath(path, workspace)
+    return relative_source_path(path)
+
+
+def fingerprint(rule_id: str, file_path: str, context: str) -> str:
+    """Stable id for a finding: rule + file + whitespace-normalized context (line numbers excluded)."""
+    normalized = _WHITESPACE.sub(" ", context).strip()
+    digest = hashlib.sha1(f"{rule_id}\0{file_path}\0{normalized}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+class SwiftLintAggregator:
+    """Bounded-memory aggregation of SwiftLint findings against a baseline."""
+
+    def __init__(self, baseline: Optional[Dict[str, int]] = None, workspace: Optional[str] = None,
+                 collect_fingerprints: bool = False, max_new: int = MAX_NEW_FINDINGS):
+        self.workspace = workspace if workspace is not None else os.getcwd()
+        self.has_baseline = baseline is not None
+        self.remaining = Counter(baseline or {})
+        self.collect_fingerprints = collect_fingerprints
+        self.max_new = max_new
+
+        self.total = 0
+        self.by_severity: Counter = Counter()
+        self.by_rule: Counter = Counter()
+        self.by_file: Counter = Counter()
+        self.new_by_file: Counter = Counter()
+        self.new_errors_by_file: Counter = Counter()
+        self.new_findings: List[Dict] = []
+        self.fingerprints: Counter = Counter()
+        self.sources = SourceLines()
+
+    def add(self, finding: Dict):
+        severity = str(finding.get("severity", "")).lower()
+        if severity not in ("error", "warning"):
+            return
+
+        rule_id = finding.get("rule_id", "unknown")
+        absolute_file = finding.get("file") or ""
+        file_path = relative_path(absolute_file, self.workspace)
+        line = finding.get("line") or 0
+
+        self.total += 1
+        self.by_severity[severity] += 1
+        self.by_rule[rule_id] += 1
+        self.by_file[file_path] += 1
+
+        # Read the line from this checkout: `absolute_file` may only exist on the runner that linted
+        source_file = os.path.join(self.workspace, file_path) if file_path and not os.path.isabs(file_path) \
+            else absolute_file
+        context = self.sources.line(source_file, line) if source_file else None
+        if context is None:
+            context = _NUMBERS.sub("#", finding.get("reason", ""))
+        finding_id = fingerprint(rule_id, file_path, context)
+
+        if self.collect_fingerprints:
+            self.fingerprints[finding_id] += 1
+
+        # Each baseline occurrence absorbs one matching finding; the rest are new
+        if self.remaining[finding_id] > 0:
+            self.remaining[finding_id] -= 1
+            return
+
+        self.new_by_file[file_path] += 1
+        if severity == "error":
+            self.new_errors_by_file[file_path] += 1
+        if len(self.new_findings) < self.max_new:
+            self.new_findings.append({
+                "rule_id": rule_id,
+                "severity": severity,
+                "file": file_path,
+                "line": line,
+                "reason": finding.get("reason", ""),
+                "fingerprint": finding_id,
+            })
+
+    def consume(self, stream: IO[str]):
+        for finding in iter_json_array(stream):
+            if isinstance(finding, dict):
+                self.add(finding)
+
+    def summary(self, top: int = 20) -> Dict:
+        result = {
+            "total": self.total,
+            "has_baseline": self.has_baseline,
+            "by_severity": dict(self.by_severity),
+            "by_rule": dict(self.by_rule.most_common(top)),
+            "by_file": dict(self.by_file),
+            "new_count": sum(self.new_by_file.values()),
+            "new_by_file": dict(self.new_by_file),
+            "new_errors_by_file": dict(self.new_errors_by_file),
+            "new_findings": self.new_findings,
+            "fixed_count": sum(self.remaining.values()),
+        }
+        if self.collect_fingerprints:
+            result["fingerprints"] = dict(self.fingerprints)
+        return result
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, int]]:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text()).get("fingerprints", {})
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: ignoring unreadable SwiftLint baseline {path}: {e}")
+        return None
+
+
+def save_baseline(path: Path, fingerprints: Dict[str, int], sha: Optional[str]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"sha": sha, "fingerprints": fingerprints}, separators=(",", ":")))
+
+
+def aggregate_report(report_path: str, baseline_path: Optional[str] = None,
+                     record: bool = False) -> Optional[Dict]:
+    """
+    Stream a SwiftLint JSON report into a summary. None if the report is missing.
+    `report_path` may also be a zip entry from artifact_ingest.py.
+    """
+    path = Path(report_path) if isinstance(report_path, str) else report_path
+    if path is None or not path.exists():
+        return None
+
+    baseline = load_baseline(Path(baseline_path)) if baseline_path else None
+    aggregator = SwiftLintAggregator(baseline, collect_fingerprints=record)
+    try:
+        with path.open(encoding="utf-8", errors="ignore") as stream:
+            aggregator.consume(stream)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing SwiftLint JSON: {e}")
+
+    return aggregator.summary()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize SwiftLint JSON output against a baseline")
+    parser.add_argument("report", help="swiftlint --reporter json output")
+    parser.add_argument("--baseline", type=Path, default=Path(".sanity_history") / BASELINE_FILE_NAME)
+    parser.add_argument("--record", action="store_true", help="Store this report as the new baseline")
+    args = parser.parse_args(argv)
+
+    summary = aggregate_report(args.report, str(args.baseline), record=args.record)
+    if summary is None:
+        print(f"Error: report not found: {args.report}")
+        return 1
+
+    print(f"{summary['total']} findings {summary['by_severity']}; "
+          f"{summary['new_count']} new, {summary['fixed_count']} fixed"
+          f"{'' if summary['has_baseline'] else ' (no baseline)'}")
+    for rule_id, count in summary["by_rule"].items():
+        print(f"{count:7d}  {rule_id}")
+    for finding in summary["new_findings"][:20]:
+        print(f"NEW {finding['severity']:<7} {finding['rule_id']}  {finding['file']}:{finding['line']}")
+
+    if args.record:
+        save_baseline(args.baseline, summary["fingerprints"], None)
+        print(f"Recorded baseline to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
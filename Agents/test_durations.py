@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test Durations - per-test timing history and slow-test regression detection.
+Extracts the "passed (X.XXX seconds)" timings xcodebuild prints, keeps a
+compact time series keyed by commit SHA and flags statistically significant
+slowdowns against a rolling median/MAD baseline.
+
+Usage:
+    python Agents/test_durations.py                      # show history summary
+    python Agents/test_durations.py --test DashboardSnapshotTests.testDashboardDarkMode
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# XCTest: Test Case '-[SignLanguageModelTests.DashboardSnapshotTests testDashboardDarkMode]' passed (0.412 seconds).
+XCTEST_PATTERN = re.compile(
+    r"Test Case '-\[(?:[\w]+\.)?(?P<suite>\w+) (?P<test>\w+)\]' (?P<status>passed|failed) \((?P<seconds>[\d.]+) seconds\)"
+)
+
+# Swift Testing: ✔ Test example() passed after 0.001 seconds.
+SWIFT_TESTING_PATTERN = re.compile(
+    r"Test (?P<test>\w+\(\)|\"[^\"]+\") (?P<status>passed|failed) after (?P<seconds>[\d.]+) seconds"
+)
+
+HISTORY_FILE_NAME = "test_durations.json"
+MAX_RUNS = 30
+
+# MAD -> standard deviation for normally distributed data
+MAD_SCALE = 1.4826
+
+
+def match_test_duration(line: str) -> Optional[Dict]:
+    """Parse one log line into {"test", "status", "seconds"} if it reports a test timing."""
+    match = XCTEST_PATTERN.search(line)
+    if match:
+        return {
+            "test": f"{match['suite']}.{match['test']}",
+            "status": match["status"],
+            "seconds": float(match["seconds"]),
+        }
+
+    match = SWIFT_TESTING_PATTERN.search(line)
+    if match:
+        return {
+            "test": match["test"].strip('"'),
+            "status": match["status"],
+            "seconds": float(match["seconds"]),
+        }
+    return None
+
+
+class DurationHistory:
+    """
+    Column-oriented duration history: one list of SHAs and, per test, a list of
+    durations aligned with it (None where the test did not run or failed).
+    """
+
+    def __init__(self, path: Path, max_runs: int = MAX_RUNS):
+        self.path = path
+        self.max_runs = max_runs
+        self.shas: List[str] = []
+        self.tests: Dict[str, List[Optional[float]]] = {}
+
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+                self.shas = data.get("shas", [])
+                self.tests = data.get("tests", {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: ignoring unreadable duration history {path}: {e}")
+
+    def samples(self, test: str) -> List[float]:
+        return [value for value in self.tests.get(test, []) if value is not None]
+
+    def append_run(self, sha: str, durations: Dict[str, float]):
+        """Add (or replace, for a re-run of the same SHA) one run's passed-test durations."""
+        if self.shas and self.shas[-1] == sha:
+            self.shas.pop()
+            for series in self.tests.values():
+                series.pop()
+
+        self.shas.append(sha)
+        run_count = len(self.shas)
+        for test, series in self.tests.items():
+            series.append(durations.get(test))
+        for test, seconds in durations.items():
+            if test not in self.tests:
+                self.tests[test] = [None] * (run_count - 1) + [seconds]
+
+        # Drop the oldest runs and tests that no longer appear at all
+        overflow = len(self.shas) - self.max_runs
+        if overflow > 0:
+            self.shas = self.shas[overflow:]
+            for test in list(self.tests):
+                self.tests[test] = self.tests[test][overflow:]
+        self.tests = {test: series for test, series in self.tests.items() if any(v is not None for v in series)}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        rounded = {test: [None if v is None else round(v, 3) for v in series] for test, series in self.tests.items()}
+        self.path.write_text(json.dumps({"shas": self.shas, "tests": rounded}, separators=(",", ":")))
+
+
+def detect_slowdowns(durations: Dict[str, float], history: DurationHistory,
+                     min_samples: int = 5, z_threshold: float = 4.0,
+                     min_ratio: float = 1.5, min_delta: float = 0.25) -> List[Dict]:
+    """
+    Flag tests whose duration is far outside their rolling baseline.
+
+    A test is slow when its robust z-score ((x - median) / (1.4826 * MAD))
+    exceeds z_threshold AND it is both min_ratio times and min_delta seconds
+    slower than the median, so tiny or noisy tests don't trip the gate.
+    """
+    slow = []
+    for test, seconds in durations.items():
+        samples = history.samples(test)
+        if len(samples) < min_samples:
+            continue
+
+        median = statistics.median(samples)
+        mad = statistics.median(abs(sample - median) for sample in samples)
+        # Floor the spread so perfectly stable tests don't produce infinite scores
+        spread = max(MAD_SCALE * mad, 0.05 * median, 0.01)
+        z_score = (seconds - median) / spread
+
+        if z_score > z_threshold and seconds >= median * min_ratio and seconds - median >= min_delta:
+            slow.append({
+                "test": test,
+                "seconds": round(seconds, 3),
+                "baseline_median": round(median, 3),
+                "baseline_mad": round(mad, 3),
+                "ratio": round(seconds / median, 2) if median else None,
+                "z_score": round(z_score, 1),
+                "samples": len(samples),
+            })
+
+    return sorted(slow, key=lambda entry: entry["z_score"], reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect the per-test duration history")
+    parser.add_argument("--history", type=Path, default=Path(".sanity_history") / HISTORY_FILE_NAME)
+    parser.add_argument("--test", help="Print the full series for one test")
+    args = parser.parse_args(argv)
+
+    history = DurationHistory(args.history)
+    if not history.shas:
+        print(f"No duration history at {args.history}")
+        return 1
+
+    if args.test:
+        for sha, seconds in zip(history.shas, history.tests.get(args.test, [])):
+            print(f"{sha[:10]}  {'-' if seconds is None else f'{seconds:.3f}s'}")
+        return 0
+
+    print(f"{len(history.shas)} runs, {len(history.tests)} tests\n")
+    for test in sorted(history.tests):
+        samples = history.samples(test)
+        print(f"{statistics.median(samples):8.3f}s median  {len(samples):3d} samples  {test}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
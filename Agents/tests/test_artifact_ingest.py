@@ -0,0 +1,205 @@
+"""
+Artifact ingestion against a local stand-in for the GitHub API and artifact storage.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from artifact_ingest import ArtifactClient  # noqa: E402
+from change_impact import changed_files_from_github  # noqa: E402
+import swiftlint_aggregator  # noqa: E402
+
+try:
+    import requests  # noqa: F401
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+TOKEN = "ghp_standin"
+SWIFTLINT_RESULT = [
+    {"rule_id": "force_unwrapping", "severity": "Warning", "line": 3, "reason": "Force unwrapping",
+     "file": "/Users/runner/work/SignLanguageModel/SignLanguageModel/SignLanguageModel/Views/HomeView.swift"},
+    {"rule_id": "line_length", "severity": "Error", "line": 9, "reason": "Line should be 120 characters or less",
+     "file": "/Users/runner/work/SignLanguageModel/SignLanguageModel/SignLanguageModel/Views/HomeView.swift"},
+]
+
+
+def build_zip(files) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+BUILD_LOG = "".join(f"CompileSwift normal arm64 /tmp/File{i}.swift\n" for i in range(200))
+ARCHIVES = {
+    11: ("build-logs", build_zip({"logs/build_output.txt": BUILD_LOG})),
+    12: ("swiftlint-results", build_zip({"swiftlint_result.json": json.dumps(SWIFTLINT_RESULT)})),
+    13: ("snapshot-images", build_zip({
+        "__Snapshots__/HomeViewTests/testHome.1.diff.png": os.urandom(3000),
+        "__Snapshots__/HomeViewTests/testHome.1.reference.png": os.urandom(3000),
+    })),
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Runs, artifact listings, zip redirects and ranged blob downloads, as the Actions API serves them."""
+
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        self.requests_seen.append((path, self.headers.get("Range")))
+
+        if path.startswith("/repos/"):
+            if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+                return self.send_empty(401)
+        if path == "/repos/o/r/actions/runs/42":
+            return self.send_json({"id": 42, "head_sha": "abc123", "head_branch": "feature",
+                                   "pull_requests": [{"number": 7}]})
+        if path == "/repos/o/r/actions/runs/42/artifacts":
+            artifacts = [{"id": artifact_id, "name": name, "expired": False}
+                         for artifact_id, (name, _) in ARCHIVES.items()]
+            # An older upload of a re-run and an expired one must be ignored
+            artifacts += [{"id": 5, "name": "build-logs", "expired": False},
+                          {"id": 99, "name": "swiftlint-results", "expired": True}]
+            return self.send_json({"total_count": len(artifacts), "artifacts": artifacts})
+        match = re.fullmatch(r"/repos/o/r/actions/artifacts/(\d+)/zip", path)
+        if match:
+            self.send_response(302)
+            self.send_header("Location", f"http://127.0.0.1:{self.server.server_port}/blob/{match.group(1)}")
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        if path == "/repos/o/r/pulls/7/files":
+            page = int(dict(item.split("=") for item in query.split("&")).get("page", "1"))
+            files = [{"filename": f"SignLanguageModel/File{i}.swift"} for i in range(100)] if page == 1 else [
+                {"filename": "SignLanguageModel/Views/HomeView.swift",
+                 "previous_filename": "SignLanguageModel/Views/MainView.swift"}]
+            return self.send_json(files)
+
+        match = re.fullmatch(r"/blob/(\d+)", path)
+        if match and int(match.group(1)) in ARCHIVES:
+            # Signed storage URLs are requested without the API token
+            if "Authorization" in self.headers:
+                return self.send_empty(400)
+            data = ARCHIVES[int(match.group(1))][1]
+            ranges = self.headers.get("Range")
+            if not ranges:
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                return self.wfile.write(data)
+            start, end = (int(value) for value in ranges[len("bytes="):].split("-"))
+            end = min(end, len(data) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            return self.wfile.write(data[start:end + 1])
+
+        self.send_empty(404)
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requests is not installed")
+class ArtifactIngestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests_seen = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.download_dir = Path(self.tmp.name) / "artifacts"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def client(self, **kwargs) -> ArtifactClient:
+        return ArtifactClient("o/r", TOKEN, api_url=self.api_url, download_dir=self.download_dir,
+                              workers=3, chunk_size=1024, **kwargs)
+
+    def test_fetch_run_downloads_ranges_and_exposes_entries(self):
+        client = self.client()
+        artifacts = client.fetch_run("42")
+
+        self.assertEqual(artifacts.run["head_sha"], "abc123")
+        self.assertEqual(artifacts.run["pull_requests"], [7])
+        self.assertEqual(sorted(artifacts.archives), ["build-logs", "snapshot-images", "swiftlint-results"])
+
+        total = sum(len(data) for _, data in ARCHIVES.values())
+        self.assertEqual(client.stats["bytes_downloaded"], total)
+        self.assertGreater(client.stats["range_requests"], len(ARCHIVES))
+        blob_paths = {path for path, _ in StandInHandler.requests_seen if path.startswith("/blob/")}
+        self.assertEqual(blob_paths, {f"/blob/{artifact_id}" for artifact_id in ARCHIVES})
+        self.assertNotIn("/blob/5", blob_paths)
+        self.assertTrue(all(ranges for path, ranges in StandInHandler.requests_seen if path.startswith("/blob/")))
+
+        log = artifacts.find("build-logs", "build_output.txt")
+        with log.open(encoding="utf-8") as stream:
+            self.assertEqual(stream.read(), BUILD_LOG)
+
+        diff = artifacts.glob("snapshot-images", ".diff.png")[0]
+        self.assertEqual(diff.read_bytes(), zipfile.ZipFile(io.BytesIO(ARCHIVES[13][1])).read(diff.member))
+        self.assertTrue(diff.with_name("testHome.1.reference.png").exists())
+        self.assertFalse(diff.with_name("testHome.1.failure.png").exists())
+
+        summary = swiftlint_aggregator.aggregate_report(artifacts.find("swiftlint-results", "swiftlint_result.json"))
+        self.assertEqual(summary["total"], 2)
+
+    def test_offline_reanalysis_uses_cached_downloads(self):
+        self.client().fetch_run("42")
+        StandInHandler.requests_seen = []
+
+        artifacts = self.client(offline=True).fetch_run("42")
+        self.assertEqual(StandInHandler.requests_seen, [])
+        self.assertEqual(artifacts.run["head_sha"], "abc123")
+        self.assertIsNotNone(artifacts.find("swiftlint-results", "swiftlint_result.json"))
+
+    def test_changed_files_use_configured_api_url(self):
+        files = changed_files_from_github("o/r", "7", TOKEN, self.api_url)
+        self.assertEqual(len(files), 102)
+        self.assertIn("SignLanguageModel/Views/MainView.swift", files)
+        self.assertEqual([path for path, _ in StandInHandler.requests_seen], ["/repos/o/r/pulls/7/files"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Record/replay round trip through the cassette.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import gzip
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cassette import REDACTED, Cassette, redact  # noqa: E402
+from model_router import CLAUDE_TIERS, GEMINI_TIERS, ModelRouter  # noqa: E402
+
+
+class RedactTest(unittest.TestCase):
+    def test_credential_keys_are_redacted(self):
+        redacted = redact({
+            "Authorization": "Bearer abc", "x-api-key": "k", "api_key": "k", "client_secret": "s",
+            "password": "p", "token": "t", "access_token": "t", "x-github-token": "t", "GITHUB_TOKEN": "t"
+        }, secrets=[])
+        self.assertTrue(all(value == REDACTED for value in redacted.values()), redacted)
+
+    def test_usage_counts_are_kept(self):
+        usage = {"input_tokens": 1200, "output_tokens": 350, "cached_tokens": 800, "max_tokens": 4096,
+                 "total_token_count": 1550, "cached_content_token_count": 800}
+        self.assertEqual(redact(usage, secrets=[]), usage)
+
+
+class RoundTripTest(unittest.TestCase):
+    def test_usage_fields_replay_as_integers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cassette.json.gz"
+            recorded = {
+                "anthropic.messages": {"text": "ok", "input_tokens": 1200, "output_tokens": 350},
+                "gemini.generate_content": {"text": "ok", "input_tokens": 900, "output_tokens": 40,
+                                            "cached_tokens": 600}
+            }
+            cassette = Cassette(path, "record")
+            for kind, response in recorded.items():
+                request = {"model": "m", "max_tokens": 4096, "headers": {"Authorization": "Bearer abc"}}
+                self.assertEqual(cassette.call(kind, request, lambda response=response: dict(response)), response)
+            cassette.save()
+
+            replay = Cassette(path, "replay")
+            claude = replay.call("anthropic.messages", {"model": "m", "max_tokens": 4096,
+                                                        "headers": {"Authorization": "Bearer abc"}},
+                                 lambda: self.fail("replay must not perform the call"))
+            gemini = replay.call("gemini.generate_content", {"model": "m", "max_tokens": 4096,
+                                                             "headers": {"Authorization": "Bearer abc"}},
+                                 lambda: self.fail("replay must not perform the call"))
+            self.assertEqual(replay.misses, 0)
+
+            for response in (claude, gemini):
+                for field in ("input_tokens", "output_tokens"):
+                    self.assertIsInstance(response[field], int)
+            self.assertIsInstance(gemini["cached_tokens"], int)
+
+            # The replayed counts feed the router's cost accounting
+            claude_router = ModelRouter(CLAUDE_TIERS)
+            gemini_router = ModelRouter(GEMINI_TIERS)
+            self.assertIsNotNone(claude_router.cost(CLAUDE_TIERS[0]["models"][0], claude["input_tokens"],
+                                                    claude["output_tokens"]))
+            self.assertIsNotNone(gemini_router.cost(GEMINI_TIERS[0]["models"][0], gemini["input_tokens"],
+                                                    gemini["output_tokens"]))
+
+            with gzip.open(path, "rt", encoding="utf-8") as stored:
+                self.assertNotIn("Bearer abc", stored.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
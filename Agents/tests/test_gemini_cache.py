@@ -0,0 +1,105 @@
+"""
+Gemini file reuse under concurrent Vision requests.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gemini_cache import GeminiFileCache  # noqa: E402
+
+
+class UploadedFile:
+    def __init__(self, number: int):
+        self.name = f"files/{number}"
+        self.uri = f"https://generativelanguage.googleapis.com/v1beta/files/{number}"
+        self.expiration_time = None
+
+
+class FakeSdk:
+    """`upload_file` that takes a while, to widen race windows."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.uploads = 0
+        self.lock = threading.Lock()
+
+    def upload_file(self, stream, mime_type, display_name):
+        time.sleep(0.05)
+        with self.lock:
+            self.uploads += 1
+            if self.fail:
+                raise RuntimeError("quota exceeded")
+            return UploadedFile(self.uploads)
+
+
+def reference(data: bytes) -> dict:
+    return {"mime_type": "image/png", "data": data, "cache": True}
+
+
+class GeminiFileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "gemini_cache.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_requests_upload_once(self):
+        sdk = FakeSdk()
+        cache = GeminiFileCache(self.path, lambda: sdk)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            prepared = list(executor.map(lambda _: cache.prepare(["diff", reference(b"png")]), range(16)))
+
+        self.assertEqual(sdk.uploads, 1)
+        self.assertTrue(all(request.contents[1] == prepared[0].contents[1] for request in prepared))
+        self.assertIn("file_data", prepared[0].contents[1])
+        self.assertEqual(cache.stats["file_uploads"], 1)
+        self.assertEqual(cache.stats["file_hits"], 15)
+
+    def test_upload_does_not_hold_the_lock(self):
+        sdk = FakeSdk()
+        cache = GeminiFileCache(self.path, lambda: sdk)
+        worker = threading.Thread(target=cache.prepare, args=([reference(b"slow")],))
+        worker.start()
+        time.sleep(0.01)
+        acquired = cache.lock.acquire(timeout=0.02)
+        if acquired:
+            cache.lock.release()
+        worker.join()
+        self.assertTrue(acquired)
+
+    def test_failed_upload_goes_inline_for_every_waiter(self):
+        sdk = FakeSdk(fail=True)
+        cache = GeminiFileCache(self.path, lambda: sdk)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            prepared = list(executor.map(lambda _: cache.prepare([reference(b"png")]), range(4)))
+
+        self.assertEqual(sdk.uploads, 1)
+        self.assertTrue(all(request.contents == [{"mime_type": "image/png", "data": b"png"}] for request in prepared))
+        self.assertEqual(cache.uploads, {})
+
+    def test_uploads_persist_across_runs(self):
+        sdk = FakeSdk()
+        first = GeminiFileCache(self.path, lambda: sdk)
+        first.prepare([reference(b"png")])
+        first.save()
+
+        second = GeminiFileCache(self.path, lambda: sdk)
+        self.assertTrue(second.reusable(b"png"))
+        second.prepare([reference(b"png")])
+        self.assertEqual(sdk.uploads, 1)
+        self.assertEqual(second.summary()["file_hit_rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+XCTest measure() results against stored per-device baselines.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from measure_baselines import BASELINE_FILE_NAME, MeasureBaselines, match_measurement  # noqa: E402
+
+DEVICE = "iPhone 15"
+
+
+def measured(test: str, average: float, rsd: float = 2.0) -> dict:
+    return match_measurement(
+        f"Test Case '-[SignLanguageModelTests.HotPathPerformanceTests {test}]' measured "
+        f"[Clock Monotonic Time, s] average: {average}, relative standard deviation: {rsd}%, "
+        f"values: [{average}], performanceMetricID:com.apple.dt.XCTMetric_Clock.time.monotonic, "
+        f"baselineName: \"\", baselineAverage: , polarity: prefers smaller, maxPercentRegression: 10.000%"
+    )
+
+
+class CompareTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / BASELINE_FILE_NAME
+        recorded = MeasureBaselines(self.path)
+        recorded.record(DEVICE, [measured("testCircularBufferThroughput", 0.010),
+                                 measured("testThreadSafeQueueThroughput", 0.020)], "abc123")
+        recorded.save()
+        self.baselines = MeasureBaselines(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_regression_against_stored_baseline(self):
+        rows = self.baselines.compare(DEVICE, [measured("testCircularBufferThroughput", 0.013),
+                                               measured("testThreadSafeQueueThroughput", 0.0205)])
+
+        self.assertEqual([row["status"] for row in rows], ["REGRESSION", "OK"])
+        self.assertEqual(rows[0]["baseline"], 0.010)
+        self.assertEqual(rows[0]["delta_percent"], 30.0)
+
+    def test_noisy_run_does_not_regress(self):
+        rows = self.baselines.compare(DEVICE, [measured("testCircularBufferThroughput", 0.013, rsd=40.0)])
+        self.assertEqual(rows[0]["status"], "OK")
+
+    def test_baselines_are_per_device(self):
+        rows = self.baselines.compare("iPad Pro (11-inch)", [measured("testCircularBufferThroughput", 0.013)])
+        self.assertEqual((rows[0]["status"], rows[0]["baseline"]), ("NEW", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+PR comment publishing: one marked comment per PR, updated in place.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from report_renderer import CommentPublisher, comment_marker, content_hash  # noqa: E402
+from sanity_agent import SanityInspectorAgent  # noqa: E402
+
+API_URL = "https://api.github.com"
+COMMENTS_URL = f"{API_URL}/repos/o/r/issues/7/comments"
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeGitHub:
+    """Issue comments of PR #7, served through the publisher's `http` callable."""
+
+    def __init__(self, comments=None):
+        self.comments = comments or []
+        self.calls = []
+
+    def __call__(self, method, url, headers=None, params=None, json=None):
+        self.calls.append((method, url))
+        if method == "GET":
+            return Response(self.comments)
+        if method == "POST":
+            return Response({"id": 501, "body": json["body"]})
+        return Response({})
+
+
+def marked(body: str, commit: str) -> str:
+    return f"{comment_marker(content_hash(body), commit)}\n{body}"
+
+
+class CommentPublisherTest(unittest.TestCase):
+    def publisher(self, github: FakeGitHub, commit: str = "abc123") -> CommentPublisher:
+        return CommentPublisher(API_URL, "o/r", "7", {}, github, commit=commit)
+
+    def test_creates_comment_when_none_is_marked(self):
+        github = FakeGitHub([{"id": 10, "body": "Looks good to me"}])
+        publisher = self.publisher(github)
+
+        self.assertEqual(publisher.publish("# Report"), "created")
+        self.assertEqual(github.calls, [("GET", COMMENTS_URL), ("POST", COMMENTS_URL)])
+        self.assertEqual(publisher.comment_id, 501)
+
+    def test_updates_the_marked_comment(self):
+        github = FakeGitHub([{"id": 10, "body": "Looks good to me"},
+                             {"id": 42, "body": marked("# Old report", "abc123")}])
+
+        self.assertEqual(self.publisher(github).publish("# New report"), "updated")
+        self.assertEqual(github.calls[-1], ("PATCH", f"{API_URL}/repos/o/r/issues/comments/42"))
+
+    def test_unchanged_body_is_not_resent(self):
+        github = FakeGitHub([{"id": 42, "body": marked("# Report", "old456")}])
+        publisher = self.publisher(github)
+
+        self.assertEqual(publisher.publish("# Report"), "skipped")
+        self.assertEqual(github.calls, [("GET", COMMENTS_URL)])
+        self.assertEqual(publisher.stats["api_calls"], 1)
+
+    def test_rerun_does_not_post_interim_report_over_final(self):
+        github = FakeGitHub([{"id": 42, "body": marked("# Final report", "abc123")}])
+        publisher = self.publisher(github)
+
+        self.assertEqual(publisher.publish("# In progress", final=False), "skipped")
+        self.assertEqual(publisher.publish("# Final report, rerun"), "updated")
+
+
+class PublishReportTest(unittest.TestCase):
+    def test_push_build_posts_nothing(self):
+        github = FakeGitHub()
+        agent = SanityInspectorAgent()
+        agent.pr_number, agent.github_token, agent.github_repo = None, "ghp_standin", "o/r"
+        agent.publisher = CommentPublisher(API_URL, "o/r", "7", {}, github)
+
+        agent.publish_report("# In progress")
+        agent.publish_report("# Final report", final=True)
+        self.assertEqual(github.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Snapshot diff clustering: which diffs may share one Vision verdict.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import snapshot_index  # noqa: E402
+from snapshot_index import SnapshotHashIndex, cluster_diff_images  # noqa: E402
+from sanity_agent import SanityInspectorAgent  # noqa: E402
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+SIZE = (390, 844)
+BASE = [(10, 10, 100, 40)]
+
+
+def render(path: Path, boxes, diff: bool = False):
+    image = Image.new("RGB", SIZE, (0, 0, 0) if diff else (200, 200, 200))
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        draw.rectangle(box, fill=(255, 255, 255) if diff else (0, 0, 0))
+    image.save(path)
+
+
+def snapshot(directory: Path, name: str, change) -> Path:
+    """Reference, failing render and diff of one snapshot whose failure adds `change`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    render(directory / f"{name}.reference.png", BASE)
+    render(directory / f"{name}.failure.png", BASE + [change])
+    render(directory / f"{name}.diff.png", [change], diff=True)
+    return directory / f"{name}.diff.png"
+
+
+class RepresentativeClusteringTest(unittest.TestCase):
+    def test_matches_do_not_chain(self):
+        index = SnapshotHashIndex(max_distance=4)
+        index.add("a", 0)
+        index.add("b", 0b1111)          # 4 bits from a
+        index.add("c", 0b11111111)      # 4 bits from b, 8 from a
+        self.assertEqual(index.clusters(), [["a", "b"], ["c"]])
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class ClusterDiffImagesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cluster(self, diffs):
+        clusters = cluster_diff_images(diffs, cache=snapshot_index.HashCache(None))
+        return sorted(sorted(str(path.relative_to(self.root)) for path in cluster) for cluster in clusters)
+
+    def test_same_change_to_the_same_snapshot_is_clustered(self):
+        diffs = [snapshot(self.root / device / "HomeViewTests", "testHome.light", (20, 100, 60, 110))
+                 for device in ("iphone", "ipad")]
+        self.assertEqual(self.cluster(diffs), [["ipad/HomeViewTests/testHome.light.diff.png",
+                                                "iphone/HomeViewTests/testHome.light.diff.png"]])
+
+    def test_same_rendering_from_two_test_methods_is_clustered(self):
+        diffs = [snapshot(self.root / "DashboardTests", name, (20, 100, 60, 110))
+                 for name in ("testDashboardBothModes.dashboard-light", "testDashboardLightMode.dashboard-light")]
+        self.assertEqual(len(self.cluster(diffs)), 1)
+
+    def test_different_test_classes_are_never_clustered(self):
+        diffs = [snapshot(self.root / test_class, "testHome.light", (20, 100, 60, 110))
+                 for test_class in ("HomeViewTests", "SettingsViewTests")]
+        self.assertEqual(len(self.cluster(diffs)), 2)
+
+    def test_small_change_elsewhere_is_not_clustered(self):
+        accepted = snapshot(self.root / "iphone" / "HomeViewTests", "testHome.light", (20, 100, 60, 110))
+        regression = snapshot(self.root / "ipad" / "HomeViewTests", "testHome.light", (300, 800, 305, 805))
+        self.assertEqual(len(self.cluster([accepted, regression])), 2)
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class FlatArtifactDirectoryTest(unittest.TestCase):
+    """The gatekeeper workflow copies one simulator's PNGs into a flat snapshots_artifacts/."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write_dashboard_snapshots(self):
+        committed = Path("SignLanguageModelTests/__Snapshots__/DashboardTests")
+        committed.mkdir(parents=True)
+        for method in ("testDashboardBothModes", "testDashboardLightMode"):
+            render(committed / f"{method}.dashboard-light.png", BASE)
+            snapshot(Path("snapshots_artifacts"), f"{method}.dashboard-light", (20, 100, 60, 110))
+
+    def test_one_vision_request_covers_both_test_methods(self):
+        self.write_dashboard_snapshots()
+        agent = SanityInspectorAgent(dry_run=True)
+        plan = agent.plan_snapshot_analysis()
+
+        self.assertEqual([[image.name for image in batch] for batch in plan["batches"]],
+                         [["testDashboardBothModes.dashboard-light.diff.png"]])
+        agent.vision_ready(plan)
+        self.assertEqual(agent.snapshot_analysis[1]["image"], "testDashboardLightMode.dashboard-light.diff.png")
+        self.assertEqual(agent.snapshot_analysis[1]["deduplicated_from"],
+                         "testDashboardBothModes.dashboard-light.diff.png")
+
+    def test_missing_gemini_key_reports_errors_instead_of_aborting(self):
+        self.write_dashboard_snapshots()
+        agent = SanityInspectorAgent()
+        agent.gemini_api_key = None
+        asyncio.run(agent.analyze_all_snapshots_async())
+
+        self.assertTrue(agent.sections_done["vision"])
+        self.assertEqual([analysis["status"] for analysis in agent.snapshot_analysis], ["ERROR", "ERROR"])
+        self.assertIn("GEMINI_API_KEY", agent.snapshot_analysis[0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Pre-flight validation of generated Swift files.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from swift_preflight import SymbolTable, check_files, scan_swift  # noqa: E402
+
+
+def problems(files, existing=None):
+    symbols = SymbolTable()
+    for path, source in (existing or {}).items():
+        symbols.add(path, scan_swift(source)["declarations"])
+    return {path: [problem["message"] for problem in found]
+            for path, found in check_files(files, symbols).items() if found}
+
+
+class DeclarationConflictTest(unittest.TestCase):
+    def test_internal_types_collide_across_files(self):
+        found = problems({"SignLanguageModel/Views/A.swift": "struct Helper {}\n"},
+                         {"SignLanguageModel/Views/B.swift": "struct Helper {}\n"})
+        self.assertEqual(list(found), ["SignLanguageModel/Views/A.swift"])
+
+    def test_private_types_are_file_scoped(self):
+        found = problems(
+            {"SignLanguageModel/Views/A.swift": "private struct Helper {}\n",
+             "SignLanguageModel/Views/C.swift": "@MainActor fileprivate final class Helper {}\n"},
+            {"SignLanguageModel/Views/B.swift": "private struct Helper {}\n"}
+        )
+        self.assertEqual(found, {})
+
+    def test_private_types_still_collide_within_a_file(self):
+        found = problems({"SignLanguageModel/Views/A.swift": "private struct Helper {}\nprivate enum Helper {}\n"})
+        self.assertEqual(len(found["SignLanguageModel/Views/A.swift"]), 2)
+
+    def test_modifier_does_not_leak_to_the_next_declaration(self):
+        scan = scan_swift("private let shared = 1\nstruct Helper {}\n")
+        self.assertFalse(scan["declarations"][0]["private"])
+
+    def test_test_target_is_a_separate_module(self):
+        found = problems({"SignLanguageModelTests/Mocks/MockRecognizer.swift": "final class GestureRecognizer {}\n"},
+                         {"SignLanguageModel/Domain/GestureRecognizer.swift": "final class GestureRecognizer {}\n"})
+        self.assertEqual(found, {})
+
+
+class RegexLiteralTest(unittest.TestCase):
+    def test_parentheses_in_regex_literals_are_not_code(self):
+        source = (
+            "let open = /\\(/\n"
+            "let digits = try #/(\\d+)/#.wholeMatch(in: text)\n"
+            "if text.contains(/[(]+/) { print(text) }\n"
+            "struct Parser {}\n"
+        )
+        scan = scan_swift(source)
+        self.assertEqual(scan["problems"], [])
+        self.assertEqual([declaration["name"] for declaration in scan["declarations"]], ["Parser"])
+
+    def test_division_is_not_a_regex(self):
+        scan = scan_swift("let half = total / 2\nlet ratio = (a / b) / (c / d)\n")
+        self.assertEqual(scan["problems"], [])
+
+    def test_unbalanced_code_is_still_reported(self):
+        scan = scan_swift("let x = /a/\nfunc f() {\n")
+        self.assertEqual(len(scan["problems"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+SwiftLint baseline fingerprints across runners.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from swiftlint_aggregator import SwiftLintAggregator, relative_path  # noqa: E402
+
+SOURCE = "import SwiftUI\n\nlet value = items.first!\n"
+
+
+def checkout(root: Path) -> Path:
+    source = root / "SignLanguageModel" / "Views" / "HomeView.swift"
+    source.parent.mkdir(parents=True)
+    source.write_text(SOURCE)
+    return source
+
+
+class RelativePathTest(unittest.TestCase):
+    def test_workspace_prefix(self):
+        self.assertEqual(relative_path("/work/repo/SignLanguageModel/A.swift", "/work/repo"),
+                         "SignLanguageModel/A.swift")
+
+    def test_other_runner_checkout(self):
+        path = "/Users/runner/work/SignLanguageModel/SignLanguageModel/SignLanguageModelTests/ATests.swift"
+        self.assertEqual(relative_path(path, "/home/runner/work/SignLanguageModel/SignLanguageModel"),
+                         "SignLanguageModelTests/ATests.swift")
+
+
+class CrossRunnerBaselineTest(unittest.TestCase):
+    def test_macos_baseline_matches_ubuntu_reanalysis(self):
+        with tempfile.TemporaryDirectory() as macos, tempfile.TemporaryDirectory() as ubuntu:
+            macos_source = checkout(Path(macos))
+            checkout(Path(ubuntu))
+            finding = {"rule_id": "force_unwrapping", "severity": "warning", "line": 3,
+                       "file": str(macos_source), "reason": "Force unwrapping should be avoided"}
+
+            recorder = SwiftLintAggregator(workspace=macos, collect_fingerprints=True)
+            recorder.add(dict(finding))
+
+            # Same report re-analyzed on another machine, after the macOS checkout is gone
+            macos_source.unlink()
+            reanalysis = SwiftLintAggregator(baseline=dict(recorder.fingerprints), workspace=ubuntu)
+            reanalysis.add(dict(finding))
+
+            self.assertEqual(reanalysis.new_findings, [])
+            self.assertEqual(dict(reanalysis.by_file), {"SignLanguageModel/Views/HomeView.swift": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
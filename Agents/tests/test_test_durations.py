@@ -0,0 +1,60 @@
+"""
+Slow-test detection against the rolling median/MAD baseline.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from test_durations import DurationHistory, detect_slowdowns, match_test_duration  # noqa: E402
+
+SNAPSHOT_TEST = "DashboardSnapshotTests.testDashboardDarkMode"
+MODEL_TEST = "GestureRecognizerTests.testClassify"
+
+
+class DetectSlowdownsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = DurationHistory(Path(self.tmp.name) / "test_durations.json")
+        for run, (snapshot, model) in enumerate([(0.40, 1.00), (0.42, 1.02), (0.39, 0.98),
+                                                  (0.41, 1.01), (0.40, 0.99), (0.43, 1.00)]):
+            self.history.append_run(f"sha{run}", {SNAPSHOT_TEST: snapshot, MODEL_TEST: model})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_slowdown_beyond_threshold_is_flagged(self):
+        slow = detect_slowdowns({SNAPSHOT_TEST: 3.0, MODEL_TEST: 1.0}, self.history)
+
+        self.assertEqual([entry["test"] for entry in slow], [SNAPSHOT_TEST])
+        self.assertEqual(slow[0]["baseline_median"], 0.405)
+        self.assertEqual(slow[0]["samples"], 6)
+        self.assertGreater(slow[0]["ratio"], 7)
+
+    def test_slowdown_below_threshold_is_not_flagged(self):
+        # Far outside the noise, but only 0.2s and 1.2x slower than the median
+        self.assertEqual(detect_slowdowns({MODEL_TEST: 1.2}, self.history), [])
+
+    def test_test_without_baseline_is_not_flagged(self):
+        self.assertEqual(detect_slowdowns({"OnboardingTests.testWelcome": 30.0}, self.history), [])
+
+    def test_too_few_samples_are_no_baseline(self):
+        history = DurationHistory(Path(self.tmp.name) / "short.json")
+        history.append_run("sha0", {SNAPSHOT_TEST: 0.4})
+        self.assertEqual(detect_slowdowns({SNAPSHOT_TEST: 3.0}, history), [])
+
+
+class MatchTestDurationTest(unittest.TestCase):
+    def test_xctest_line(self):
+        line = "Test Case '-[SignLanguageModelTests.DashboardSnapshotTests testDashboardDarkMode]' passed (0.412 seconds)."
+        self.assertEqual(match_test_duration(line), {"test": SNAPSHOT_TEST, "status": "passed", "seconds": 0.412})
+
+
+if __name__ == "__main__":
+    unittest.main()
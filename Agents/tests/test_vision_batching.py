@@ -0,0 +1,71 @@
+"""
+Vision request accounting for batched snapshot judgments.
+
+Usage:
+    python -m unittest discover -s Agents/tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sanity_agent import SanityInspectorAgent  # noqa: E402
+
+
+class ScriptedAgent(SanityInspectorAgent):
+    """Answers Vision requests from a script instead of calling Gemini."""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.vision_references = False
+        self.responses = list(responses)
+
+    def generate_content(self, contents, route, task="vision"):
+        return self.responses.pop(0)
+
+
+def verdict(image: str, confidence: str = "high") -> dict:
+    return {"image": image, "judgment": "ACCEPTABLE", "confidence": confidence}
+
+
+class BatchAccountingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.images = []
+        for variant in ("dashboard-dark", "dashboard-light"):
+            path = Path(self.tmp.name) / f"testDashboardBothModes.{variant}.diff.png"
+            path.write_bytes(b"png")
+            self.images.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batch_counts_each_image_once(self):
+        agent = ScriptedAgent([json.dumps({"verdicts": [verdict(image.name) for image in self.images]})])
+        analyses = agent.analyze_snapshot_batch(self.images)
+
+        self.assertEqual([analysis["batch_size"] for analysis in analyses], [2, 2])
+        self.assertEqual(agent.vision_stats, {"requests": 1, "images": 2})
+
+    def test_unparseable_batch_is_not_counted_twice(self):
+        single = json.dumps(verdict("any"))
+        agent = ScriptedAgent(["I could not compare these images.", single, single])
+        analyses = agent.analyze_snapshot_batch(self.images)
+
+        self.assertEqual([analysis["status"] for analysis in analyses], ["ANALYZED", "ANALYZED"])
+        self.assertEqual(agent.vision_stats, {"requests": 3, "images": 2})
+
+    def test_image_missing_from_batch_is_counted_when_reasked(self):
+        agent = ScriptedAgent([json.dumps({"verdicts": [verdict(self.images[0].name)]}),
+                               json.dumps(verdict(self.images[1].name))])
+        agent.analyze_snapshot_batch(self.images)
+
+        self.assertEqual(agent.vision_stats, {"requests": 2, "images": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
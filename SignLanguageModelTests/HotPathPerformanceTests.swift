@@ -0,0 +1,97 @@
+//
+//  HotPathPerformanceTests.swift
+//  SignLanguageModelTests
+//
+//  Performance baselines for hot-path utilities
+//  Results are parsed by the Sanity Inspector Agent and compared per device
+//
+
+import XCTest
+import CoreGraphics
+import CoreVideo
+@testable import SignLanguageModel
+
+final class HotPathPerformanceTests: XCTestCase {
+
+    // MARK: - Data Structures
+
+    func testCircularBufferThroughput() {
+        // Given: A buffer sized like a frame window
+        let buffer = CircularBuffer<Int>(capacity: 1_024)
+
+        // When/Then: Interleaved writes and reads stay within baseline
+        measure(metrics: [XCTClockMetric()]) {
+            for value in 0..<100_000 {
+                buffer.write(value)
+                _ = buffer.read()
+            }
+        }
+    }
+
+    func testThreadSafeQueueThroughput() {
+        // Given: The actor-backed queue frames are handed through
+        let queue = ThreadSafeQueue<Int>()
+
+        // When/Then: Enqueue/dequeue pairs across the actor stay within baseline
+        measure(metrics: [XCTClockMetric()]) {
+            let drained = expectation(description: "queue drained")
+            Task {
+                for value in 0..<10_000 {
+                    await queue.enqueue(value)
+                    _ = await queue.dequeue()
+                }
+                drained.fulfill()
+            }
+            wait(for: [drained], timeout: 10)
+        }
+    }
+
+    // MARK: - Frame Conversion
+
+    func testPixelBufferToCGImageConversion() throws {
+        // Given: A camera-sized BGRA frame
+        var pixelBuffer: CVPixelBuffer?
+        let status = CVPixelBufferCreate(kCFAllocatorDefault, 1_280, 720, kCVPixelFormatType_32BGRA, nil, &pixelBuffer)
+        XCTAssertEqual(status, kCVReturnSuccess)
+        let frame = try XCTUnwrap(pixelBuffer)
+
+        // When/Then: Converting a window of frames stays within baseline
+        measure(metrics: [XCTClockMetric()]) {
+            for _ in 0..<100 {
+                _ = frame.toCGImage()
+            }
+        }
+    }
+
+    func testCGImageResize() throws {
+        // Given: A camera-sized frame resized to the model input
+        let context = try XCTUnwrap(CGContext(
+            data: nil, width: 1_280, height: 720, bitsPerComponent: 8, bytesPerRow: 0,
+            space: CGColorSpaceCreateDeviceRGB(), bitmapInfo: CGImageAlphaInfo.premultipliedLast.rawValue
+        ))
+        let image = try XCTUnwrap(context.makeImage())
+        let inputSize = CGSize(width: 224, height: 224)
+
+        // When/Then: Resizing a window of frames stays within baseline
+        measure(metrics: [XCTClockMetric()]) {
+            for _ in 0..<100 {
+                _ = image.resize(to: inputSize)
+            }
+        }
+    }
+
+    // MARK: - Instrumentation
+
+    func testPerformanceMonitorOverhead() {
+        // Given: The shared monitor used around pipeline stages
+        let monitor = PerformanceMonitor.shared
+
+        // When/Then: Start/stop pairs add negligible overhead
+        measure(metrics: [XCTClockMetric()]) {
+            for _ in 0..<1_000 {
+                let id = monitor.startMeasuring(label: "frame")
+                monitor.stopMeasuring(id: id)
+            }
+        }
+    }
+}